@@ -20,11 +20,15 @@ import json
 from decimal import Decimal
 
 from libraries.logger import logger
+from libraries.profiler import profileonsignal
 from libraries.stopper import askstoplimit
 from libraries.pricegetter import ticker
-from libraries.definer import ticksizes as ticksizes
+from libraries.cataloguer import instrument as instrument
 from libraries.messenger import sendmessage as sendmessage
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 # Set trading default trading pair in cause a BASH wrapper has not been used.
 pair = 'BTCUSD'
 size = '0.00001'
@@ -41,8 +45,7 @@ else:
     logger.debug ( f'command line parameters improperly specified. using default values for {pair}...' )
 
 # Determine tick size.
-item = [ item['tick'] for item in ticksizes if item['currency'] == pair[:3] ]
-tick = Decimal( item[0] )
+tick = instrument( pair ).tick
 
 # Get the highest bid in the orderbook.
 last = ticker( pair )["bid"]
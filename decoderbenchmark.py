@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+#
+# script name: decoderbenchmark.py
+# script author: munair simpson
+# script created: 20221018
+# script purpose: measure how many Gemini marketdata messages each decoder library backend decodes per second.
+
+
+# Detailed Description:
+#  1. Read a capture of raw v2 marketdata websocket messages (one message per line, optionally gzip compressed)
+#     or a recording made by marketdatarecorder.py. Without a capture file, generate representative l2_updates and trade messages instead.
+#  2. Decode every message the way the handlers used to (json.loads and a Decimal for every price and quantity).
+#  3. Decode every message with the decoder library into Trade and L2update structs (once per installed backend).
+#  4. Print the messages per second for each using the logger library.
+#
+# Execution:
+#   - Use the wrapper BASH script in the "tests" directory.
+
+import sys
+import gzip
+import json
+import time
+import random
+
+from decimal import Decimal
+
+from libraries.logger import logger
+from libraries.profiler import profileonsignal
+from libraries.decoder import decode, msgspec, orjson
+from libraries.recorder import readrecording
+
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
+# Set default capture file and number of passes in case a BASH wrapper has not been used.
+capture = ''
+passes = 5
+
+# Override defaults with command line parameters from BASH wrapper.
+if len(sys.argv) == 3 :
+    capture = sys.argv[1]
+    passes = int( sys.argv[2] )
+else :
+    logger.debug ( f'incorrect number of command line arguments. using generated messages and {passes} passes...' )
+
+def generate( count = 20000 ):
+    # Representative mix of BTCUSD messages: mostly small L2 updates and some trades.
+    random.seed( 0 )
+    messages = []
+    for index in range( count ):
+        price = f'{20000 + random.randint( -5000, 5000 ) / 100:.2f}'
+        if index % 5 == 0:
+            messages.append( json.dumps( { 'type': 'trade', 'symbol': 'BTCUSD', 'event_id': index, 'timestamp': 1666051200000 + index, 'price': price, 'quantity': f'{random.random():.8f}', 'side': random.choice( [ 'buy', 'sell' ] ) } ) )
+        else:
+            changes = [ [ random.choice( [ 'buy', 'sell' ] ), price, f'{random.random():.8f}' ] for _ in range( random.randint( 1, 3 ) ) ]
+            messages.append( json.dumps( { 'type': 'l2_updates', 'symbol': 'BTCUSD', 'changes': changes } ) )
+    return messages
+
+def read( path ):
+    # Raw messages, one per line (gzip compressed when the file name ends in ".gz").
+    # Recordings (marketdatarecorder.py) are recognized by their first line. Their v2 marketdata frames are used.
+    opener = gzip.open if path.endswith( '.gz' ) else open
+    with opener( path, 'rt' ) as capturefile: lines = [ line.rstrip( '\n' ) for line in capturefile if line.strip() ]
+    if lines and lines[0].startswith( '{"time":' ): return [ frame for _, _, frame in readrecording( path, '/v2/marketdata' ) ]
+    return lines
+
+def legacy( message ):
+    # Replica of the handlers before the decoder library.
+    dictionary = json.loads( message )
+    if dictionary.get( 'type' ) == 'trade': return Decimal( dictionary['price'] ), Decimal( dictionary['quantity'] )
+    if dictionary.get( 'type' ) == 'l2_updates': return [ ( side, Decimal( price ), Decimal( quantity ) ) for side, price, quantity in dictionary['changes'] ]
+    return dictionary
+
+def measure( function, messages ):
+    # Return the best messages per second over the passes.
+    best = 0
+    for _ in range( passes ):
+        start = time.perf_counter()
+        for message in messages: function( message )
+        best = max( best, len( messages ) / ( time.perf_counter() - start ) )
+    return best
+
+messages = read( capture ) if capture else generate()
+logger.info ( f'decoding {len(messages):,} messages {passes} times per decoder ({capture or "generated messages"}).' )
+
+baseline = measure( legacy, messages )
+logger.info ( f'json.loads and Decimal (before): {baseline:,.0f} messages per second.' )
+
+for name, installed in ( ( 'json', True ), ( 'orjson', orjson is not None ), ( 'msgspec', msgspec is not None ) ):
+    if not installed:
+        logger.info ( f'{name} decoder: not installed.' )
+        continue
+    rate = measure( lambda message: decode( message, name ), messages )
+    logger.info ( f'{name} decoder: {rate:,.0f} messages per second ({rate / baseline:.2f}x).' )
+
+# Let the shell know we successfully made it this far!
+sys.exit(0)
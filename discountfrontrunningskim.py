@@ -17,15 +17,21 @@ import requests
 from decimal import Decimal
 
 import libraries.definer as definer
+import libraries.cataloguer as cataloguer
 
 from libraries.logger import logger
-from libraries.pricegetter import ticker
+from libraries.profiler import profileonsignal
+from libraries.bookkeeper import bestbid
+from libraries.bookkeeper import maintainbook
 from libraries.askmonitor import floatingfall
 from libraries.frontrunner import bidorder
 from libraries.liquiditymaker import askorder
 from libraries.skimvalidator import confirmexecution
 from libraries.messenger import sendmessage as sendmessage
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 
 # Set bid size in the base currency (BTC in this case). You will accumulate USD.
 # This amount should exceed 20 cents ['0.00001' is the minimum for BTCUSD].
@@ -49,9 +55,10 @@ else:
     sendmessage ( f'command line parameters improperly specified. using default values {pair}...' )
 
 # Define tick size.
-list = definer.ticksizes
-item = [ item['tick'] for item in list if item['currency'] == pair[:3] ]
-tick = Decimal( item[0] )
+tick = cataloguer.instrument( pair ).tick
+
+# Maintain a local orderbook in the background so the highest bid can be read from memory.
+maintainbook( pair )
 
 # Tell the user that the code is opening a websocket connection and waiting for transaction prices to decrease.
 fragmentone = f'Waiting for the trading price of {pair[:3]} to drop {Decimal(drop)*100}%. '
@@ -63,8 +70,8 @@ sendmessage ( f'{fragmentone}{fragmenttwo}')
 # Wait for the trading price to fall.
 deal = floatingfall( pair, drop )
 
-# Get public market data on the highest bid in the orderbook using the Gemini REST API.
-cost = ticker( pair )["bid"]
+# Get the highest bid in the orderbook (from memory, falling back to the Gemini REST API).
+cost = bestbid( pair )
 
 # Make sure that the highest deal price is less than the highest bid (i.e. "cost" exceeds "deal").
 # Without this check it is possible to submit a frontrunning bid that exceeds required discount.
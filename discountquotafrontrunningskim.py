@@ -17,11 +17,15 @@ import requests
 from decimal import Decimal
 
 from libraries.logger import logger
+from libraries.profiler import profileonsignal
 from libraries.askmonitor import floatingfall
 from libraries.frontrunner import quotabid
 from libraries.liquiditymaker import quotaask
 from libraries.skimvalidator import confirmexecution
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 
 # Set quote currency (USD in this case) budget.
 # This amount should exceed 20 cents ['0.00001' is the minimum for YFIUSD].
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+#
+# script name: exchangesimulator.py
+# script author: munair simpson
+# script created: 20221018
+# script purpose: run a local Gemini exchange simulator for offline latency and throughput tests.
+
+
+# Detailed Description:
+#  1. Use the simulator library to serve the REST API, the order events websocket and the marketdata websockets locally.
+#  2. Simulate a random walk market for the pairs specified (or replay a recording made by marketdatarecorder.py).
+#  3. Match the orders submitted against it, delaying every response and frame by the latency specified.
+#  4. Point definer.restserver at http://127.0.0.1:<port> and definer.sockserver at ws://127.0.0.1:<port> to trade against it.
+#
+# Execution:
+#   - Use the wrapper BASH script in the "tests" directory.
+
+import sys
+import asyncio
+
+from libraries.logger import logger
+from libraries.profiler import profileonsignal
+from libraries.simulator import Exchangesimulator
+
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
+# Set default trading pairs (with starting prices), port, latency and recording in case a BASH wrapper has not been used.
+marketpairs = "BTCUSD:20000,ETHUSD:1500"
+port = "8780"
+latency = "0"
+recording = ""
+
+# Override defaults with command line parameters from BASH wrapper.
+if len ( sys.argv ) in ( 4, 5 ) :
+    marketpairs = sys.argv[1]
+    port = sys.argv[2]
+    latency = sys.argv[3]
+    if len ( sys.argv ) == 5 : recording = sys.argv[4]
+else :
+    logger.warning ( f'incorrect number of command line arguments. using default values...' )
+    logger.warning ( f'marketpairs: {marketpairs}' )
+    logger.warning ( f'port: {port}' )
+    logger.warning ( f'latency: {latency}' )
+
+# Latency is specified in milliseconds.
+prices = dict( marketpair.split( ':' ) for marketpair in marketpairs.split( ',' ) )
+simulator = Exchangesimulator( prices, recording = recording or None, latency = float( latency ) / 1000 )
+
+try : # Simulate the exchange until interrupted.
+    asyncio.run ( simulator.serve( '127.0.0.1', int( port ) ) )
+except KeyboardInterrupt :
+    pass
+
+sys.exit ( 0 )
\ No newline at end of file
@@ -15,9 +15,13 @@ import requests
 from decimal import Decimal
 
 from libraries.logger import logger
+from libraries.profiler import profileonsignal
 from libraries.frontrunner import askorder
 from libraries.fillvalidator import confirmexecution
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 
 # Set bid size ['0.1' is the minimum for DAIUSD].
 pair = 'DAIUSD'
@@ -20,23 +20,28 @@
 
 import sys
 import json
-import time
 import asyncio
 
 from decimal import Decimal
 
 from libraries.logger import logger
-from libraries.pricegetter import ticker
-from libraries.ordermanager import islive
-from libraries.frontrunner import bidorder
-from libraries.stopper import askstoplimit
-from libraries.ordermanager import cancelorder
-from libraries.volumizer import notionalvolume
+from libraries.profiler import profileonsignal
+from libraries.bookkeeper import maintainbook
+from libraries.multiplexer import multiplexer as multiplexer
+from libraries.asyncordermanager import islive
+from libraries.asyncordermanager import bidorder
+from libraries.asyncordermanager import askstoplimit
+from libraries.asyncordermanager import cancelorder
+from libraries.asyncordermanager import closesession
+from libraries.asyncordermanager import notionalvolume
 from libraries.trademonitor import blockpricerange
-from libraries.definer import ticksizes as ticksizes
+from libraries.cataloguer import instrument as instrument
 from libraries.closevalidator import confirmexecution
 from libraries.messenger import sendmessage as sendmessage
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 # Set bid size in the base currency (BTC in this case).
 # This amount should exceed ~25 cents ['0.00001' is the minimum for BTCUSD].
 # You will accumulate gains in the quote currency (USD in this case). This amount is called the "quotegain".
@@ -71,352 +76,358 @@ if stop.compare( sell ) == 1:
     sys.exit(1)
 
 # Determine tick size.
-item = [ item['tick'] for item in ticksizes if item['currency'] == pair[:3] ]
-tick = Decimal( item[0] )
-
-# Determine Gemini API transaction fee. Conversion from basis points required.
-geminiapifee = Decimal( 0.0001 ) * Decimal ( notionalvolume().json()["api_maker_fee_bps"] )
-
-# Submit limit bid order, report response, and verify submission.
-logger.debug ( f'Submitting {pair} frontrunning limit bid order.' )
-
-try :
-    jsonresponse = bidorder( pair, size ).json()
-except Exception as e :
-    # Report exception.
-    notification = f'While trying to submit a frontrunning limit bid order the follow error occurred: {e} '
-    logger.debug ( f'{notification}Let\'s exit. Please try rerunning the code!' )
-    sys.exit(1) # Exit. Continue no further.
-
-# To debug remove comment character below:
-# logger.info ( json.dumps( jsonresponse, sort_keys=True, indent=4, separators=(',', ': ') ) )
-
-try :
-    if jsonresponse["is_cancelled"] : 
-        notification = f'Bid order {jsonresponse["order_id"]} was cancelled. '
-        logger.debug ( '{notification} Let\'s exit. Please try rerunning the code!' )
-        sys.exit(1) # Exit. Continue no further.
+tick = instrument( pair ).tick
 
-    else:
-        infomessage = f'Bid order {jsonresponse["order_id"]} for {jsonresponse["remaining_amount"]} {jsonresponse["symbol"].upper()[:3]} '
-        infomessage = infomessage + f'at {jsonresponse["price"]} {jsonresponse["symbol"].upper()[3:]} is active and booked. '
-        logger.info ( infomessage )
-        sendmessage ( infomessage )
-
-except KeyError as e:
-    warningmessage = f'KeyError: {e} was not present in the response from the REST API server.'
-    logger.warning ( warningmessage )
-    try:    
-        if jsonresponse["result"] : 
-            criticalmessage = f'\"{jsonresponse["reason"]}\" {jsonresponse["result"]}: {jsonresponse["message"]}'
-            logger.critical ( criticalmessage ) ; sendmessage ( criticalmessage )
-            sys.exit(1)
+async def trail() -> None:
 
-    except Exception as e:
-        criticalmessage = f'Exception: {e} '
-        logger.critical ( f'Unexpecter error. Unsuccessful bid order submission. {criticalmessage}' )
-        sys.exit(1)
-
-# Confirm order execution.
-confirmexecution( jsonresponse["order_id"] )
-
-# Define the trade cost price and cast it.
-costprice = Decimal( jsonresponse["price"] )
-
-# Calculate exit price.
-exitratio = Decimal( 1 + sell + geminiapifee )
-exitprice = Decimal( costprice * exitratio ).quantize( tick )
-
-# Calculate stop price.
-stopratio = Decimal( 1 - stop )
-stopprice = Decimal( exitprice * stopratio ).quantize( tick )
-
-# Calculate sell price.
-sellratio = Decimal( 1 - sell - geminiapifee )
-sellprice = Decimal( exitprice * sellratio ).quantize( tick )
-
-# Calculate quote gain.
-quotegain = Decimal( sellprice * size - costprice * size ).quantize( tick )
-ratiogain = Decimal( 100 * sellprice * size / costprice / size - 100 ).quantize( tick )
-
-# Validate "stop price".
-if stopprice.compare( exitprice ) == 1:
-    # Make sure that the "stop price" is below the purchase price (i.e. "cost price").
-    notification = f'The stop order price {stopprice:,.2f} {pair[3:]} cannot exceed the future market price of {exitprice:,.2f} {pair[3:]}. '
-    logger.error ( f'{notification}' ) ; sendmessage ( f'{notification}' ) ; sys.exit(1)
-
-# Record parameters to logs.
-logger.info ( f'Cost Price: {costprice}' )
-logger.info ( f'Exit Price: {exitprice}' )
-logger.info ( f'Stop Price: {stopprice}' )
-logger.info ( f'Sell Price: {sellprice}' )
-logger.info ( f'Quote Gain: {quotegain} {pair[3:]}' )
-logger.info ( f'Ratio Gain: {ratiogain:.2f}%' )
-
-# Explain the opening a websocket connection.
-# Also explain the wait for an increase in the prices sellers are willing to take to rise above the "exitprice".
-infomessage = f'Waiting for sellers to take {exitprice:,.2f} {pair[3:]} to rid themselves of {pair[:3]} '
-infomessage = infomessage + f'[i.e. rise {Decimal( sell + geminiapifee ) * 100:,.2f}%]. '
-logger.info ( f'{infomessage}' ) ; sendmessage ( f'{infomessage}' )
-
-# Loop.
-while True : # Block until the price sellers are willing to take exceeds the exitprice. 
-
-    try: 
-        # Open websocket connection. 
-        # Block until out of bid price bounds (work backwards to get previous stop order's sell price).
-        websocketoutput : str = asyncio.run (
-            blockpricerange (
-                marketpair = pair, 
-                upperbound = exitprice, 
-                lowerbound = -exitprice
-            )
-        )
-    except Exception as e:
+    # Run the whole strategy in one persistent event loop.
+    # Market data keeps flowing while the asynchronous order requests below are in flight.
+
+    # Maintain a local orderbook in the background so the highest bid can be read from memory.
+    maintainbook( pair )
+
+    # Determine Gemini API transaction fee. Conversion from basis points required.
+    geminiapifee = Decimal( 0.0001 ) * Decimal ( ( await notionalvolume() )["api_maker_fee_bps"] )
+
+    # Submit limit bid order, report response, and verify submission.
+    logger.debug ( f'Submitting {pair} frontrunning limit bid order.' )
+
+    try :
+        jsonresponse = await bidorder( pair, size )
+    except Exception as e :
         # Report exception.
-        notification = f'Error : {e} '
-        logger.debug ( f'{notification}Let\'s reestablish the connection and try again! ' )
-        time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
-        continue # Restart while loop logic.
-    logger.info ( f'{Decimal( websocketoutput["price"] ).quantize( tick ):,.2f} is out of bounds. ') # Report status.
-    break # Break out of the while loop because the subroutine ran successfully.
-
-# Loop.
-while True : # Block until achieving the successful submission of an initial stop limit ask order. 
-        
-    # Submit initial Gemini "stop-limit" order. 
-    # If in doubt about what's going on, refer to documentation here: https://docs.gemini.com/rest-api/#new-order.
-    notification = f'Submitting initial stop-limit (ask) order with a {stopprice:,.2f} {pair[3:]} stop. '
-    notification = notification + f'This stop limit order has a {sellprice:,.2f} {pair[3:]} limit price to sell {size} {pair[:3]}. '
-    notification = notification + f'Resulting in a {ratiogain:,.2f}% gain if executed. '
-    logger.debug ( f'{notification}' ) ; sendmessage ( f'{notification}' )
-    try:    
-        jsonresponse = askstoplimit( str(pair), str(size), str(stopprice), str(sellprice) ).json()
-    except Exception as e:
-        logger.info ( f'Unable to get information on ask stop limit order. Error: {e}' )
-        time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
-        continue # Keep trying to submit ask stop limit order.
-    logger.debug ( json.dumps( jsonresponse, sort_keys=True, indent=4, separators=(',', ': ') ) )
-    time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
-    break # Break out of the while loop because the subroutine ran successfully.
-
-# Loop.
-while True : # Block until order status has been determined. 
-
-    time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
-    
-    try:
-        orderstatus = islive( jsonresponse["order_id"] ).json() # Post REST API call to determine order's status.
-    except Exception as e:
-        logger.info ( f'Unable to retrieve stop limit order status. Error: {e}' )
-        time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
-        continue # Keep trying to get information on the order's status infinitely.
-    try:
-        if orderstatus['is_live'] : 
-            logger.info( f'Initial stop limit order {orderstatus["order_id"]} is live on the Gemini orderbook. ' )
-            jsonresponse = orderstatus # Assign orderstatus to the jsonresponse used subsequently.
-            break # Break out of the while loop because we want to reset the stop order as prices rise.
-        else : 
-            logger.info( f'Initial stop limit order {orderstatus["order_id"]} is NOT live on the Gemini orderbook. ' )
-            jsonresponse = orderstatus # Assign orderstatus to the jsonresponse used subsequently.
-            break # Break out of the while loop because the subroutine ran successfully.
+        notification = f'While trying to submit a frontrunning limit bid order the follow error occurred: {e} '
+        logger.debug ( f'{notification}Let\'s exit. Please try rerunning the code!' )
+        sys.exit(1) # Exit. Continue no further.
+
+    # To debug remove comment character below:
+    # logger.info ( json.dumps( jsonresponse, sort_keys=True, indent=4, separators=(',', ': ') ) )
+
+    try :
+        if jsonresponse["is_cancelled"] : 
+            notification = f'Bid order {jsonresponse["order_id"]} was cancelled. '
+            logger.debug ( '{notification} Let\'s exit. Please try rerunning the code!' )
+            sys.exit(1) # Exit. Continue no further.
+
+        else:
+            infomessage = f'Bid order {jsonresponse["order_id"]} for {jsonresponse["remaining_amount"]} {jsonresponse["symbol"].upper()[:3]} '
+            infomessage = infomessage + f'at {jsonresponse["price"]} {jsonresponse["symbol"].upper()[3:]} is active and booked. '
+            logger.info ( infomessage )
+            sendmessage ( infomessage )
+
     except KeyError as e:
-        warningmessage = f'KeyError: {e} was not present in the response from the REST API server. '
-        logger.warning ( f'{warningmessage} Something went wrong.. Checking for an error message...' )
+        warningmessage = f'KeyError: {e} was not present in the response from the REST API server.'
+        logger.warning ( warningmessage )
         try:    
-            if orderstatus["result"] : 
-                logger.warning ( f'\"{orderstatus["reason"]}\" {orderstatus["result"]}: {orderstatus["message"]}' )
-                continue
+            if jsonresponse["result"] : 
+                criticalmessage = f'\"{jsonresponse["reason"]}\" {jsonresponse["result"]}: {jsonresponse["message"]}'
+                logger.critical ( criticalmessage ) ; sendmessage ( criticalmessage )
+                sys.exit(1)
+
         except Exception as e:
             criticalmessage = f'Exception: {e} '
-            logger.critical ( f'Unexpecter error. {criticalmessage}' ) ; sendmessage ( f'Unexpecter error. {criticalmessage}' )
-            time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
-            continue
+            logger.critical ( f'Unexpecter error. Unsuccessful bid order submission. {criticalmessage}' )
+            sys.exit(1)
 
-# Loop.
-while True : # Block until prices rise (then cancel and resubmit stop limit order) or block until a stop limit ask order was "closed". 
+    # Confirm order execution (the validator blocks, so it runs in a worker thread).
+    await asyncio.to_thread( confirmexecution, jsonresponse["order_id"] )
 
-    # Break out of loop if order "closed".
-    if not jsonresponse["is_live"] : break
+    # Define the trade cost price and cast it.
+    costprice = Decimal( jsonresponse["price"] )
 
-    # Explain upcoming actions.
-    logger.debug ( f'Changing exitratio from {exitratio} to {Decimal( 1 + stop + geminiapifee )}. ')
-    logger.debug ( f'Changing exitprice from {exitprice} to {Decimal( exitprice * exitratio ).quantize( tick )}. ')
+    # Calculate exit price.
+    exitratio = Decimal( 1 + sell + geminiapifee )
+    exitprice = Decimal( costprice * exitratio ).quantize( tick )
 
-    # Lower the exit ratio to lock gains faster.
-    exitratio = Decimal( 1 + stop + geminiapifee )
+    # Calculate stop price.
+    stopratio = Decimal( 1 - stop )
+    stopprice = Decimal( exitprice * stopratio ).quantize( tick )
 
-    # Calculate new exit price (block until exitprice exceeded).
-    exitprice = Decimal( exitprice * exitratio ).quantize( tick )
+    # Calculate sell price.
+    sellratio = Decimal( 1 - sell - geminiapifee )
+    sellprice = Decimal( exitprice * sellratio ).quantize( tick )
 
-    # Recalculate quote gain.
+    # Calculate quote gain.
     quotegain = Decimal( sellprice * size - costprice * size ).quantize( tick )
-    ratiogain = Decimal( 100 * sellprice * size / costprice / size - 100 )
+    ratiogain = Decimal( 100 * sellprice * size / costprice / size - 100 ).quantize( tick )
+
+    # Validate "stop price".
+    if stopprice.compare( exitprice ) == 1:
+        # Make sure that the "stop price" is below the purchase price (i.e. "cost price").
+        notification = f'The stop order price {stopprice:,.2f} {pair[3:]} cannot exceed the future market price of {exitprice:,.2f} {pair[3:]}. '
+        logger.error ( f'{notification}' ) ; sendmessage ( f'{notification}' ) ; sys.exit(1)
+
+    # Record parameters to logs.
+    logger.info ( f'Cost Price: {costprice}' )
+    logger.info ( f'Exit Price: {exitprice}' )
+    logger.info ( f'Stop Price: {stopprice}' )
+    logger.info ( f'Sell Price: {sellprice}' )
+    logger.info ( f'Quote Gain: {quotegain} {pair[3:]}' )
+    logger.info ( f'Ratio Gain: {ratiogain:.2f}%' )
+
+    # Explain the opening a websocket connection.
+    # Also explain the wait for an increase in the prices sellers are willing to take to rise above the "exitprice".
+    infomessage = f'Waiting for sellers to take {exitprice:,.2f} {pair[3:]} to rid themselves of {pair[:3]} '
+    infomessage = infomessage + f'[i.e. rise {Decimal( sell + geminiapifee ) * 100:,.2f}%]. '
+    logger.info ( f'{infomessage}' ) ; sendmessage ( f'{infomessage}' )
 
     # Loop.
-    while True : # Block until prices rise (or fall to stop limit order's sell price).
+    while True : # Block until the price sellers are willing to take exceeds the exitprice. 
 
         try: 
-            # Open websocket connection. 
+            # Watch the shared websocket connection (it stays open between loop iterations). 
             # Block until out of bid price bounds (work backwards to get previous stop order's sell price).
-            websocketoutput : str = asyncio.run (
+            websocketoutput : str = await (
                 blockpricerange (
-                    marketpair = str(pair), 
-                    upperbound = str(exitprice), 
-                    lowerbound = str(sellprice) 
+                    marketpair = pair, 
+                    upperbound = exitprice, 
+                    lowerbound = -exitprice
                 )
             )
         except Exception as e:
             # Report exception.
-            notification = f'The websocket connection failed. '
-            logger.debug ( f'{e}: {notification}Let\'s reestablish the connection and try again! ' )
-            time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
+            notification = f'Error : {e} '
+            logger.debug ( f'{notification}Let\'s reestablish the connection and try again! ' )
+            await asyncio.sleep(1) # Give the shared websocket connection a moment to reconnect.
             continue # Restart while loop logic.
         logger.info ( f'{Decimal( websocketoutput["price"] ).quantize( tick ):,.2f} is out of bounds. ') # Report status.
         break # Break out of the while loop because the subroutine ran successfully.
 
-    # Check if lower bound breached.
-    # If so, the stop order will "close".
-    if exitprice.compare( Decimal( websocketoutput["price"] ) ) == 1: 
-        logger.debug ( f'Ask prices have fallen below the ask price of the stop limit order {jsonresponse["order_id"]}. ' )
-        logger.debug ( f'The stop order at {sellprice} {pair[3:]} should have been completely filled and now "closed". ' )
-        break # The stop limit order should have been executed.
-    else:
-        exitprice = Decimal( websocketoutput["price"] ) # Set the exit price to the websocketoutput price and continue.
-
-    # Explain upcoming actions.
-    logger.debug ( f'Changing stopprice from {stopprice} to {Decimal( exitprice * stopratio ).quantize( tick )}. ')
-    logger.debug ( f'Changing sellprice from {sellprice} to {Decimal( exitprice * sellratio ).quantize( tick )}. ')
-
-    # Calculate new sell/stop prices.
-    stopprice = Decimal( exitprice * stopratio ).quantize( tick )
-    sellprice = Decimal( exitprice * sellratio ).quantize( tick )
-    # Note: "costprice" is no longer the basis of the new exit price (and thus stop and sell prices).
-    # Note: The last transaction price exceeds the previous exit price and creates the new exit price.
-
     # Loop.
-    while True : # Block until existing stop order is cancelled. 
+    while True : # Block until achieving the successful submission of an initial stop limit ask order. 
+
+        # Submit initial Gemini "stop-limit" order. 
+        # If in doubt about what's going on, refer to documentation here: https://docs.gemini.com/rest-api/#new-order.
+        notification = f'Submitting initial stop-limit (ask) order with a {stopprice:,.2f} {pair[3:]} stop. '
+        notification = notification + f'This stop limit order has a {sellprice:,.2f} {pair[3:]} limit price to sell {size} {pair[:3]}. '
+        notification = notification + f'Resulting in a {ratiogain:,.2f}% gain if executed. '
+        logger.debug ( f'{notification}' ) ; sendmessage ( f'{notification}' )
+        try:    
+            jsonresponse = await askstoplimit( str(pair), str(size), str(stopprice), str(sellprice) )
+        except Exception as e:
+            logger.info ( f'Unable to get information on ask stop limit order. Error: {e}' )
+            continue # Keep trying to submit ask stop limit order.
+        logger.debug ( json.dumps( jsonresponse, sort_keys=True, indent=4, separators=(',', ': ') ) )
+        break # Break out of the while loop because the subroutine ran successfully.
 
-        # Attempt to cancel active and booked stop limit (ask) order.
-        logger.debug ( f'Going to try to cancel stop limit order {jsonresponse["order_id"]} in three seconds...' )
-        time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
+    # Loop.
+    while True : # Block until order status has been determined. 
 
         try:
-            jsonresponse = cancelorder( jsonresponse["order_id"] ).json() # Post REST API call to cancel previous order.
+            orderstatus = await islive( jsonresponse["order_id"] ) # Post REST API call to determine order's status.
         except Exception as e:
-            logger.info ( f'Unable to cancel order. Error: {e}' )
-            time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
+            logger.info ( f'Unable to retrieve stop limit order status. Error: {e}' )
             continue # Keep trying to get information on the order's status infinitely.
         try:
-            if jsonresponse['is_live'] : 
-                logger.info( f'Stop limit order {jsonresponse["order_id"]} is live on the Gemini orderbook. ' )
-                continue # Keep tring to cancel the order infinitely.
+            if orderstatus['is_live'] : 
+                logger.info( f'Initial stop limit order {orderstatus["order_id"]} is live on the Gemini orderbook. ' )
+                jsonresponse = orderstatus # Assign orderstatus to the jsonresponse used subsequently.
+                break # Break out of the while loop because we want to reset the stop order as prices rise.
             else : 
-                logger.info( f'Stop limit order {jsonresponse["order_id"]} is NOT live on the Gemini orderbook. ' )
+                logger.info( f'Initial stop limit order {orderstatus["order_id"]} is NOT live on the Gemini orderbook. ' )
+                jsonresponse = orderstatus # Assign orderstatus to the jsonresponse used subsequently.
                 break # Break out of the while loop because the subroutine ran successfully.
         except KeyError as e:
             warningmessage = f'KeyError: {e} was not present in the response from the REST API server. '
             logger.warning ( f'{warningmessage} Something went wrong.. Checking for an error message...' )
             try:    
-                if jsonresponse["result"] : 
-                    logger.warning ( f'\"{jsonresponse["reason"]}\" {jsonresponse["result"]}: {jsonresponse["message"]}' )
+                if orderstatus["result"] : 
+                    logger.warning ( f'\"{orderstatus["reason"]}\" {orderstatus["result"]}: {orderstatus["message"]}' )
                     continue
             except Exception as e:
                 criticalmessage = f'Exception: {e} '
-                logger.critical ( f'Unexpecter error. {criticalmessage}' ) ; sendmessage ( f'Unexpecter error. {criticalmessage}' )
-                time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
+                logger.critical ( f'Unexpecter error. {criticalmessage}' ) ; sendmessage ( f'Unexpecter error. {criticalmessage}', category = 'error' )
                 continue
-    
-    logger.info = f'Cancelled {jsonresponse["price"]} {pair[3:]} stop sell order {jsonresponse["order_id"]}. '
 
     # Loop.
-    while True : # Block until a new stop limit order is submitted. 
+    while True : # Block until prices rise (then cancel and resubmit stop limit order) or block until a stop limit ask order was "closed". 
 
-        while True: # Block until present highest bid price information is attained. 
-            try:
-                # Get highest bid price.
-                # You can only sell for less.
-                highestbid = Decimal( ticker( pair )["bid"] )
-            except Exception as e:
-                logger.debug( f'An exception occured when trying to retrieve the price ticker. Error: {e}' )
-                time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
-                continue
-            break
+        # Break out of loop if order "closed".
+        if not jsonresponse["is_live"] : break
+
+        # Explain upcoming actions.
+        logger.debug ( f'Changing exitratio from {exitratio} to {Decimal( 1 + stop + geminiapifee )}. ')
+        logger.debug ( f'Changing exitprice from {exitprice} to {Decimal( exitprice * exitratio ).quantize( tick )}. ')
+
+        # Lower the exit ratio to lock gains faster.
+        exitratio = Decimal( 1 + stop + geminiapifee )
 
+        # Calculate new exit price (block until exitprice exceeded).
+        exitprice = Decimal( exitprice * exitratio ).quantize( tick )
 
-        # Validate "stop price".
-        # Make sure that the bids exceed it.
-        # Otherwise the order wont be accepted.
-        if highestbid.compare( exitprice ) == 1:
+        # Recalculate quote gain.
+        quotegain = Decimal( sellprice * size - costprice * size ).quantize( tick )
+        ratiogain = Decimal( 100 * sellprice * size / costprice / size - 100 )
 
-            # Post updated stop-limit order.
-            logger.info = f'Submitting stop-limit (ask) order with a {stopprice:,.2f} {pair[3:]} stop {sellprice:,.2f} {pair[3:]} sell. '
-            logger.info = f'There will be an unrealized (i.e. "ratio gain") {ratiogain:,.2f}% profit/loss of {quotegain:,.2f} {pair[3:]} '
-            sendmessage ( f'Submitting {stopprice:,.2f} {pair[3:]} stop {sellprice:,.2f} {pair[3:]} sell limit order. ' )
-            sendmessage ( f'That would realize {quotegain:,.2f} {pair[3:]} [i.e. return {ratiogain:,.2f}%]. ' )
+        # Loop.
+        while True : # Block until prices rise (or fall to stop limit order's sell price).
+
+            try: 
+                # Watch the shared websocket connection (it stays open between loop iterations). 
+                # Block until out of bid price bounds (work backwards to get previous stop order's sell price).
+                websocketoutput : str = await (
+                    blockpricerange (
+                        marketpair = str(pair), 
+                        upperbound = str(exitprice), 
+                        lowerbound = str(sellprice) 
+                    )
+                )
+            except Exception as e:
+                # Report exception.
+                notification = f'The websocket connection failed. '
+                logger.debug ( f'{e}: {notification}Let\'s reestablish the connection and try again! ' )
+                await asyncio.sleep(1) # Give the shared websocket connection a moment to reconnect.
+                continue # Restart while loop logic.
+            logger.info ( f'{Decimal( websocketoutput["price"] ).quantize( tick ):,.2f} is out of bounds. ') # Report status.
+            break # Break out of the while loop because the subroutine ran successfully.
+
+        # Check if lower bound breached.
+        # If so, the stop order will "close".
+        if exitprice.compare( Decimal( websocketoutput["price"] ) ) == 1: 
+            logger.debug ( f'Ask prices have fallen below the ask price of the stop limit order {jsonresponse["order_id"]}. ' )
+            logger.debug ( f'The stop order at {sellprice} {pair[3:]} should have been completely filled and now "closed". ' )
+            break # The stop limit order should have been executed.
+        else:
+            exitprice = Decimal( websocketoutput["price"] ) # Set the exit price to the websocketoutput price and continue.
+
+        # Explain upcoming actions.
+        logger.debug ( f'Changing stopprice from {stopprice} to {Decimal( exitprice * stopratio ).quantize( tick )}. ')
+        logger.debug ( f'Changing sellprice from {sellprice} to {Decimal( exitprice * sellratio ).quantize( tick )}. ')
+
+        # Calculate new sell/stop prices.
+        stopprice = Decimal( exitprice * stopratio ).quantize( tick )
+        sellprice = Decimal( exitprice * sellratio ).quantize( tick )
+        # Note: "costprice" is no longer the basis of the new exit price (and thus stop and sell prices).
+        # Note: The last transaction price exceeds the previous exit price and creates the new exit price.
+
+        # Loop.
+        while True : # Block until existing stop order is cancelled. 
+
+            # Attempt to cancel active and booked stop limit (ask) order.
+            # The shared rate limiter paces the request (there is no need to sleep first).
+            logger.debug ( f'Going to try to cancel stop limit order {jsonresponse["order_id"]}...' )
             try:
-                jsonresponse = askstoplimit( str(pair), str(size), str(stopprice), str(sellprice) ).json()
-                """
-                    Response format expected:
-                        {
-                            "order_id": "7419662",
-                            "id": "7419662",
-                            "symbol": "btcusd",
-                            "exchange": "gemini",
-                            "avg_execution_price": "0.00",
-                            "side": "buy",
-                            "type": "stop-limit",
-                            "timestamp": "1572378649",
-                            "timestampms": 1572378649018,
-                            "is_live": True,
-                            "is_cancelled": False,
-                            "is_hidden": False,
-                            "was_forced": False,
-                            "executed_amount": "0",
-                            "options": [],
-                            "stop_price": "10400.00",
-                            "price": "10500.00",
-                            "original_amount": "0.01"
-                        }
-                """
+                jsonresponse = await cancelorder( jsonresponse["order_id"] ) # Post REST API call to cancel previous order.
             except Exception as e:
-                logger.debug ( f'Unable to get information on the stop-limit order cancellation request. Error: {e}' )
-                time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
-                continue # Keep trying to post stop limit order infinitely.
+                logger.info ( f'Unable to cancel order. Error: {e}' )
+                continue # Keep trying to get information on the order's status infinitely.
             try:
-                
                 if jsonresponse['is_live'] : 
-                    order = jsonresponse['order_id']
-                    price = jsonresponse['price']
-                    infomessage = f'Updated {price} stop limit order {order} is live on the Gemini orderbook. '
-                    # logger.info ( infomessage )
-                    break # Break out of the while loop because the stop order was executed and we now want to block until prices rise.
+                    logger.info( f'Stop limit order {jsonresponse["order_id"]} is live on the Gemini orderbook. ' )
+                    continue # Keep tring to cancel the order infinitely.
                 else : 
-                    logger.info ( 'An error occurred. Unable to submit a stop limit order. ' )
-                    continue # Keep trying to post stop limit order infinitely.
+                    logger.info( f'Stop limit order {jsonresponse["order_id"]} is NOT live on the Gemini orderbook. ' )
+                    break # Break out of the while loop because the subroutine ran successfully.
             except KeyError as e:
                 warningmessage = f'KeyError: {e} was not present in the response from the REST API server. '
-                logger.warning ( f'{warningmessage} Something went wrong.. Checking for an error message... ' )
+                logger.warning ( f'{warningmessage} Something went wrong.. Checking for an error message...' )
                 try:    
                     if jsonresponse["result"] : 
-                        logger.warning ( f'\"{jsonresponse["reason"]}\" {jsonresponse["result"]}: {jsonresponse["message"]} ' )
-                        continue # Keep trying to post stop limit order infinitely.
+                        logger.warning ( f'\"{jsonresponse["reason"]}\" {jsonresponse["result"]}: {jsonresponse["message"]}' )
+                        continue
                 except Exception as e:
                     criticalmessage = f'Exception: {e} '
-                    logger.critical ( f'Unexpecter error. {criticalmessage} ' ) ; sendmessage ( f'Unexpecter error. {criticalmessage} ' )
-                    time.sleep(3) # Sleep for 3 seconds since we are interfacing with a rate limited Gemini REST API.
+                    logger.critical ( f'Unexpecter error. {criticalmessage}' ) ; sendmessage ( f'Unexpecter error. {criticalmessage}', category = 'error' )
+                    continue
+
+        logger.info ( f'Cancelled {jsonresponse["price"]} {pair[3:]} stop sell order {jsonresponse["order_id"]}. ' )
+
+        # Loop.
+        while True : # Block until a new stop limit order is submitted. 
+
+            while True: # Block until present highest bid price information is attained. 
+                try:
+                    # Await a highest bid price above the exit price on the shared marketdata connection (without blocking the event loop).
+                    # You can only sell for less.
+                    highestbid = await multiplexer.waituntil (
+                        pair,
+                        onbook = lambda orderbook, exitprice=exitprice: orderbook.bestbid() if orderbook.bestbid() is not None and orderbook.bestbid() > exitprice else None
+                    )
+                except Exception as e:
+                    logger.debug( f'An exception occured when trying to retrieve the highest bid. Error: {e}' )
+                    await asyncio.sleep(1) # Give the shared websocket connection a moment to reconnect.
+                    continue
+                break
+
+
+            # Validate "stop price".
+            # Make sure that the bids exceed it.
+            # Otherwise the order wont be accepted.
+            if highestbid.compare( exitprice ) == 1:
+
+                # Post updated stop-limit order.
+                logger.info ( f'Submitting stop-limit (ask) order with a {stopprice:,.2f} {pair[3:]} stop {sellprice:,.2f} {pair[3:]} sell. ' )
+                logger.info ( f'There will be an unrealized (i.e. "ratio gain") {ratiogain:,.2f}% profit/loss of {quotegain:,.2f} {pair[3:]} ' )
+                notification = f'Submitting {stopprice:,.2f} {pair[3:]} stop {sellprice:,.2f} {pair[3:]} sell limit order. '
+                notification = notification + f'That would realize {quotegain:,.2f} {pair[3:]} [i.e. return {ratiogain:,.2f}%]. '
+                sendmessage ( notification, category = 'stopreset' )
+                try:
+                    jsonresponse = await askstoplimit( str(pair), str(size), str(stopprice), str(sellprice) )
+                    """
+                        Response format expected:
+                            {
+                                "order_id": "7419662",
+                                "id": "7419662",
+                                "symbol": "btcusd",
+                                "exchange": "gemini",
+                                "avg_execution_price": "0.00",
+                                "side": "buy",
+                                "type": "stop-limit",
+                                "timestamp": "1572378649",
+                                "timestampms": 1572378649018,
+                                "is_live": True,
+                                "is_cancelled": False,
+                                "is_hidden": False,
+                                "was_forced": False,
+                                "executed_amount": "0",
+                                "options": [],
+                                "stop_price": "10400.00",
+                                "price": "10500.00",
+                                "original_amount": "0.01"
+                            }
+                    """
+                except Exception as e:
+                    logger.debug ( f'Unable to get information on the stop-limit order cancellation request. Error: {e}' )
                     continue # Keep trying to post stop limit order infinitely.
+                try:
+
+                    if jsonresponse['is_live'] : 
+                        order = jsonresponse['order_id']
+                        price = jsonresponse['price']
+                        infomessage = f'Updated {price} stop limit order {order} is live on the Gemini orderbook. '
+                        # logger.info ( infomessage )
+                        break # Break out of the while loop because the stop order was executed and we now want to block until prices rise.
+                    else : 
+                        logger.info ( 'An error occurred. Unable to submit a stop limit order. ' )
+                        continue # Keep trying to post stop limit order infinitely.
+                except KeyError as e:
+                    warningmessage = f'KeyError: {e} was not present in the response from the REST API server. '
+                    logger.warning ( f'{warningmessage} Something went wrong.. Checking for an error message... ' )
+                    try:    
+                        if jsonresponse["result"] : 
+                            logger.warning ( f'\"{jsonresponse["reason"]}\" {jsonresponse["result"]}: {jsonresponse["message"]} ' )
+                            continue # Keep trying to post stop limit order infinitely.
+                    except Exception as e:
+                        criticalmessage = f'Exception: {e} '
+                        logger.critical ( f'Unexpecter error. {criticalmessage} ' ) ; sendmessage ( f'Unexpecter error. {criticalmessage} ', category = 'error' )
+                        continue # Keep trying to post stop limit order infinitely.
+
+    # Recalculate quote gain.
+    quotegain = Decimal( sellprice * size - costprice * size ).quantize( tick )
+    ratiogain = Decimal( 100 * sellprice * size / costprice / size - 100 )
+
+    # Report profit/loss.
+    clause0 = f'There was a {ratiogain:,.2f}% profit/loss of {quotegain:,.2f} {pair[3:]} '
+    clause1 = f'from the sale of {size} {pair[:3]} at {Decimal(sellprice * size):,.2f} {pair[3:]} '
+    clause2 = f'which cost {Decimal(costprice * size):,.2f} {pair[3:]} to acquire.'
+    message = f'{clause0}{clause1}{clause2}'
+    logger.info ( message ) ; sendmessage ( message )
 
-# Recalculate quote gain.
-quotegain = Decimal( sellprice * size - costprice * size ).quantize( tick )
-ratiogain = Decimal( 100 * sellprice * size / costprice / size - 100 )
+async def main() -> None:
+    try: await trail()
+    finally: await closesession()
 
-# Report profit/loss.
-clause0 = f'There was a {ratiogain:,.2f}% profit/loss of {quotegain:,.2f} {pair[3:]} '
-clause1 = f'from the sale of {size} {pair[:3]} at {Decimal(sellprice * size):,.2f} {pair[3:]} '
-clause2 = f'which cost {Decimal(costprice * size):,.2f} {pair[3:]} to acquire.'
-message = f'{clause0}{clause1}{clause2}'
-logger.info ( message ) ; sendmessage ( message )
+asyncio.run( main() )
 
 # Let the shell know we successfully made it this far!
-sys.exit(0)
\ No newline at end of file
+sys.exit(0)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+#
+# script name: handlerbenchmark.py
+# script author: munair simpson
+# script created: 20221018
+# script purpose: measure the throughput and allocations of every marketdata handler and fail on regressions.
+
+
+# Detailed Description:
+#  1. Read a recording made by marketdatarecorder.py (or a capture of raw v2 marketdata messages, one per line).
+#     Without a capture file, generate a random walk of l2_updates and trade messages instead.
+#  2. Decode the messages once, up front, into the inputs every handler receives:
+#     - askfall and bidrise:  the Askfallprocessor and Bidriseprocessor (askmonitor and bidmonitor) get parsed dictionaries,
+#     - orderbook:            the multiplexer's local orderbook gets L2update structs,
+#     - tradeevent:           the multiplexer turns Trade structs into trade events,
+#     - the trade watchers:   marketmonitor's and trademonitor's watchers get trade events.
+#  3. Run every handler over its inputs (quiet mode, thresholds that are never breached, a fresh handler every pass).
+#     The handlers take turns (one pass each, round robin). A first (warm-up) round is not recorded.
+#     Records below ERROR are not logged while handlers run (a random walk makes the aberration filters warn on most messages).
+#     Record the time per message of every pass (benchmarker library) and report the messages per second of the median pass.
+#  4. Measure the allocations per message with tracemalloc: the peak memory allocated while handling a message and the
+#     memory still held after the pass.
+#  5. Store the results by git commit, capture file and passes and compare them with the previous commit's results for the
+#     same capture file and passes.
+#     Exit with status 1 when the time per message of the best pass (min) or the peak allocation per message of any handler
+#     regressed by more than the tolerance, so the benchmark can gate changes. The best pass is the one least disturbed by
+#     whatever else the machine was doing (a median pass moves with the load of the machine).
+#
+# Execution:
+#   - Use the wrapper BASH script in the "tests" directory.
+
+import sys
+import gzip
+import json
+import time
+import random
+import logging
+import tracemalloc
+
+from collections import Counter
+
+import libraries.definer as definer
+
+# Set default capture file, number of passes and tolerance in case a BASH wrapper has not been used.
+capture = ''
+passes = 10
+tolerance = definer.benchmarktolerance
+
+# Override defaults with command line parameters from BASH wrapper.
+if len(sys.argv) == 4 :
+    capture = sys.argv[1]
+    passes = int( sys.argv[2] )
+    tolerance = float( sys.argv[3] )
+
+# Handlers run the way they do in production: quiet, with their periodic summaries never due during a pass.
+definer.quietmode = True
+definer.summaryinterval = 86400
+
+from libraries.logger import logger
+from libraries.profiler import profileonsignal
+from libraries.decoder import loads, decode, Trade, L2update
+from libraries.recorder import readrecording
+from libraries.bookkeeper import Orderbook
+from libraries.multiplexer import tradeevent
+from libraries.askmonitor import Askfallprocessor
+from libraries.bidmonitor import Bidriseprocessor
+from libraries.benchmarker import Latencyhistogram, saveresults, compare
+
+import libraries.marketmonitor as marketmonitor
+import libraries.trademonitor as trademonitor
+
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
+def generate( count = 20000 ):
+    # Random walk of BTCUSD messages: an initial book, then mostly small L2 updates around the best prices and some trades.
+    random.seed( 0 )
+    middle = 20000.0
+    messages = [ json.dumps( { 'type': 'l2_updates', 'symbol': 'BTCUSD', 'changes':
+        [ [ 'buy', f'{middle - level:.2f}', f'{random.random():.8f}' ] for level in range( 1, 51 ) ] +
+        [ [ 'sell', f'{middle + level:.2f}', f'{random.random():.8f}' ] for level in range( 1, 51 ) ] } ) ]
+    for index in range( count ):
+        middle += random.gauss( 0, 0.5 )
+        if index % 5 == 0:
+            side = random.choice( [ 'buy', 'sell' ] )
+            price = middle + ( 0.5 if side == 'buy' else -0.5 )
+            messages.append( json.dumps( { 'type': 'trade', 'symbol': 'BTCUSD', 'event_id': index, 'timestamp': 1666051200000 + index, 'price': f'{price:.2f}', 'quantity': f'{random.random():.8f}', 'side': side } ) )
+        else:
+            changes = []
+            for _ in range( random.randint( 1, 3 ) ):
+                side = random.choice( [ 'buy', 'sell' ] )
+                offset = random.randint( 1, 50 ) / 2
+                price = middle - offset if side == 'buy' else middle + offset
+                changes.append( [ side, f'{price:.2f}', '0' if random.random() < 0.3 else f'{random.random():.8f}' ] )
+            messages.append( json.dumps( { 'type': 'l2_updates', 'symbol': 'BTCUSD', 'changes': changes } ) )
+    return messages
+
+def read( path ):
+    # Raw messages, one per line (gzip compressed when the file name ends in ".gz").
+    # Recordings (marketdatarecorder.py) are recognized by their first line. Their v2 marketdata frames are used.
+    opener = gzip.open if path.endswith( '.gz' ) else open
+    with opener( path, 'rt' ) as capturefile: lines = [ line.rstrip( '\n' ) for line in capturefile if line.strip() ]
+    if lines and lines[0].startswith( '{"time":' ): return [ frame for _, _, frame in readrecording( path, '/v2/marketdata' ) ]
+    return lines
+
+def timepass( histogram, build, function, inputs ):
+    # Time one pass of a fresh handler over its inputs (per message).
+    handler = build()
+    started = time.perf_counter()
+    for message in inputs: function( handler, message )
+    histogram.record( ( time.perf_counter() - started ) / len( inputs ) )
+
+def measure( name, histogram, build, function, inputs ):
+    # Trace the allocations of one more pass and summarize the passes timed.
+    level = logger.level
+    logger.setLevel( logging.ERROR )
+    handler = build()
+    tracemalloc.start()
+    retainedbefore = tracemalloc.get_traced_memory()[0]
+    peaks = 0
+    for message in inputs:
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        function( handler, message )
+        peaks += tracemalloc.get_traced_memory()[1] - current
+    retained = tracemalloc.get_traced_memory()[0] - retainedbefore
+    tracemalloc.stop()
+    logger.setLevel( level )
+
+    summary = histogram.summary()
+    median = histogram.percentile( 0.50 )
+    summary['rate'] = round( 1 / median ) if median else 0
+    summary['peakbytes'] = round( peaks / len( inputs ), 1 )
+    summary['retainedbytes'] = round( retained / len( inputs ), 1 )
+    logger.info( f'  {name:<16} {summary["rate"]:>12,} msgs/sec  p50 {summary["p50"]:>8,.3f} us/msg  best {summary["min"]:>8,.3f} us/msg  peak {summary["peakbytes"]:>8,.1f} bytes/msg  retained {summary["retainedbytes"]:>8,.1f} bytes/msg' )
+    return summary
+
+messages = read( capture ) if capture else generate()
+
+# Benchmark the busiest symbol of the capture.
+dictionaries = [ dictionary for dictionary in map( loads, messages ) if isinstance( dictionary, dict ) and 'symbol' in dictionary ]
+pair = Counter( dictionary['symbol'] for dictionary in dictionaries ).most_common( 1 )[0][0] if dictionaries else 'BTCUSD'
+dictionaries = [ dictionary for dictionary in dictionaries if dictionary['symbol'] == pair ]
+structs = [ message for message in map( decode, messages ) if isinstance( message, ( Trade, L2update ) ) and message.symbol == pair ]
+updates = [ message for message in structs if isinstance( message, L2update ) ]
+trades = [ message for message in structs if isinstance( message, Trade ) ] + [ trade for message in updates for trade in message.trades ]
+events = [ tradeevent( trade ) for trade in trades ]
+logger.info ( f'handling {len(dictionaries):,} {pair} messages ({len(updates):,} L2 updates and {len(trades):,} trades) {passes} times per handler ({capture or "generated messages"}).' )
+
+# Thresholds that are never breached (so every message goes through the whole handler).
+floor, ceiling = '0.00000001', '1000000000000'
+handlers = {
+    'askfall': ( lambda: Askfallprocessor( pair, '1' ), lambda handler, message: handler.process( message ), dictionaries ),
+    'bidrise': ( lambda: Bidriseprocessor( pair, ceiling ), lambda handler, message: handler.process( message ), dictionaries ),
+    'orderbook': ( lambda: Orderbook( pair ), lambda handler, message: handler.update( message ), updates ),
+    'tradeevent': ( lambda: None, lambda handler, message: tradeevent( message ), trades ),
+    'pricedecrease': ( lambda: marketmonitor.pricedecreasewatcher( pair, floor ), lambda handler, message: handler( message ), events ),
+    'askfallwatcher': ( lambda: marketmonitor.askfallwatcher( pair, floor ), lambda handler, message: handler( message ), events ),
+    'priceincrease': ( lambda: marketmonitor.priceincreasewatcher( pair, ceiling ), lambda handler, message: handler( message ), events ),
+    'bidrisewatcher': ( lambda: marketmonitor.bidrisewatcher( pair, ceiling ), lambda handler, message: handler( message ), events ),
+    'blockpricerange': ( lambda: marketmonitor.blockpricerangewatcher( pair, ceiling, floor ), lambda handler, message: handler( message ), events ),
+    'pricerange': ( lambda: trademonitor.pricerangewatcher( pair, ceiling, floor ), lambda handler, message: handler( message ), events )
+}
+
+for name, ( build, function, inputs ) in handlers.items():
+    if not inputs: logger.warning( f'  {name:<16} skipped: no {pair} messages for this handler in the capture.' )
+handlers = { name: handler for name, handler in handlers.items() if handler[2] }
+
+# Warm up, then time the passes round robin (a burst of load on the machine slows one pass of every handler, not every pass of one).
+histograms = { name: Latencyhistogram( name ) for name in handlers }
+level = logger.level
+logger.setLevel( logging.ERROR )
+for _ in range( passes + 1 ):
+    for name, ( build, function, inputs ) in handlers.items(): timepass( histograms[ name ], build, function, inputs )
+logger.setLevel( level )
+for histogram in histograms.values(): del histogram.samples[0]
+
+results = { name: measure( name, histograms[ name ], build, function, inputs ) for name, ( build, function, inputs ) in handlers.items() }
+
+parameters = { 'capture': capture or 'generated', 'passes': passes }
+regressions = compare( 'handlerbenchmark', results, parameters, tolerance = tolerance, statistics = ( 'min', 'peakbytes' ) )
+saveresults( 'handlerbenchmark', results, parameters )
+
+# Let the shell know whether the handlers regressed.
+sys.exit( 1 if regressions else 0 )
\ No newline at end of file
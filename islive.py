@@ -17,8 +17,12 @@
 import sys
 
 from libraries.logger import logger
+from libraries.profiler import profileonsignal
 from libraries.ordermanager import islive
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 # Set trading default trading pair in cause a BASH wrapper has not been used.
 order = 136457975606
 
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+#
+# script name: latencybenchmark.py
+# script author: munair simpson
+# script created: 20221018
+# script purpose: measure order round trip latencies end to end against a local exchange simulator.
+
+
+# Detailed Description:
+#  1. Start the exchange simulator (simulator library) in the background and point the REST and websocket servers at it.
+#  2. Measure (the number of iterations specified):
+#     - ticker:  a /v1/pubticker request (pricegetter.ticker),
+#     - signing: building the authenticated headers of an order (authenticator.authenticate),
+#     - submit:  the HTTP round trip of a /v1/order/new request, signed once its rate limiter token is held (requester.post),
+#     - booked:  frontrunner.bidorder from the call to the order's "booked" event on the order events websocket,
+#     - confirm: closevalidator.confirmexecution from the response to an order that filled to its return.
+#     Warm-up round trips (definer.benchmarkwarmup) run first and are not recorded. The iterations are repeated for several runs
+#     (definer.benchmarkruns) and every statistic is the median of the runs.
+#  3. Report the p50, p99 and p999 latencies with the logger library.
+#  4. Store the results by git commit and run parameters (benchmarker library) and compare them with the previous commit's
+#     results for the same iterations, injected latency and runs.
+#     Exit with status 1 when any p50 latency regressed by more than the tolerance (definer.benchmarktolerance).
+#
+# Execution:
+#   - Use the wrapper BASH script in the "tests" directory.
+
+import sys
+import time
+import asyncio
+import threading
+
+from decimal import Decimal
+
+import libraries.definer as definer
+
+# Set default number of iterations, injected latency (milliseconds), runs and port in case a BASH wrapper has not been used.
+iterations = 200
+latency = "0"
+runs = definer.benchmarkruns
+port = 8790
+
+# Override defaults with command line parameters from BASH wrapper.
+if len(sys.argv) in ( 3, 4 ) :
+    iterations = int( sys.argv[1] )
+    latency = sys.argv[2]
+if len(sys.argv) == 4 : runs = int( sys.argv[3] )
+
+# Trade against the local simulator (never Gemini). Every order event type is needed to time "booked" events.
+definer.restserver = f'http://127.0.0.1:{port}'
+definer.sockserver = f'ws://127.0.0.1:{port}'
+definer.symbolserver = definer.restserver
+definer.ordereventtypes = None
+
+from libraries.logger import logger
+from libraries.profiler import profileonsignal
+from libraries.simulator import Exchangesimulator
+from libraries.benchmarker import Latencyhistogram, combine, report, saveresults, compare
+from libraries.noncegenerator import nonce
+from libraries.ordertracker import tracker
+from libraries.pricegetter import ticker
+from libraries.frontrunner import bidorder
+from libraries.closevalidator import confirmexecution
+
+import libraries.messenger as messenger
+import libraries.requester as requester
+import libraries.bookkeeper as bookkeeper
+import libraries.ratelimiter as ratelimiter
+import libraries.authenticator as authenticator
+
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
+if len(sys.argv) not in ( 3, 4 ) :
+    logger.debug ( f'incorrect number of command line arguments. using {iterations} iterations, {latency} ms of latency and {runs} runs...' )
+
+# The simulator does not rate limit. Keep alerts local too.
+for name in ratelimiter.buckets: ratelimiter.buckets[ name ] = ratelimiter.Tokenbucket( 1e9, 1e9, name )
+messenger.dispatcher.webhook = f'{definer.restserver}/webhook'
+
+pair = 'BTCUSD'
+simulator = Exchangesimulator( { pair: '20000' }, latency = float( latency ) / 1000, seed = 0 )
+threading.Thread( target = lambda: asyncio.run( simulator.serve( '127.0.0.1', port ) ), name = 'exchange-simulator', daemon = True ).start()
+time.sleep( 1 )
+
+# Maintain the orderbook in memory (as the strategies do) and connect the order events websocket ahead of time.
+bookkeeper.maintainbook( pair ).ready.wait( timeout = 10 )
+tracker.start()
+
+def order( price, options ):
+    # Payload of a 0.001 BTC buy limit order (requester.post adds the nonce and signs it).
+    endpoint = '/v1/order/new'
+    payload = {
+        'request': endpoint,
+        'symbol': pair,
+        'amount': '0.001',
+        'price': str( price ),
+        'side': 'buy',
+        'type': 'exchange limit',
+        'options': options
+    }
+    return payload
+
+def cancel( orderid ):
+    endpoint = '/v1/order/cancel'
+    requester.post( endpoint, { 'request': endpoint, 'order_id': orderid } )
+
+def iterate( histograms ):
+    # One round trip of every measurement.
+    with histograms['ticker'].time(): bestbid = Decimal( ticker( pair )['bid'] )
+
+    # Sign a post only order well below the market. Submit it (it books) then cancel it.
+    payload = order( ( bestbid * Decimal( '0.9' ) ).quantize( Decimal( '0.01' ) ), [ 'maker-or-cancel' ] )
+    with histograms['signing'].time(): authenticator.authenticate( dict( payload, nonce = nonce() ), 'restheader' )
+    with histograms['submit'].time(): response = requester.post( '/v1/order/new', payload ).json()
+    cancel( response['order_id'] )
+
+    # Front run the best bid and wait for the order to be acknowledged on the order events websocket.
+    started = time.perf_counter()
+    response = bidorder( pair, '0.001' ).json()
+    tracker.blockuntil( response['order_id'], onevent = lambda event: event if event['type'] in ( 'booked', 'cancelled', 'closed' ) else None )
+    histograms['booked'].record( time.perf_counter() - started )
+    cancel( response['order_id'] )
+
+    # Buy through the offer (the order fills on submission) and confirm its execution.
+    response = requester.post( '/v1/order/new', order( ( bestbid * Decimal( '1.01' ) ).quantize( Decimal( '0.01' ) ), [] ) ).json()
+    with histograms['confirm'].time(): confirmexecution( response['order_id'] )
+
+def measure():
+    # Latency summaries of one run of the iterations specified.
+    histograms = { name: Latencyhistogram( name ) for name in ( 'ticker', 'signing', 'submit', 'booked', 'confirm' ) }
+    for _ in range( iterations ): iterate( histograms )
+    return { name: histogram.summary() for name, histogram in histograms.items() }
+
+logger.info ( f'measuring {runs} runs of {iterations} order round trips with {latency} ms of injected latency (after {definer.benchmarkwarmup} warm-up round trips).' )
+
+# Warm up (connections, caches and the simulator) without recording anything.
+warmup = { name: Latencyhistogram( name ) for name in ( 'ticker', 'signing', 'submit', 'booked', 'confirm' ) }
+for _ in range( definer.benchmarkwarmup ): iterate( warmup )
+
+# Compare the median of the runs with the previous commit's runs of the same parameters.
+results = combine( [ measure() for _ in range( runs ) ] )
+parameters = { 'iterations': iterations, 'latency': float( latency ), 'runs': runs }
+report( 'latencybenchmark', results )
+regressions = compare( 'latencybenchmark', results, parameters )
+saveresults( 'latencybenchmark', results, parameters )
+
+# Let the shell know whether the latencies regressed.
+sys.exit( 1 if regressions else 0 )
@@ -7,31 +7,125 @@
 # library legacy: originally "dealseeker.py" because it waited on a fall from websocket session highs.
 
 
-# Warning:
+# Note:
 #
-# This version of askmonitor is using synchronous communications. This may not be ideal.
-# If the messages are processed faster than they are received, this code is good. If not,
-# you are going to lose money.
+# The monitors no longer open a websocket connection of their own. They watch the orderbook the shared marketdata
+# multiplexer (multiplexer.py) maintains over the process's single /v2/marketdata connection.
 #
-# According to https://pypi.org/project/websocket_client/ [Short-lived one-off send-receive]:
-# This is if you want to communicate a short message and disconnect immediately when done.
+# The processing lives in Askfallprocessor (no socket involved), so the hot path can be driven directly by benchmarks
+# (see handlerbenchmark.py) and the functions below only pass it the lowest ask of the shared orderbook whenever it changes.
 
 
-import statistics
-import requests
-import ssl
-import json
-import datetime
-import time
-
 from decimal import Decimal
-from websocket import create_connection
 
 from libraries.logger import logger as logger
 from libraries.messenger import sendmessage as sendmessage
+from libraries.statistician import Rollingstatistics
+from libraries.bookkeeper import Orderbook
+from libraries.summarizer import Periodicsummary
+from libraries.multiplexer import multiplexer as multiplexer
+
+class Askfallprocessor:
+
+    # Class Description:
+    #  1. Apply decoded v2 marketdata messages (dictionaries) to a local orderbook (or observe the lowest asks of another book).
+    #  2. Track the lowest ask in session statistics (discarding aberrations).
+    #  3. Report a deal when the lowest ask falls the fraction specified below the session high.
+    #
+    # Execution:
+    #   - from libraries.askmonitor import Askfallprocessor
+    #   - processor = Askfallprocessor( "BTCUSD", "0.004" )
+    #   - text = processor.process( decoder.loads( message ) ) # None until there is a deal.
+    #   - text = processor.observe( orderbook.bestask() ) # The same for the lowest ask of a maintained orderbook.
+
+    def __init__( self, pair, fall ):
+        self.pair = pair
+        self.percentoff = Decimal( fall )
+
+        # Define session statistics.
+        # Purpose: Tracks the offers received during the websocket connection session in constant time.
+        self.sessionstats = Rollingstatistics()
+
+        # Define periodic summary.
+        # Purpose: Replaces the message logged for every lowest ask change with a periodic summary in quiet mode.
+        self.summary = Periodicsummary( pair, 'lowest asks' )
+
+        # Define local orderbook.
+        # Purpose: Keeps every price level so that the lowest ask is the actual best ask (not just the lowest ask changed).
+        self.orderbook = Orderbook( pair )
+
+        # Set default value for the minimum ask price to zero.
+        self.minimumask = Decimal(0)
+
+    def process( self, dictionary ):
+
+        # Process "type": "update" messages with events only.
+        if 'l2_updates' not in dictionary['type'] or dictionary['changes'] == []: return None
+        pair = self.pair
+        changes = dictionary['changes']
+        self.orderbook.update( dictionary )
+
+        # Determine the lowest ask in the local orderbook whenever the Gemini L2 update response changes asks.
+        if not any( change[0] == 'sell' for change in changes ) or self.orderbook.bestask() is None: return None
+        return self.observe( self.orderbook.bestask() )
+
+    def observe( self, minimumask ):
+
+        # Add the lowest ask to the session statistics and report a deal (if there is one).
+        pair = self.pair
+        self.minimumask = minimumask
+        sessionstats = self.sessionstats
+        sessionstats.push(minimumask)
+
+        # Define session maximum and average values.
+        sessionmax = sessionstats.maximum
+        sessionavg = sessionstats.mean
+
+        # Determine how much the minimum deviates away from the session average.
+        # If it deviated by more than four standard deviations, then do nothing further.
+        deviatedby = minimumask - sessionavg
+        if sessionstats.count != 1:
+            if deviatedby.compare( 4 * sessionstats.stdev ) == 1:
+                logger.info( f'{100 * ( sessionmax - minimumask ) / sessionmax:.2f}% off highs [{sessionmax}] : {pair} is {minimumask} presently. Aberration... The mean is: {sessionavg:.2f}. Dumping!' )
+                sessionstats.pop()
+                return None
+
+        # Display impact of event information received (the movement away from highs is only calculated when displayed).
+        if self.summary.verbose : logger.info( f'{100 * ( sessionmax - minimumask ) / sessionmax:.2f}% below highs [{sessionmax}] : {pair} is {minimumask} presently.' )
+        else : self.summary.record( minimumask )
+
+        # Define bargain (sale) price.
+        percentoff = self.percentoff
+        sale = Decimal( sessionmax * ( 1 - percentoff ) )
+
+        # Report the deal only if there's a sale (bargain) offer.
+        if sale.compare( minimumask ) == 1 :
+            text = f'{pair[:3]} fell {percentoff*100}% in price. '
+            text = text + f'It is now {minimumask:.2f} {pair[3:]} on Gemini. '
+            text = text + f'{pair[:3]} at {sale:.2f} {pair[3:]} or lower is defined as a deal.'
+            return text
+        return None
+
+def monitor (
+        pair: str,
+        processor: Askfallprocessor
+        ) -> None:
+
+    # Pass every change of the lowest ask in the shared orderbook of the pair to the processor until it reports a deal (then alert).
+
+    # Define orderbook watcher (called by the shared marketdata multiplexer for every L2 update of the pair).
+    def on_book( orderbook ) :
+        minimumask = orderbook.bestask()
+        if minimumask is None or minimumask == processor.minimumask : return None
+        return processor.observe( minimumask )
 
-import libraries.definer as definer
-import libraries.authenticator as authenticator
+    text = multiplexer.blockuntil( pair, onbook = on_book )
+    logger.info( text )
+    sendmessage( text )
+
+    # Return value on discount only.
+    if processor.minimumask.compare(0) == 1 : return processor.minimumask
+    else: return False
 
 def floatingfall (
         pair: str,
@@ -39,101 +133,22 @@ def floatingfall (
         ) -> None:
 
     # Function Description:
-    #  1. Open a websocket connection.
-    #  2. Request L2 orderbook data.
-    #  3. Monitor the orderbook for a fall in asks (i.e. the "selling prices offered") for pair parameter specified.
-    #  4. Send an alert to a Discord channel using the messenger library's webhook when asks fall from session highs.
+    #  1. Watch the orderbook of the pair maintained by the shared marketdata multiplexer.
+    #  2. Monitor the orderbook for a fall in asks (i.e. the "selling prices offered") for pair parameter specified.
+    #  3. Send an alert to a Discord channel using the messenger library's webhook when asks fall from session highs.
     #
     # Function Purpose: 
     #     Waiting for an relative fall in ask prices.
     # 
     # Arguments:
     #  1. pair is the trading pair monitored.
-    #  2. fall is the fall in ask prices (specified in decimal terms) required to exit the loop and close the websocket.
+    #  2. fall is the fall in ask prices (specified in decimal terms) required to stop monitoring.
     # 
     # Execution:
     #   - from libraries.askmonitor import floatingfall
     #   - lowestask = floatingfall( "BTCUSD", "0.004" )
 
-    # Define dataset class.
-    # Purpose: Stores the offers received during the websocket connection session.
-    dataset = []
-
-    # Construct subscription request.
-    subscriptionrequest = f'{{"type": "subscribe","subscriptions":[{{"name":"l2","symbols":["{pair}"]}}]}}'
-
-    # Construct payload.
-    t = datetime.datetime.now()
-    request = definer.sockserver + '/v2/marketdata'
-    nonce = str(int(time.mktime(t.timetuple())*1000))
-    payload = {
-        'request': request,
-        'nonce': nonce
-    }
-    authenticator.authenticate(payload)
-
-    # Establish websocket connection.
-    ws = create_connection( request )
-    ws.send( subscriptionrequest )
-
-    # Set default value for the minimum ask price to zero.
-    minimumask = Decimal(0)
-
-    while True:
-        newmessage = ws.recv()
-        dictionary = json.loads( newmessage )
-        percentoff = Decimal( fall )
-
-        # Uncomment this statement to debug messages: logger.debug(dictionary)
-
-        # Process "type": "update" messages with events only.
-        if 'l2_updates' in dictionary['type']:
-            if dictionary['changes'] != []:
-                changes = dictionary['changes']
-
-                # Rank asks and determine the lowest ask among the changes in the Gemini L2 update response.
-                askranking = [ Decimal(change[1]) for change in changes if change[0] == 'sell' ]
-                if askranking != []:
-                    minimumask = min(askranking)
-                    dataset.append(minimumask)
-
-                    # Define session maximum and average values.
-                    sessionmax = Decimal( max(dataset) )
-                    sessionavg = Decimal( statistics.mean(dataset) )
-
-                    # Calculate movement away from high [if any].
-                    move = 100 * ( sessionmax - minimumask ) / sessionmax
-
-                    # Determine how much the minimum deviates away from the session average.
-                    # If it deviated by more than four standard deviations, then do nothing further.
-                    # Continue at the start of the loop.
-                    deviatedby = minimumask - sessionavg
-                    if len(dataset) != 1:
-                        if deviatedby.compare( 4 * statistics.stdev(dataset) ) == 1:
-                            logger.info( f'{move:.2f}% off highs [{sessionmax}] : {pair} is {minimumask} presently. Aberration... The mean is: {sessionavg:.2f}. Dumping!' )
-                            dataset.pop()
-                            continue
-
-                    # Display impact of event information received.
-                    logger.info( f'{move:.2f}% below highs [{sessionmax}] : {pair} is {minimumask} presently.' )
-
-                    # Define bargain (sale) price.
-                    sale = Decimal( sessionmax * ( 1 - percentoff ) )
-
-                    # Exit loop and set "deal"...
-                    # Only if there's a sale (bargain) offer.
-                    if sale.compare( minimumask ) == 1 :
-                        text = f'{pair[:3]} fell {percentoff*100}% in price. '
-                        text = text + f'It is now {minimumask:.2f} {pair[3:]} on Gemini. '
-                        text = text + f'{pair[:3]} at {sale:.2f} {pair[3:]} or lower is defined as a deal.'
-                        logger.info( text )
-                        sendmessage( text )
-                        ws.close()
-                        break
-
-        # Return value on discount only.
-        if minimumask.compare(0) == 1 : return minimumask
-        else: return False
+    return monitor( pair, Askfallprocessor( pair, fall ) )
 
 def anchoredfall (
         pair: str,
@@ -141,98 +156,19 @@ def anchoredfall (
         ) -> None:
 
     # Function Description:
-    #  1. Open a websocket connection.
-    #  2. Request L2 orderbook data.
-    #  3. Monitor the orderbook for a fall in asks (i.e. the "selling prices offered") for pair parameter specified.
-    #  4. Send an alert to a Discord channel using the messenger library's webhook when asks fall.
+    #  1. Watch the orderbook of the pair maintained by the shared marketdata multiplexer.
+    #  2. Monitor the orderbook for a fall in asks (i.e. the "selling prices offered") for pair parameter specified.
+    #  3. Send an alert to a Discord channel using the messenger library's webhook when asks fall.
     #
     # Function Purpose: 
     #     Waiting for an absolute fall in ask prices.
     #
     # Arguments:
     #  1. pair is the trading pair monitored.
-    #  2. fall is the fall in ask prices (specified in decimal terms) required to exit the loop and close the websocket.
+    #  2. fall is the fall in ask prices (specified in decimal terms) required to stop monitoring.
     # 
     # Execution:
     #   - from libraries.askmonitor import anchoredfall
     #   - lowestask = anchoredfall( "BTCUSD", "0.004" )
 
-    # Define dataset class.
-    # Purpose: Stores the offers received during the websocket connection session.
-    dataset = []
-
-    # Construct subscription request.
-    subscriptionrequest = f'{{"type": "subscribe","subscriptions":[{{"name":"l2","symbols":["{pair}"]}}]}}'
-
-    # Construct payload.
-    t = datetime.datetime.now()
-    request = definer.sockserver + '/v2/marketdata'
-    nonce = str(int(time.mktime(t.timetuple())*1000))
-    payload = {
-        'request': request,
-        'nonce': nonce
-    }
-    authenticator.authenticate(payload)
-
-    # Establish websocket connection.
-    ws = create_connection( request )
-    ws.send( subscriptionrequest )
-
-    # Set default value for the minimum ask price to zero.
-    minimumask = Decimal(0)
-
-    while True:
-        newmessage = ws.recv()
-        dictionary = json.loads( newmessage )
-        percentoff = Decimal( fall )
-
-        # Uncomment this statement to debug messages: logger.debug(dictionary)
-
-        # Process "type": "update" messages with events only.
-        if 'l2_updates' in dictionary['type']:
-            if dictionary['changes'] != []:
-                changes = dictionary['changes']
-
-                # Rank asks and determine the lowest ask among the changes in the Gemini L2 update response.
-                askranking = [ Decimal(change[1]) for change in changes if change[0] == 'sell' ]
-                if askranking != []:
-                    minimumask = min(askranking)
-                    dataset.append(minimumask)
-
-                    # Define session maximum and average values.
-                    sessionmax = Decimal( max(dataset) )
-                    sessionavg = Decimal( statistics.mean(dataset) )
-
-                    # Calculate movement away from high [if any].
-                    move = 100 * ( sessionmax - minimumask ) / sessionmax
-
-                    # Determine how much the minimum deviates away from the session average.
-                    # If it deviated by more than four standard deviations, then do nothing further.
-                    # Continue at the start of the loop.
-                    deviatedby = minimumask - sessionavg
-                    if len(dataset) != 1:
-                        if deviatedby.compare( 4 * statistics.stdev(dataset) ) == 1:
-                            logger.info( f'{move:.2f}% off highs [{sessionmax}] : {pair} is {minimumask} presently. Aberration... The mean is: {sessionavg:.2f}. Dumping!' )
-                            dataset.pop()
-                            continue
-
-                    # Display impact of event information received.
-                    logger.info( f'{move:.2f}% below highs [{sessionmax}] : {pair} is {minimumask} presently.' )
-
-                    # Define bargain (sale) price.
-                    sale = Decimal( sessionmax * ( 1 - percentoff ) )
-
-                    # Exit loop and set "deal"...
-                    # Only if there's a sale (bargain) offer.
-                    if sale.compare( minimumask ) == 1 :
-                        text = f'{pair[:3]} fell {percentoff*100}% in price. '
-                        text = text + f'It is now {minimumask:.2f} {pair[3:]} on Gemini. '
-                        text = text + f'{pair[:3]} at {sale:.2f} {pair[3:]} or lower is defined as a deal.'
-                        logger.info( text )
-                        sendmessage( text )
-                        ws.close()
-                        break
-
-        # Return value on discount only.
-        if minimumask.compare(0) == 1 : return minimumask
-        else: return False
\ No newline at end of file
+    return monitor( pair, Askfallprocessor( pair, fall ) )
\ No newline at end of file
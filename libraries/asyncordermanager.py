@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+#
+# library name: asyncordermanager.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: submit, cancel and check orders with the Gemini REST API without blocking the asyncio event loop.
+
+
+# Note:
+#
+# These coroutines mirror the synchronous order functions (ordermanager, stopper and frontrunner) but share one
+# pooled, keep-alive aiohttp session per event loop (pip3 install aiohttp). A strategy can keep consuming the
+# trade stream (see trademonitor.py) while its orders are in flight. The coroutines return the decoded JSON
+# response (a dictionary) rather than a response object.
+
+
+import time
+import asyncio
+import aiohttp
+
+from decimal import Decimal
+
+from libraries.logger import logger as logger
+from libraries.noncegenerator import nonce as nonce
+from libraries.journaler import journal as journal
+
+import libraries.definer as definer
+import libraries.cataloguer as cataloguer
+import libraries.bookkeeper as bookkeeper
+import libraries.requester as requester
+import libraries.exporter as exporter
+import libraries.ratelimiter as ratelimiter
+import libraries.authenticator as authenticator
+
+# Shared sessions by event loop (created on first use inside the running event loop).
+sessions = {}
+
+async def getsession() -> aiohttp.ClientSession:
+
+    # Create the running event loop's session lazily. An aiohttp session is bound to the event loop that created it.
+    loop = asyncio.get_running_loop()
+    session = sessions.get( loop )
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector( limit = definer.restpoolsize, keepalive_timeout = 60 )
+        timeout = aiohttp.ClientTimeout( sock_connect = definer.resttimeout[0], sock_read = definer.resttimeout[1] )
+        session = sessions[ loop ] = aiohttp.ClientSession( connector = connector, timeout = timeout )
+    return session
+
+async def closesession() -> None:
+
+    # Close the running event loop's session (call before the event loop is closed).
+    session = sessions.pop( asyncio.get_running_loop(), None )
+    if session is not None and not session.closed: await session.close()
+
+async def post(
+        endpoint: str,
+        payload: dict
+    ) -> dict:
+
+    # Private (authenticated) request. The payload travels in the headers (aiohttp requires string header values).
+    # The nonce is added and the payload signed only once a rate limiter token is held. Coroutines waiting on the bucket
+    # can be released in any order, so a nonce taken before waiting could reach Gemini after a larger one (InvalidNonce).
+    # The payload carries a nonce. So on HTTP 429 the caller resubmits (and the blocked bucket makes it wait).
+    bucket = ratelimiter.bucket( endpoint )
+    exporter.watchloop()
+    await bucket.acquireasync()
+    headers = authenticator.authenticate( dict( payload, nonce = nonce() ), 'restheader' )['restheader']
+    headers = { name: value.decode() if isinstance( value, bytes ) else value for name, value in headers.items() }
+    client = await getsession()
+    started = time.perf_counter()
+    async with client.post( definer.restserver + endpoint, headers = headers ) as response:
+        if response.status == 429: bucket.penalize( ratelimiter.retryafter( response.headers ) )
+        jsonresponse = await response.json( content_type = None )
+    if exporter.enabled:
+        exporter.restlatency.observe( time.perf_counter() - started, endpoint, 'post' )
+        exporter.restresponses.inc( endpoint, response.status )
+    if endpoint in requester.journaledendpoints: journal.record( 'order', endpoint = endpoint, response = jsonresponse )
+    return jsonresponse
+
+async def neworder(
+        pair: str,
+        size: str,
+        price: str,
+        side: str,
+        options: tuple = ( 'maker-or-cancel', )
+    ) -> dict:
+
+    # Construct limit order payload.
+    # Use 'options': ['maker-or-cancel'] for post only orders.
+    endpoint = '/v1/order/new'
+    payload = {
+        'request': endpoint,
+        'symbol': pair,
+        'amount': str(size),
+        'price': str(price),
+        'side': side,
+        'type': 'exchange limit',
+        'options': list( options )
+    }
+    return await post( endpoint, payload )
+
+async def bidorder(
+        pair: str,
+        size: str
+    ) -> dict:
+
+    # Determine tick size and quantity size (a symbol not catalogued yet is fetched, so the lookup runs in a worker thread).
+    instrument = await asyncio.to_thread( cataloguer.instrument, pair )
+    tick = instrument.tick
+    bump = instrument.minimumquantity
+
+    # Get the highest bid in the orderbook (from memory when bookkeeper maintains the orderbook).
+    # Make an offer that's one tick better. The REST fallback blocks, so it runs in a worker thread.
+    bidprice = await asyncio.to_thread( bookkeeper.bestbid, pair )
+    offering = str( Decimal( bidprice + tick ).quantize( tick ) )
+    quantity = str( Decimal( size ).quantize( bump ) )
+
+    # Update logs.
+    logger.debug(f'Bidprice: {bidprice}')
+    logger.debug(f'Offering: {offering}')
+    logger.debug(f'Quantity: {quantity}')
+
+    return await neworder( pair, quantity, offering, 'buy' )
+
+async def askstoplimit(
+        pair: str,
+        size: str,
+        stop: str,
+        sell: str
+    ) -> dict:
+
+    # Construct stop loss order payload.
+    # Note that sell orders require the stop_price to be greater than the price.
+    endpoint = '/v1/order/new'
+    payload = {
+        'request': endpoint,
+        'symbol': pair,
+        'amount': size,
+        'stop_price': stop,
+        'price': sell,
+        'side': 'sell',
+        'type': 'exchange stop limit'
+    }
+    return await post( endpoint, payload )
+
+async def islive(
+        order: str
+    ) -> dict:
+
+    # Construct order status payload.
+    endpoint = '/v1/order/status'
+    payload = {
+        'request': endpoint,
+        'order_id': order,
+        'include_trades': False
+    }
+    return await post( endpoint, payload )
+
+async def cancelorder(
+        order: str
+    ) -> dict:
+
+    # Construct order cancellation payload.
+    endpoint = '/v1/order/cancel'
+    payload = {
+        'request': endpoint,
+        'order_id': order
+    }
+    return await post( endpoint, payload )
+
+async def notionalvolume() -> dict:
+
+    # Retrieve activity based data like transaction fees and trading volume (USD terms).
+    endpoint = '/v1/notionalvolume'
+    payload = {
+        'request': endpoint
+    }
+    return await post( endpoint, payload )
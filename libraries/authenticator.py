@@ -9,22 +9,65 @@ import json
 import base64
 import hmac
 import hashlib
-import time
 
 import libraries.credentials as credentials
 
-def authenticate(payload):
-    encodedpayload = json.dumps(payload).encode()
-    b64 = base64.b64encode(encodedpayload)
-    signature = hmac.new(credentials.secret.encode(), b64, hashlib.sha384).hexdigest()
+class Signer:
+
+    # Class Description:
+    #  1. Key an HMAC-SHA384 object with the API secret once and copy it (hmac.copy()) for every signature.
+    #  2. Serialize payloads with a cached compact JSON encoder.
+    #  3. Build only the header set requested (REST or websocket).
+    #
+    # Execution:
+    #   - from libraries.authenticator import Signer
+    #   - signer = Signer( credentials.key, credentials.secret )
+    #   - headers = signer.restheader( payload )
+
+    def __init__( self, key, secret ):
+        self.key = key
+        self.__keyed = hmac.new( secret.encode(), digestmod = hashlib.sha384 )
+        self.__encode = json.JSONEncoder( separators = ( ',', ':' ) ).encode
+
+    def sign( self, payload ):
+        # Return the base64 encoded payload and its hexadecimal signature.
+        b64 = base64.b64encode( self.__encode( payload ).encode() )
+        signature = self.__keyed.copy()
+        signature.update( b64 )
+        return b64, signature.hexdigest()
+
+    def restheader( self, payload ):
+        b64, signature = self.sign( payload )
+        return { 'Content-Type': "text/plain",
+                 'Content-Length': "0",
+                 'X-GEMINI-APIKEY': self.key,
+                 'X-GEMINI-PAYLOAD': b64,
+                 'X-GEMINI-SIGNATURE': signature,
+                 'Cache-Control': "no-cache" }
+
+    def sockheader( self, payload ):
+        b64, signature = self.sign( payload )
+        return { 'X-GEMINI-PAYLOAD': b64.decode(),
+                 'X-GEMINI-APIKEY': self.key,
+                 'X-GEMINI-SIGNATURE': signature }
+
+# Shared (process wide) signer keyed with the credentials.
+signer = Signer( credentials.key, credentials.secret )
+
+def authenticate(payload, header = None):
+
+    # Build the header set requested ('restheader' or 'sockheader'). Build both when none is specified.
+    if header == 'restheader': return { 'restheader': signer.restheader( payload ) }
+    if header == 'sockheader': return { 'sockheader': signer.sockheader( payload ) }
+    b64, signature = signer.sign( payload )
     apihead = { 'Content-Type': "text/plain",
                 'Content-Length': "0",
-                'X-GEMINI-APIKEY': credentials.key,
+                'X-GEMINI-APIKEY': signer.key,
                 'X-GEMINI-PAYLOAD': b64,
                 'X-GEMINI-SIGNATURE': signature,
                 'Cache-Control': "no-cache" }
     wsshead = { 'X-GEMINI-PAYLOAD': b64.decode(),
-                'X-GEMINI-APIKEY': credentials.key,
+                'X-GEMINI-APIKEY': signer.key,
                 'X-GEMINI-SIGNATURE': signature }
 
     return { 'sockheader': wsshead, 'restheader': apihead }
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+#
+# library name: benchmarker.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: record latency histograms and store benchmark results by git commit so regressions show up between commits.
+
+
+# Note:
+#
+# Benchmarks record one sample per operation in a Latencyhistogram and summarize it as percentiles in microseconds:
+#   { "count", "mean", "min", "p50", "p99", "p999", "max" }
+# Results are appended to definer.benchmarkresults (JSON Lines). Every line holds the benchmark name, the git commit
+# (suffixed with "-dirty" when the working tree has uncommitted changes), the run parameters (iterations, injected latency,
+# capture file...), the time and the summaries by measurement.
+#
+# Single runs are noisy (a p99 of 20 samples is simply the maximum). Benchmarks repeat their runs and combine() keeps the
+# median of every statistic over the runs. compare() checks the results against the most recent commit (other than this one)
+# with results stored for the same parameters, taking the median of every result that commit stored for them. A measurement regresses when its p50 (or any other statistics specified, where higher
+# is worse) is more than definer.benchmarktolerance (a fraction) higher than before.
+#
+# Execution:
+#   - from libraries.benchmarker import Latencyhistogram
+#   - histogram = Latencyhistogram( 'submit' )
+#   - with histogram.time(): requester.post( endpoint, payload )
+#   - histogram.summary()
+
+
+import os
+import sys
+import json
+import math
+import time
+import subprocess
+
+from contextlib import contextmanager
+
+from libraries.logger import logger as logger
+
+import libraries.definer as definer
+
+class Latencyhistogram:
+
+    # Class Description:
+    #  1. Collect latency samples (in seconds).
+    #  2. Summarize them as the mean, the minimum, the median, the 99th and 99.9th percentiles and the maximum (in microseconds).
+
+    def __init__( self, name ):
+        self.name = name
+        self.samples = []
+
+    def record( self, seconds ):
+        self.samples.append( seconds )
+
+    @contextmanager
+    def time( self ):
+        # Record the time spent in the block.
+        started = time.perf_counter()
+        try: yield
+        finally: self.samples.append( time.perf_counter() - started )
+
+    def percentile( self, fraction ):
+        # Nearest rank percentile (in seconds): the smallest sample with at least the fraction of the samples at or below it.
+        if not self.samples: return 0.0
+        ordered = sorted( self.samples )
+        return ordered[ min( len( ordered ) - 1, max( 0, math.ceil( fraction * len( ordered ) ) - 1 ) ) ]
+
+    def summary( self ):
+        microseconds = lambda seconds: round( seconds * 1e6, 3 )
+        return {
+            'count': len( self.samples ),
+            'mean': microseconds( sum( self.samples ) / len( self.samples ) if self.samples else 0.0 ),
+            'min': microseconds( min( self.samples, default = 0.0 ) ),
+            'p50': microseconds( self.percentile( 0.50 ) ),
+            'p99': microseconds( self.percentile( 0.99 ) ),
+            'p999': microseconds( self.percentile( 0.999 ) ),
+            'max': microseconds( max( self.samples, default = 0.0 ) )
+        }
+
+def commit() -> str:
+
+    # Current git commit (short hash) of the repository, "-dirty" when tracked files have changed. "unknown" outside git.
+    directory = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+    try:
+        revision = subprocess.run( [ 'git', 'rev-parse', '--short', 'HEAD' ], cwd = directory, capture_output = True, text = True, check = True ).stdout.strip()
+        dirty = subprocess.run( [ 'git', 'diff', '--quiet', 'HEAD', '--' ], cwd = directory ).returncode != 0
+    except ( OSError, subprocess.CalledProcessError ): return 'unknown'
+    return f'{revision}-dirty' if dirty else revision
+
+def median( values ):
+    ordered = sorted( values )
+    middle = len( ordered ) // 2
+    return ordered[ middle ] if len( ordered ) % 2 else ( ordered[ middle - 1 ] + ordered[ middle ] ) / 2
+
+def combine(
+        runs: list
+    ) -> dict:
+
+    # Results of several runs (summaries by measurement) as the median of every statistic (the counts are added up).
+    combined = {}
+    for name in runs[0]:
+        summaries = [ results[ name ] for results in runs if name in results ]
+        combined[ name ] = { statistic: sum( summary[ statistic ] for summary in summaries ) if statistic == 'count' else round( median( [ summary[ statistic ] for summary in summaries ] ), 3 ) for statistic in summaries[0] }
+    return combined
+
+def report(
+        benchmark: str,
+        results: dict
+    ) -> None:
+
+    # Log the summaries (one line per measurement).
+    logger.info( f'{benchmark} latencies in microseconds:' )
+    for name, summary in results.items():
+        logger.info( f'  {name:<16} n={summary["count"]:<6} mean={summary["mean"]:>10,.1f} p50={summary["p50"]:>10,.1f} p99={summary["p99"]:>10,.1f} p999={summary["p999"]:>10,.1f} max={summary["max"]:>10,.1f}' )
+
+def saveresults(
+        benchmark: str,
+        results: dict,
+        parameters: dict = None,
+        path: str = None
+    ) -> dict:
+
+    # Append the results (summaries by measurement) and the run parameters to the results file. Return the entry written.
+    entry = {
+        'benchmark': benchmark,
+        'commit': commit(),
+        'parameters': parameters or {},
+        'time': time.strftime( '%Y-%m-%dT%H:%M:%S' ),
+        'python': sys.version.split()[0],
+        'results': results
+    }
+    with open( path or definer.benchmarkresults, 'a' ) as resultsfile: resultsfile.write( json.dumps( entry ) + '\n' )
+    return entry
+
+def loadresults(
+        benchmark: str,
+        path: str = None
+    ) -> list:
+
+    # Every entry stored for the benchmark (oldest first).
+    try:
+        with open( path or definer.benchmarkresults ) as resultsfile:
+            entries = [ json.loads( line ) for line in resultsfile if line.strip() ]
+    except FileNotFoundError: return []
+    return [ entry for entry in entries if entry.get( 'benchmark' ) == benchmark ]
+
+def compare(
+        benchmark: str,
+        results: dict,
+        parameters: dict = None,
+        path: str = None,
+        tolerance: float = None,
+        statistics: tuple = ( 'p50', )
+    ) -> list:
+
+    # Function Description:
+    #  1. Find the most recent commit (other than this one) with results stored for the benchmark and the same run parameters.
+    #     The baseline is the median of that commit's results (so one noisy run of the baseline does not decide).
+    #  2. Log the change of every measurement's statistics (p50 by default).
+    #  3. Return the measurements that are worse than the baseline by more than the tolerance.
+
+    tolerance = definer.benchmarktolerance if tolerance is None else tolerance
+    current = commit()
+    parameters = parameters or {}
+    baselines = [ entry for entry in loadresults( benchmark, path ) if entry['commit'] != current and entry.get( 'parameters', {} ) == parameters ]
+    if not baselines:
+        logger.info( f'No {benchmark} results from another commit with the same parameters ({parameters}) to compare with.' )
+        return []
+    baseline = baselines[-1]
+    baselineresults = combine( [ entry['results'] for entry in baselines if entry['commit'] == baseline['commit'] ] )
+    regressions = []
+    for name, summary in results.items():
+        before = baselineresults.get( name )
+        if not before: continue
+        changes = { statistic: summary[ statistic ] / before[ statistic ] - 1 for statistic in statistics if before.get( statistic ) and statistic in summary }
+        if any( change > tolerance for change in changes.values() ): regressions.append( name )
+        logger.info( f'  {name:<16} ' + ' '.join( f'{statistic} {change:+.1%}' for statistic, change in changes.items() ) + f' versus {baseline["commit"]}' )
+    if regressions: logger.warning( f'{benchmark} regressions (more than {tolerance:.0%} worse than {baseline["commit"]}): {", ".join( regressions )}' )
+    return regressions
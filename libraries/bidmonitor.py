@@ -6,31 +6,111 @@
 # library purpose: continually monitor bid prices via Gemini's Websockets API.
 
 
-# Warning:
+# Note:
 #
-# This version of rentseeker is using synchronous communications. This may not be ideal.
-# If the messages are processed faster than they are received, this code is good. If not,
-# you are going to lose money.
+# The monitor no longer opens a websocket connection of its own. It watches the orderbook the shared marketdata
+# multiplexer (multiplexer.py) maintains over the process's single /v2/marketdata connection.
 #
-# According to https://pypi.org/project/websocket_client/ [Short-lived one-off send-receive]:
-# This is if you want to communicate a short message and disconnect immediately when done.
+# The processing lives in Bidriseprocessor (no socket involved), so the hot path can be driven directly by benchmarks
+# (see handlerbenchmark.py) and anchoredrise() only passes it the highest bid of the shared orderbook whenever it changes.
 
 
-import statistics
-import requests
-import ssl
-import json
-import datetime
-import time
+import logging
 
 from decimal import Decimal
-from websocket import create_connection
 
 from libraries.logger import logger as logger
 from libraries.messenger import sendmessage as sendmessage
+from libraries.statistician import Rollingstatistics
+from libraries.bookkeeper import Orderbook
+from libraries.summarizer import Periodicsummary
+from libraries.multiplexer import multiplexer as multiplexer
 
-import libraries.definer as definer
-import libraries.authenticator as authenticator
+class Bidriseprocessor:
+
+    # Class Description:
+    #  1. Apply decoded v2 marketdata messages (dictionaries) to a local orderbook (or observe the highest bids of another book).
+    #  2. Track the highest bid in session statistics (discarding aberrations).
+    #  3. Report when the highest bid exceeds the target price.
+    #
+    # Execution:
+    #   - from libraries.bidmonitor import Bidriseprocessor
+    #   - processor = Bidriseprocessor( "BTCUSD", "25000" )
+    #   - notification = processor.process( decoder.loads( message ) ) # None until the target is exceeded.
+    #   - notification = processor.observe( orderbook.bestbid() ) # The same for the highest bid of a maintained orderbook.
+
+    def __init__( self, pair, rise ):
+        self.pair = pair
+
+        # Define session statistics.
+        # Purpose: Tracks the offers received during the websocket connection session in constant time.
+        self.sessionstats = Rollingstatistics()
+
+        # Define periodic summary.
+        # Purpose: Replaces the message logged for every highest bid change with a periodic summary in quiet mode.
+        self.summary = Periodicsummary( pair, 'highest bids', logging.DEBUG )
+
+        # Define local orderbook.
+        # Purpose: Keeps every price level so that the highest bid is the actual best bid (not just the highest bid changed).
+        self.orderbook = Orderbook( pair )
+
+        # Set the highest bid to zero.
+        self.maximumbid = Decimal(0)
+
+        # Set bid price at which to exit the loop.
+        self.targetprice = Decimal(rise)
+
+    def process( self, dictionary ):
+
+        # Process "type": "update" messages with events only.
+        if 'l2_updates' not in dictionary['type'] or dictionary['changes'] == []: return None
+        changes = dictionary['changes']
+        self.orderbook.update( dictionary )
+
+        # Determine the highest bid in the local orderbook whenever the Gemini L2 update response changes bids.
+        if not any( change[0] == 'buy' for change in changes ) or self.orderbook.bestbid() is None : return None
+        return self.observe( self.orderbook.bestbid() )
+
+    def observe( self, maximumbid ):
+
+        # Add the highest bid to the session statistics and report a breach of the target price (if there is one).
+        pair = self.pair
+        targetprice = self.targetprice
+        self.maximumbid = maximumbid
+
+        # Filter out aberrations.
+        # Add to the session statistics.
+        sessionstats = self.sessionstats
+        sessionstats.push(maximumbid)
+
+        # Determine how much the maximum bid fluctuated away from the session average.
+        # If it deviated by more than four standard deviations, then do nothing further.
+        sessionavg = sessionstats.mean
+        deviatedby = maximumbid - sessionavg
+        deviatedby = abs(deviatedby)
+        if sessionstats.count != 1:
+            if deviatedby.compare( 4 * sessionstats.stdev ) == 1:
+                fluctuated = 100 * ( maximumbid - sessionavg ) / sessionavg
+                warningmessage = f'A trader just offered {maximumbid} to buy {pair[:3]}. That bid is odd. '
+                warningmessage = warningmessage + f'It is more than four standard deviations from average bids [{sessionavg:.2f}]. '
+                logger.warning ( f'{warningmessage} The {fluctuated:.2f}% fluctuation is aberratic... Dumping!' )
+                sessionstats.pop()
+                return None
+
+        # Display impact of event information received (only built when the message is emitted).
+        if self.summary.verbose :
+            bidshortfall = 100 * ( targetprice - maximumbid ) / targetprice
+            notification = f'A trader just offered {maximumbid} to buy {pair[:3]}. '
+            notification = notification + f'That is {bidshortfall:.2f}% below {targetprice} {pair[3:]}. '
+            logger.debug ( f'{notification}' )
+        else : self.summary.record( maximumbid )
+
+        # Report the price (rise) target breach.
+        if maximumbid.compare( targetprice ) == 1 :
+            notification = f'Exiting loop: {pair[:3]} above {targetprice:.2f} {pair[3:]}. '
+            notification = notification + f'It is now {maximumbid:.2f} {pair[3:]}. '
+            return notification
+        return None
 
 def anchoredrise (
         pair: str,
@@ -38,99 +118,34 @@ def anchoredrise (
         ) -> None:
 
     # Function Description:
-    #  1. Open a websocket connection.
-    #  2. Request L2 orderbook data.
-    #  3. Monitor the orderbook for a rise in bids (i.e. "prices offered to acquire the asset") for the pair specified.
-    #  4. Send an alert to a Discord channel via the messenger library's webhook when bid prices surpass the specified threshold.
+    #  1. Watch the orderbook of the pair maintained by the shared marketdata multiplexer.
+    #  2. Monitor the orderbook for a rise in bids (i.e. "prices offered to acquire the asset") for the pair specified.
+    #  3. Send an alert to a Discord channel via the messenger library's webhook when bid prices surpass the specified threshold.
     #
     # Function Purpose: 
     #     Waiting for an absolute rise in bid prices.
     #
     # Arguments:
     #  1. pair is the trading pair monitored.
-    #  2. rise is the actual price that must be exceeded to breach the loop and close the websocket.
+    #  2. rise is the actual price that must be exceeded to stop monitoring.
     # 
     # Execution:
     #   - from libraries.bidmonitor import anchoredrise
     #   - highestbid = anchoredrise( "BTCUSD", "25000" )
 
-    # Define dataset class.
-    # Purpose: Stores the offers received during the websocket connection session.
-    dataset = []
-
-    # Construct subscription request.
-    subscriptionrequest = f'{{"type": "subscribe","subscriptions":[{{"name":"l2","symbols":["{pair}"]}}]}}'
-
-    # Construct payload.
-    request = definer.sockserver + '/v2/marketdata'
-    t = datetime.datetime.now()
-    nonce = str(int(time.mktime(t.timetuple())*1000))
-    payload = {
-        'request': request,
-        'nonce': nonce
-    }
-    authenticator.authenticate(payload)
-
-    # Establish websocket connection.
-    ws = create_connection( request )
-    ws.send( subscriptionrequest )
-
-    # Set the highest bid to zero.
-    maximumbid = Decimal(0)
-
-    # Set bid price at which to exit the loop.
-    targetprice = Decimal(rise)
-    
-    while True:
-        newmessage = ws.recv()
-        dictionary = json.loads( newmessage )
-        
-        # Uncomment this statement to debug messages: logger.debug(dictionary)
+    # Define the message processor.
+    processor = Bidriseprocessor( pair, rise )
 
-        # Process "type": "update" messages with events only.
-        if 'l2_updates' in dictionary['type']:
-            if dictionary['changes'] != []:
-                changes = dictionary['changes']
-
-                # Rank bids and determine the highest bid among the changes in the Gemini L2 update response.
-                bidranking = [ Decimal(change[1]) for change in changes if change[0] == 'buy' ]
-                if bidranking != [] :
-                    
-                    # Define highest offer price.
-                    maximumbid = max(bidranking)
-                    
-                    # Filter out aberrations.
-                    # Add to a defined dataset.
-                    dataset.append(maximumbid)
-                    
-                    # Determine how much the maximum bid fluctuated away from the session average.
-                    # If it deviated by more than four standard deviations, then do nothing further.
-                    # Continue at the start of the while loop.
-                    sessionavg = Decimal( statistics.mean(dataset) )
-                    fluctuated = 100 * ( maximumbid - sessionavg ) / sessionavg
-                    deviatedby = maximumbid - sessionavg
-                    deviatedby = abs(deviatedby)
-                    if len(dataset) != 1:
-                        if deviatedby.compare( 4 * statistics.stdev(dataset) ) == 1:
-                            warningmessage = f'A trader just offered {maximumbid} to buy {pair[:3]}. That bid is odd. '
-                            warningmessage = warningmessage + f'It is more than four standard deviations from average bids [{sessionavg:.2f}]. '
-                            logger.warning ( f'{warningmessage} The {fluctuated:.2f}% fluctuation is aberratic... Dumping!' )
-                            dataset.pop()
-                            continue
-
-                    # Display impact of event information received.
-                    bidshortfall = 100 * ( targetprice - maximumbid ) / targetprice
-                    notification = f'A trader just offered {maximumbid} to buy {pair[:3]}. '
-                    notification = notification + f'That is {bidshortfall:.2f}% below {targetprice} {pair[3:]}. '
-                    logger.debug ( f'{notification}' )
-                    
-                    # Exit loop on price (rise) target breach.
-                    if maximumbid.compare( targetprice ) == 1 :
-                        notification = f'Exiting loop and closing websocket: {pair[:3]} above {targetprice:.2f} {pair[3:]}. '
-                        notification = notification + f'It is now {maximumbid:.2f} {pair[3:]}. '
-                        logger.debug ( notification ) ; sendmessage( notification ) ; ws.close()
-                        break
+    # Define orderbook watcher (called by the shared marketdata multiplexer for every L2 update of the pair).
+    def on_book( orderbook ) :
+        maximumbid = orderbook.bestbid()
+        if maximumbid is None or maximumbid == processor.maximumbid : return None
+        return processor.observe( maximumbid )
+
+    # Stop monitoring on price (rise) target breach.
+    notification = multiplexer.blockuntil( pair, onbook = on_book )
+    logger.debug ( notification ) ; sendmessage( notification )
 
     # Return value when profitable only.
-    if maximumbid.compare(0) == 1 : return maximumbid
+    if processor.maximumbid.compare(0) == 1 : return processor.maximumbid
     else: return False
\ No newline at end of file
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+#
+# library name: bookkeeper.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: maintain a local copy of the Gemini L2 orderbook from the v2 marketdata l2_updates stream.
+
+
+# Note:
+#
+# The first l2_updates message received after subscribing is a snapshot of the entire orderbook.
+# Subsequent l2_updates messages carry incremental changes. Each change is [side, price, quantity]
+# and a quantity of zero removes the price level. Reference: https://docs.gemini.com/websocket-api/#level-2-data
+#
+# Price levels are kept in sorted dictionaries (pip3 install sortedcontainers). Updates are O(log n).
+# The best bid and best ask are read from the ends of the sorted levels in O(1).
+
+
+import threading
+
+from decimal import Decimal
+from sortedcontainers import SortedDict
+
+from libraries.pricegetter import ticker as ticker
+from libraries.journaler import journal as journal
+
+import libraries.definer as definer
+
+# Orderbooks maintained in the background (keyed by trading pair).
+orderbooks = {}
+
+class Orderbook:
+
+    # Class Description:
+    #  1. Apply the initial snapshot and the incremental changes from l2_updates messages.
+    #  2. Report the best bid and best ask (and deeper levels) without a REST API round trip.
+    #
+    # Execution:
+    #   - from libraries.bookkeeper import Orderbook
+    #   - orderbook = Orderbook( "BTCUSD" )
+    #   - orderbook.update( dictionary ) # For every l2_updates message received.
+    #   - orderbook.bestask()
+
+    def __init__( self, pair ):
+        self.pair = pair.upper()
+        self.ready = threading.Event()
+        self.__lock = threading.Lock()
+        self.__bids = SortedDict()
+        self.__asks = SortedDict()
+
+    def reset( self ):
+        # Discard every level (for instance, before resubscribing after a disconnection).
+        with self.__lock:
+            self.__bids.clear()
+            self.__asks.clear()
+            self.ready.clear()
+
+    def update( self, dictionary ):
+        # Apply an l2_updates message (a dictionary or a decoder.L2update). The first message applied is treated as the snapshot.
+        if isinstance( dictionary, dict ): symbol, changes = dictionary.get( 'symbol', self.pair ), dictionary['changes']
+        else: symbol, changes = dictionary.symbol, dictionary.changes
+        if symbol != self.pair : return
+        snapshot = not self.ready.is_set()
+        with self.__lock:
+            if snapshot:
+                self.__bids.clear()
+                self.__asks.clear()
+            self.__apply( changes )
+        self.ready.set()
+
+        # Journal the top of each snapshot loaded.
+        if snapshot: journal.record( 'book', symbol = self.pair, bids = self.bids( definer.journaldepth ), asks = self.asks( definer.journaldepth ) )
+
+    def apply( self, changes ):
+        # Apply a list of [side, price, quantity] changes.
+        with self.__lock: self.__apply( changes )
+
+    def __apply( self, changes ):
+        # Changes decoded by decoder.py already hold Decimals. Only strings are converted.
+        for side, price, quantity in changes:
+            levels = self.__bids if side == 'buy' else self.__asks
+            if price.__class__ is not Decimal: price = Decimal( price )
+            if quantity.__class__ is not Decimal: quantity = Decimal( quantity )
+            if quantity.is_zero(): levels.pop( price, None )
+            else: levels[ price ] = quantity
+
+    def bestbid( self ):
+        with self.__lock: return self.__bids.peekitem( -1 )[0] if self.__bids else None
+
+    def bestask( self ):
+        with self.__lock: return self.__asks.peekitem( 0 )[0] if self.__asks else None
+
+    def bids( self, depth = 10 ):
+        # Highest bids first as (price, quantity) tuples.
+        with self.__lock: return [ self.__bids.peekitem( -index ) for index in range( 1, min( depth, len( self.__bids ) ) + 1 ) ]
+
+    def asks( self, depth = 10 ):
+        # Lowest asks first as (price, quantity) tuples.
+        with self.__lock: return [ self.__asks.peekitem( index ) for index in range( min( depth, len( self.__asks ) ) ) ]
+
+def maintainbook(
+        pair: str
+    ) -> Orderbook:
+
+    # Function Description:
+    #  1. Subscribe to L2 orderbook data for the pair specified on the shared marketdata connection.
+    #  2. Keep a local orderbook up to date in the background (reloading the snapshot on reconnection).
+    #
+    # Function Purpose:
+    #     Read the top of the book from memory instead of requesting /v1/pubticker.
+    #
+    # Execution:
+    #   - from libraries.bookkeeper import maintainbook
+    #   - orderbook = maintainbook( "BTCUSD" )
+    #   - orderbook.ready.wait( 10 )
+
+    # Imported here because the multiplexer builds its orderbooks with this library.
+    from libraries.multiplexer import multiplexer
+    return multiplexer.orderbook( pair )
+
+def bestbid(
+        pair: str
+    ) -> Decimal:
+
+    # Read the highest bid from a maintained orderbook (if ready). Otherwise use the REST API.
+    orderbook = orderbooks.get( pair.upper() )
+    if orderbook is not None and orderbook.ready.is_set():
+        price = orderbook.bestbid()
+        if price is not None : return price
+    return Decimal( ticker( pair )['bid'] )
+
+def bestask(
+        pair: str
+    ) -> Decimal:
+
+    # Read the lowest ask from a maintained orderbook (if ready). Otherwise use the REST API.
+    orderbook = orderbooks.get( pair.upper() )
+    if orderbook is not None and orderbook.ready.is_set():
+        price = orderbook.bestask()
+        if price is not None : return price
+    return Decimal( ticker( pair )['ask'] )
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+#
+# library name: cataloguer.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: cache symbol details (tick size and minimums) from the Gemini REST API with an on-disk snapshot.
+
+
+# Note:
+#
+# The tick and minimum size tables in definer.py are maintained by hand and drift from the exchange.
+# This library keeps a catalogue of the details Gemini publishes for each symbol instead:
+#   GET /v1/symbols/details/<symbol> -> { "symbol", "base_currency", "quote_currency", "tick_size", "quote_increment", "min_order_size", ... }
+# Reference: https://docs.gemini.com/rest-api/#symbol-details
+#
+# Gemini's "quote_increment" is the price tick, "tick_size" is the quantity increment and "min_order_size" is the minimum order.
+# They are stored as definer.Instrument tuples (tick, minimumquantity and minimumorder respectively).
+#
+# Lookups of catalogued symbols never block. They return the catalogued details and leave expired (older than definer.symbolttl)
+# symbols for a background thread to refresh. A symbol that has not been catalogued yet (a new listing, for instance) is fetched
+# on the spot. Only when that fails are the definer.py tables used (and the fetch retried in the background).
+# The catalogue is persisted to definer.symbolsnapshot so the next process starts with details already loaded.
+
+
+import os
+import json
+import time
+import threading
+
+from decimal import Decimal
+
+from libraries.logger import logger as logger
+
+import libraries.definer as definer
+import libraries.requester as requester
+
+class Symbolcatalogue:
+
+    # Class Description:
+    #  1. Load the snapshot of symbol details persisted by a previous process.
+    #  2. Answer lookups from memory. Fetch symbols missing from memory on the spot (falling back to the definer.py tables).
+    #  3. Refresh expired symbols (and retry failed fetches) in a background (daemon) thread and persist the snapshot.
+    #
+    # Execution:
+    #   - from libraries.cataloguer import catalogue
+    #   - tick = catalogue.instrument( "BTCUSD" ).tick
+
+    def __init__( self, snapshot = None, ttl = None ):
+        self.snapshot = snapshot or definer.symbolsnapshot
+        self.ttl = float( ttl or definer.symbolttl )
+        self.__details = {}
+        self.__pending = set()
+        self.__lock = threading.Lock()
+        self.__wake = threading.Event()
+        self.__thread = None
+        self.load()
+
+    def instrument( self, symbol ):
+        # Return the details of a symbol (waiting on the network only when the symbol has not been catalogued yet).
+        symbol = symbol.upper()
+        entry = self.__details.get( symbol )
+        if entry is not None:
+            if time.time() - entry[1] > self.ttl: self.__request( symbol )
+            return entry[0]
+        instrument = self.refresh( symbol )
+        if instrument is not None:
+            self.save()
+            return instrument
+        self.__request( symbol )
+        return definer.instrument( symbol )
+
+    def refresh( self, symbol ):
+        # Fetch the details of a symbol from the REST API now (blocking). Return them (or None on failure).
+        symbol = symbol.upper()
+        try:
+            response = requester.get( f'/v1/symbols/details/{symbol.lower()}', definer.symbolserver )
+            response.raise_for_status()
+            details = response.json( parse_float = Decimal )
+            instrument = definer.Instrument(
+                symbol,
+                details['base_currency'].upper(),
+                details['quote_currency'].upper(),
+                Decimal( str( details['quote_increment'] ) ),
+                Decimal( str( details['tick_size'] ) ),
+                Decimal( str( details['min_order_size'] ) )
+            )
+        except Exception as e:
+            logger.debug( f'Unable to catalogue {symbol} details: {e}' )
+            return None
+        with self.__lock: self.__details[ symbol ] = ( instrument, time.time() )
+        return instrument
+
+    def load( self ):
+        # Read the snapshot (if there is one). A missing or corrupt snapshot leaves the catalogue empty.
+        try:
+            with open( self.snapshot ) as snapshot: entries = json.load( snapshot )
+            details = {
+                symbol: ( definer.Instrument( symbol, entry['base'], entry['quote'], Decimal( entry['tick'] ), Decimal( entry['minimumquantity'] ), Decimal( entry['minimumorder'] ) ), float( entry['fetched'] ) )
+                for symbol, entry in entries.items()
+            }
+        except FileNotFoundError: return
+        except Exception as e:
+            logger.debug( f'Ignoring unreadable symbol snapshot {self.snapshot}: {e}' )
+            return
+        with self.__lock: self.__details.update( details )
+
+    def save( self ):
+        # Write the snapshot atomically (write a temporary file and rename it).
+        with self.__lock:
+            entries = {
+                symbol: {
+                    'base': instrument.base,
+                    'quote': instrument.quote,
+                    'tick': str( instrument.tick ),
+                    'minimumquantity': str( instrument.minimumquantity ),
+                    'minimumorder': str( instrument.minimumorder ),
+                    'fetched': fetched
+                }
+                for symbol, ( instrument, fetched ) in self.__details.items()
+            }
+        temporary = f'{self.snapshot}.{os.getpid()}'
+        try:
+            with open( temporary, 'w' ) as snapshot: json.dump( entries, snapshot, indent = 1 )
+            os.replace( temporary, self.snapshot )
+        except OSError as e: logger.debug( f'Unable to write symbol snapshot {self.snapshot}: {e}' )
+
+    def __request( self, symbol ):
+        with self.__lock:
+            if symbol in self.__pending: return
+            self.__pending.add( symbol )
+            if self.__thread is None:
+                self.__thread = threading.Thread( target = self.__run, name = 'symbol-cataloguer', daemon = True )
+                self.__thread.start()
+        self.__wake.set()
+
+    def __run( self ):
+        while True:
+            self.__wake.wait( timeout = self.ttl )
+            self.__wake.clear()
+
+            # Refresh the symbols requested and every catalogued symbol that has expired.
+            with self.__lock:
+                now = time.time()
+                symbols = self.__pending | { symbol for symbol, ( _, fetched ) in self.__details.items() if now - fetched > self.ttl }
+            refreshed = [ symbol for symbol in sorted( symbols ) if self.refresh( symbol ) is not None ]
+            with self.__lock: self.__pending -= set( refreshed )
+            if refreshed:
+                logger.debug( f'Catalogued symbol details: {", ".join( refreshed )}' )
+                self.save()
+
+            # Failed symbols are retried after a pause (not in a tight loop).
+            if self.__pending:
+                time.sleep( 10 )
+                self.__wake.set()
+
+# Shared (process wide) catalogue.
+catalogue = Symbolcatalogue()
+
+def instrument(
+        symbol: str
+    ) -> definer.Instrument:
+
+    # Return the details (tick, minimumquantity and minimumorder) of a symbol like 'BTCUSD' (fetched first when not catalogued yet).
+    return catalogue.instrument( symbol )
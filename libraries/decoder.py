@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+#
+# library name: decoder.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: decode Gemini websocket messages quickly (with orjson or msgspec when installed) into typed trade and L2 structs.
+
+
+# Note:
+#
+# Parsing JSON dominated the time spent handling marketdata messages on busy pairs. This library picks the fastest
+# decoder installed (definer.jsondecoder chooses one explicitly):
+#  - msgspec (pip3 install msgspec) decodes v2 marketdata messages straight into Trade and L2update structs
+#    (prices and quantities become Decimals while parsing),
+#  - orjson (pip3 install orjson) parses the JSON and the structs are built from the result,
+#  - the standard library json module is the fallback.
+#
+# Trade has the fields: symbol, price, quantity, side (the taker side), timestamp and eventid.
+# L2update has the fields: symbol, changes (a list of [side, price, quantity]) and trades (a list of Trade).
+# Other messages (heartbeats, acknowledgements and v1 messages) are returned as plain dictionaries (or lists).
+#
+# Execution:
+#   - from libraries.decoder import decode
+#   - message = decode( ws.recv() )
+#   - if isinstance( message, Trade ): message.price
+
+
+import json
+
+from decimal import Decimal
+from typing import NamedTuple
+
+import libraries.definer as definer
+
+try: import orjson
+except ImportError: orjson = None
+
+try: import msgspec
+except ImportError: msgspec = None
+
+if msgspec is not None:
+
+    class Trade( msgspec.Struct, tag = 'trade', tag_field = 'type', frozen = True ):
+        symbol: str
+        price: Decimal
+        quantity: Decimal
+        side: str
+        timestamp: int = 0
+        eventid: int = msgspec.field( name = 'event_id', default = 0 )
+
+    class L2update( msgspec.Struct, tag = 'l2_updates', tag_field = 'type', frozen = True ):
+        symbol: str
+        changes: list[ tuple[ str, Decimal, Decimal ] ] = []
+        trades: list[ Trade ] = []
+
+    structdecoder = msgspec.json.Decoder( Trade | L2update )
+
+else:
+
+    class Trade( NamedTuple ):
+        symbol: str
+        price: Decimal
+        quantity: Decimal
+        side: str
+        timestamp: int = 0
+        eventid: int = 0
+
+    class L2update( NamedTuple ):
+        symbol: str
+        changes: list = []
+        trades: list = []
+
+    structdecoder = None
+
+def backend(
+        name: str = 'auto'
+    ) -> str:
+
+    # Resolve the decoder name ('auto' picks msgspec, then orjson, then json).
+    if name == 'auto': name = 'msgspec' if msgspec else 'orjson' if orjson else 'json'
+    if name == 'msgspec' and msgspec is None: raise ImportError( 'msgspec is not installed (pip3 install msgspec).' )
+    if name == 'orjson' and orjson is None: raise ImportError( 'orjson is not installed (pip3 install orjson).' )
+    if name not in ( 'msgspec', 'orjson', 'json' ): raise ValueError( f'Unknown JSON decoder: {name}' )
+    return name
+
+def loader(
+        name: str
+    ) -> object:
+
+    # Return the function that parses JSON text (or bytes) into dictionaries and lists.
+    name = backend( name )
+    if name == 'msgspec': return msgspec.json.decode
+    if name == 'orjson': return orjson.loads
+    return json.loads
+
+# Backend used by this process (definer.jsondecoder).
+decoder = backend( definer.jsondecoder )
+loads = loader( decoder )
+
+def trade(
+        dictionary: dict
+    ) -> Trade:
+
+    # Build a Trade from a parsed v2 trade message.
+    return Trade(
+        dictionary['symbol'],
+        Decimal( dictionary['price'] ),
+        Decimal( dictionary['quantity'] ),
+        dictionary['side'],
+        dictionary.get( 'timestamp', 0 ),
+        dictionary.get( 'event_id', 0 )
+    )
+
+def structure(
+        dictionary: object
+    ) -> object:
+
+    # Convert a parsed v2 marketdata message into a Trade or L2update (other messages are returned unchanged).
+    if not isinstance( dictionary, dict ): return dictionary
+    messagetype = dictionary.get( 'type' )
+    if messagetype == 'trade': return trade( dictionary )
+    if messagetype == 'l2_updates':
+        return L2update(
+            dictionary['symbol'],
+            [ ( side, Decimal( price ), Decimal( quantity ) ) for side, price, quantity in dictionary['changes'] ],
+            [ trade( item ) for item in dictionary.get( 'trades', () ) ]
+        )
+    return dictionary
+
+def decode(
+        message: str,
+        name: str = None
+    ) -> object:
+
+    # Decode a v2 marketdata message into a Trade, an L2update or (for any other message) a dictionary.
+    name = decoder if name is None else backend( name )
+    if name == 'msgspec':
+        try: return structdecoder.decode( message )
+        except msgspec.ValidationError: return msgspec.json.decode( message )
+    return structure( loader( name )( message ) )
@@ -6,6 +6,10 @@
 # test purpose: define constants (like resource locators) used by libraries.
 
 
+from functools import lru_cache
+from collections import namedtuple
+from decimal import Decimal
+
 restsandbox = 'https://api.sandbox.gemini.com'
 restgenuine = 'https://api.gemini.com'
 socksandbox = 'wss://api.sandbox.gemini.com'
@@ -19,6 +23,163 @@ restserver = restgenuine
 # sockserver = socksandbox
 # restserver = restsandbox
 
+# REST API connection pool (shared by every library through requester.py):
+#  - restpoolconnections is the number of hosts with pooled connections.
+#  - restpoolsize is the number of keep-alive connections kept per host.
+#  - resttimeout is the (connect, read) timeout in seconds.
+restpoolconnections = 2
+restpoolsize = 10
+resttimeout = ( 3.05, 10 )
+
+# Nonces for private API requests (generated by noncegenerator.py):
+#  - nonceunits is the clock resolution of the nonces (1000000 is microseconds).
+#    API keys created with the "time-based nonce" option require milliseconds (1000).
+#  - noncefile is an optional counter file shared by processes using the same API key (for example '/tmp/gemini.nonce').
+nonceunits = 1000000
+noncefile = None
+
+# REST API rate limits (shared by every library through ratelimiter.py):
+#  - ratelimits maps a bucket name to ( requests per second, burst size ).
+#  - ratelimitedendpoints maps an endpoint prefix to a bucket. Unlisted endpoints use the "private" bucket.
+# Gemini recommends staying below 1 public request per second and 5 private requests per second.
+ratelimits = {
+    'public': ( 1, 5 ),
+    'private': ( 5, 10 )
+}
+ratelimitedendpoints = {
+    '/v1/pubticker': 'public',
+    '/v1/symbols': 'public',
+    '/v1/book': 'public',
+    '/v1/trades': 'public',
+    '/v2/ticker': 'public'
+}
+
+# Websocket reconnections (shared marketdata and order events connections, paced by ratelimiter.Backoff):
+#  - reconnectdelay is the delay (in seconds) before the first reconnection attempt. It doubles with every failed attempt.
+#  - reconnectmaxdelay caps the delay. A random jitter of up to half the delay is subtracted so processes do not reconnect in step.
+#  - reconnecthealthy is the number of seconds a connection must stay up before the delay is reset.
+#  - reconnectsilence is the number of seconds without any message (Gemini sends a heartbeat every five seconds)
+#    after which a marketdata connection is considered dead and reestablished.
+reconnectdelay = 0.5
+reconnectmaxdelay = 60
+reconnecthealthy = 30
+reconnectsilence = 20
+
+# Symbol details cache (maintained by cataloguer.py):
+#  - symbolserver is the server queried for /v1/symbols/details/<symbol>. None means restserver.
+#    Point it at a local stand-in (for example 'http://127.0.0.1:8080') to test without Gemini.
+#  - symbolsnapshot is the file the details are persisted to for a fast cold start.
+#  - symbolttl is the number of seconds details remain fresh before they are refreshed in the background.
+symbolserver = None
+symbolsnapshot = '/tmp/gemini.symbols.json'
+symbolttl = 3600
+
+# Logging (logger.py):
+#  - logdirectory is where the <script>.out and <script>.err logs are written (the GEMINI_LOG_DIRECTORY environment variable overrides it).
+#  - logmaxbytes is the size at which a log is rotated (logs are also rotated daily). Rotated logs are gzip compressed.
+#  - logbackups is the number of compressed logs kept per log file.
+#  - logqueuesize is the number of records the background log writer may fall behind by.
+#    When the queue is full DEBUG records are dropped. Records of every other level wait.
+logdirectory = '/tmp'
+logmaxbytes = 10 * 1024 * 1024
+logbackups = 14
+logqueuesize = 10000
+
+# Structured event journal (journaler.py):
+#  - journaling enables the journal of trades, orderbook snapshots, orders, fills and cancels.
+#  - journaldirectory is where the <script>.journal.msgpack (or .jsonl) files are written. None means the log directory.
+#  - journalfsync is the number of seconds between fsync calls.
+#  - journaldepth is the number of bid and ask levels recorded with each orderbook snapshot.
+#  - journalmaxbytes is the size at which a journal is rotated. Rotated journals are gzip compressed.
+#  - journalbackups is the number of compressed journals kept.
+#  - journalqueuesize is the number of records the background journal writer may fall behind by.
+#    When the queue is full new records are dropped (and counted) instead of making callers wait.
+journaling = True
+journaldirectory = None
+journalfsync = 1
+journaldepth = 10
+journalmaxbytes = 100 * 1024 * 1024
+journalbackups = 14
+journalqueuesize = 100000
+
+# Discord alerts (messenger.py):
+#  - alertqueuesize is the number of alerts that may wait to be sent. When the queue is full new alerts are dropped.
+#  - alertcoalesce is the number of seconds the dispatcher waits for more alerts to join into one message.
+#  - alertflushtimeout is the number of seconds a process waits at exit for queued alerts to be sent.
+#  - alertdedupwindow is the number of seconds during which a message identical to one already sent is suppressed.
+#  - alertthrottles maps alert categories to the minimum number of seconds between two alerts of that category.
+#    Alerts are categorized by the callers (sendmessage( message, category = 'error' )). Uncategorized alerts are never throttled.
+#  - alertdigestinterval is the number of seconds between digests summarizing the alerts suppressed.
+alertqueuesize = 1000
+alertcoalesce = 0.5
+alertflushtimeout = 10
+alertdedupwindow = 300
+alertthrottles = {
+    'error': 60,
+    'stopreset': 30
+}
+alertdigestinterval = 900
+
+# Websocket handler logging (summarizer.py):
+#  - quietmode stops the monitors from logging every trade and L2 update. Only threshold crossings are logged,
+#    plus a summary of the prices seen every summaryinterval seconds.
+quietmode = False
+summaryinterval = 60
+
+# Websocket message decoding (decoder.py):
+#  - jsondecoder is 'auto' (the fastest installed: msgspec, then orjson, then json) or one of 'msgspec', 'orjson' and 'json'.
+jsondecoder = 'auto'
+
+# Local exchange simulator (simulator.py and exchangesimulator.py):
+#  - simulatorlatency is the number of seconds every simulated REST response and websocket frame is delayed by.
+#  - simulatorjitter is the maximum number of seconds added to that delay at random.
+#  - simulatorinterval is the number of seconds between random walk steps of the simulated market.
+#  - simulatorvolatility is the standard deviation of the relative price change of each step.
+#  - simulatordepth is the number of price levels on each side of the simulated book.
+# To trade against the simulator set restserver = 'http://127.0.0.1:8780' and sockserver = 'ws://127.0.0.1:8780'.
+simulatorlatency = 0.0
+simulatorjitter = 0.0
+simulatorinterval = 0.1
+simulatorvolatility = 0.00005
+simulatordepth = 10
+
+# Benchmark results (benchmarker.py):
+#  - benchmarkresults is the file benchmark results are appended to (one line per run, keyed by git commit and run parameters).
+#  - benchmarktolerance is the fraction by which a p50 latency (the median of several runs) may exceed the previous commit's
+#    before it is a regression.
+#  - benchmarkwarmup is the number of iterations run (and discarded) before latencies are recorded.
+#  - benchmarkruns is the number of times the latency benchmark repeats its iterations (the median of the runs is compared).
+benchmarkresults = '/tmp/gemini.benchmarks.jsonl'
+benchmarktolerance = 0.10
+benchmarkwarmup = 10
+benchmarkruns = 5
+
+# Metrics (exporter.py):
+#  - metricsenabled turns on the counters, gauges and histograms recorded by the libraries and the exporter serving them.
+#    Setting the GEMINI_METRICS_ADDRESS environment variable enables them for a single process instead.
+#  - metricsaddress is where they are served in the Prometheus text format: "host:port" (HTTP, port 0 picks a free port)
+#    or "unix:/path" (a Unix socket). {script} and {pid} are replaced so that every bot process has its own address.
+#  - metricsbuckets are the histogram bucket upper bounds in seconds.
+#  - metricslaginterval is the number of seconds between event loop lag measurements.
+metricsenabled = False
+metricsaddress = 'unix:/tmp/{script}.{pid}.metrics'
+metricsbuckets = ( 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5 )
+metricslaginterval = 0.5
+
+# Sampling profiler (profiler.py):
+#  - sending SIGUSR1 to a script (kill -USR1 <pid>) samples every thread's stack for profileduration seconds,
+#    every profileinterval seconds, and writes the collapsed stacks next to its logs (<script>.<time>.<pid>.collapsed).
+profileduration = 30
+profileinterval = 0.005
+
+# Order events subscription (shared by every validator through ordertracker.py):
+#  - ordereventsymbols limits the events Gemini sends to these symbols (for example [ 'BTCUSD' ]). None means every symbol.
+#  - ordereventtypes limits the events Gemini sends to these types. None means every type.
+#    The validators only act on "initial", "fill", "cancelled", "rejected" and "closed" events.
+# Filtering on the server matters when several bots share one API key. Reference: https://docs.gemini.com/websocket-api/#order-events
+ordereventsymbols = None
+ordereventtypes = [ 'initial', 'fill', 'cancelled', 'rejected', 'closed' ]
+
 # Note:
 #
 # The source of these constants can be located here:
@@ -367,3 +528,37 @@ minimumquantities = [
    'minimumquantity': '0.002'
  }
 ]
+
+# Instrument registry:
+#
+# The lists above are kept for reference (and manual editing). Libraries should not scan them.
+# They are the fallback used by cataloguer.py until details arrive from the exchange.
+# They are indexed once (by base currency) into Instrument tuples holding pre-parsed Decimals.
+# instrument( symbol ) resolves the base currency of a symbol by the longest known prefix.
+# So 'LINKUSD' resolves to LINK (not LIN), 'PAXGUSD' to PAXG and 'STORJUSD' to STORJ.
+# Lookups are cached per symbol and therefore cost O(1) on the order hot path.
+
+Instrument = namedtuple( 'Instrument', [ 'symbol', 'base', 'quote', 'tick', 'minimumquantity', 'minimumorder' ] )
+
+currencies = {
+    item['currency']: {
+        'tick': Decimal( item['tick'] ),
+        'minimumquantity': Decimal( [ row['minimumquantity'] for row in minimumquantities if row['currency'] == item['currency'] ][0] ),
+        'minimumorder': Decimal( [ row['minimumorder'] for row in minimumorders if row['currency'] == item['currency'] ][0] )
+    }
+    for item in ticksizes
+}
+
+basecurrencylengths = sorted( { len( currency ) for currency in currencies }, reverse = True )
+
+@lru_cache( maxsize = None )
+def instrument( symbol: str ) -> Instrument:
+
+    # Return the instrument (tick, minimum quantity and minimum order) of a symbol like 'BTCUSD'.
+    # Raises KeyError when the base currency of the symbol is not configured.
+    symbol = symbol.upper()
+    for length in basecurrencylengths:
+        base = symbol[:length]
+        if base in currencies and len( symbol ) > length:
+            return Instrument( symbol, base, symbol[length:], **currencies[ base ] )
+    raise KeyError( f'{symbol} has no configured base currency (add it to definer.ticksizes, minimumquantities and minimumorders).' )
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+#
+# library name: exporter.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: collect counters, gauges and histograms in process and expose them in the Prometheus text format.
+
+
+# Note:
+#
+# The bots only report through prose logs. The libraries now record metrics (messages received per stream, handler latency,
+# event loop lag, REST latency per endpoint, rate limit waits, reconnects and order state transitions) in a process wide registry.
+# An exporter thread serves them in the Prometheus text format on a local HTTP port or a Unix socket. Every request returns every metric.
+# Reference: https://prometheus.io/docs/instrumenting/exposition_formats/
+#
+# Metrics are disabled by default (definer.metricsenabled). Instrumented code checks exporter.enabled before timing or counting
+# anything, so a disabled exporter costs one attribute lookup per call site. Setting the GEMINI_METRICS_ADDRESS environment variable
+# enables them for one process (useful for the strategies/*.bash loops) without editing definer.
+#
+# Addresses are "host:port" for HTTP (port 0 picks a free port) or "unix:/path" for a Unix socket. {script} and {pid} are replaced,
+# so every bot process gets its own socket. The address actually served is logged. For example:
+#   - curl --unix-socket /tmp/frontrunningtrailingstop.12345.metrics http://localhost/metrics
+#
+# Execution:
+#   - import libraries.exporter as exporter
+#   - requests = exporter.counter( 'gemini_rest_requests_total', 'REST requests sent.', ( 'endpoint', ) )
+#   - if exporter.enabled: requests.inc( '/v1/order/new' )
+
+
+import os
+import time
+import atexit
+import asyncio
+import threading
+import socketserver
+
+from bisect import bisect_left
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from libraries.logger import logger as logger
+from libraries.logger import script as script
+
+import libraries.definer as definer
+
+# Enabled by definer (or by setting the GEMINI_METRICS_ADDRESS environment variable for this process).
+enabled = bool( definer.metricsenabled or os.environ.get( 'GEMINI_METRICS_ADDRESS' ) )
+address = os.environ.get( 'GEMINI_METRICS_ADDRESS' ) or definer.metricsaddress
+
+def escape( value ):
+    # Escape a label value for the text format.
+    return str( value ).replace( '\\', '\\\\' ).replace( '\n', '\\n' ).replace( '"', '\\"' )
+
+def labelset( labelnames, labels, extra = '' ):
+    # Render {name="value",...} (empty when there are no labels).
+    pairs = [ f'{name}="{escape( value )}"' for name, value in zip( labelnames, labels ) ]
+    if extra: pairs.append( extra )
+    return '{' + ','.join( pairs ) + '}' if pairs else ''
+
+class Counter:
+
+    # Class Description:
+    #     A monotonically increasing count per combination of label values (for example messages received per stream).
+    #
+    # Execution:
+    #   - counter = exporter.counter( 'gemini_reconnects_total', 'Websocket reconnections.', ( 'stream', ) )
+    #   - counter.inc( 'marketdata' )
+
+    kind = 'counter'
+
+    def __init__( self, name, description, labelnames = () ):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple( labelnames )
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc( self, *labels, amount = 1 ):
+        with self.lock: self.values[ labels ] = self.values.get( labels, 0 ) + amount
+
+    def render( self ):
+        with self.lock: values = list( self.values.items() )
+        return [ f'{self.name}{labelset( self.labelnames, labels )} {value}' for labels, value in values ]
+
+class Gauge( Counter ):
+
+    # Class Description:
+    #     A value that goes up and down per combination of label values (for example the latest event loop lag).
+    #
+    # Execution:
+    #   - gauge = exporter.gauge( 'gemini_watched_orders', 'Orders watched by the order events tracker.' )
+    #   - gauge.set( 3 )
+
+    kind = 'gauge'
+
+    def set( self, value, *labels ):
+        with self.lock: self.values[ labels ] = value
+
+class Histogram:
+
+    # Class Description:
+    #     Observations (in seconds) counted in cumulative buckets per combination of label values, with their sum and count.
+    #     The buckets are definer.metricsbuckets unless others are specified.
+    #
+    # Execution:
+    #   - histogram = exporter.histogram( 'gemini_rest_latency_seconds', 'REST request latency.', ( 'endpoint', ) )
+    #   - with histogram.time( '/v1/order/new' ): requester.post( '/v1/order/new', payload )
+
+    kind = 'histogram'
+
+    def __init__( self, name, description, labelnames = (), buckets = None ):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple( labelnames )
+        self.buckets = tuple( sorted( buckets or definer.metricsbuckets ) )
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe( self, value, *labels ):
+        with self.lock:
+            series = self.values.get( labels )
+            if series is None: series = self.values[ labels ] = [ [ 0 ] * len( self.buckets ), 0.0, 0 ]
+            index = bisect_left( self.buckets, value )
+            if index < len( self.buckets ): series[0][ index ] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time( self, *labels ):
+        # Context manager observing the seconds spent in the block.
+        return Timer( self, labels )
+
+    def render( self ):
+        with self.lock: values = [ ( labels, list( counts ), total, count ) for labels, ( counts, total, count ) in self.values.items() ]
+        lines = []
+        for labels, counts, total, count in values:
+            cumulative = 0
+            for bound, bucketcount in zip( self.buckets, counts ):
+                cumulative += bucketcount
+                upperbound = labelset( self.labelnames, labels, f'le="{bound:g}"' )
+                lines.append( f'{self.name}_bucket{upperbound} {cumulative}' )
+            upperbound = labelset( self.labelnames, labels, 'le="+Inf"' )
+            lines.append( f'{self.name}_bucket{upperbound} {count}' )
+            lines.append( f'{self.name}_sum{labelset( self.labelnames, labels )} {total:.9g}' )
+            lines.append( f'{self.name}_count{labelset( self.labelnames, labels )} {count}' )
+        return lines
+
+class Timer:
+
+    # Observe the time spent in a with block.
+
+    def __init__( self, histogram, labels ):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__( self ):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__( self, *exception ):
+        self.histogram.observe( time.perf_counter() - self.started, *self.labels )
+
+# Process wide registry (metric name -> metric).
+registry = {}
+registrylock = threading.Lock()
+
+def register( kind, name, description, labelnames, **options ):
+    # Return the metric registered under the name (registering it first).
+    with registrylock:
+        metric = registry.get( name )
+        if metric is None: metric = registry[ name ] = kind( name, description, labelnames, **options )
+        return metric
+
+def counter( name: str, description: str, labelnames: tuple = () ) -> Counter:
+    return register( Counter, name, description, labelnames )
+
+def gauge( name: str, description: str, labelnames: tuple = () ) -> Gauge:
+    return register( Gauge, name, description, labelnames )
+
+def histogram( name: str, description: str, labelnames: tuple = (), buckets: tuple = None ) -> Histogram:
+    return register( Histogram, name, description, labelnames, buckets = buckets )
+
+def render() -> str:
+    # Every metric in the Prometheus text format (version 0.0.4).
+    with registrylock: metrics = list( registry.values() )
+    lines = []
+    for metric in metrics:
+        lines.append( f'# HELP {metric.name} {metric.description}' )
+        lines.append( f'# TYPE {metric.name} {metric.kind}' )
+        lines.extend( metric.render() )
+    return '\n'.join( lines ) + '\n'
+
+# Metrics shared by the instrumented libraries.
+messages = counter( 'gemini_messages_total', 'Websocket messages received per stream and message type.', ( 'stream', 'type' ) )
+reconnects = counter( 'gemini_reconnects_total', 'Websocket connections (re)established per stream after the first.', ( 'stream', ) )
+handlerlatency = histogram( 'gemini_handler_latency_seconds', 'Time spent in websocket message handlers.', ( 'stream', 'handler' ) )
+looplag = histogram( 'gemini_event_loop_lag_seconds', 'Delay of asyncio event loop callbacks beyond their schedule.' )
+restlatency = histogram( 'gemini_rest_latency_seconds', 'REST request round trip time per endpoint.', ( 'endpoint', 'method' ) )
+restresponses = counter( 'gemini_rest_responses_total', 'REST responses per endpoint and HTTP status.', ( 'endpoint', 'status' ) )
+ratelimitwaits = histogram( 'gemini_rate_limit_wait_seconds', 'Time requests waited for a rate limiter token per bucket.', ( 'bucket', ) )
+ratelimitpenalties = counter( 'gemini_rate_limit_penalties_total', 'HTTP 429 responses (rate limiter buckets blocked) per bucket.', ( 'bucket', ) )
+watchers = gauge( 'gemini_watchers', 'Watchers registered per stream (price monitors on marketdata, order validators on order events).', ( 'stream', ) )
+ordertransitions = counter( 'gemini_order_transitions_total', 'Order state transitions (previous event type to event type).', ( 'previous', 'type' ) )
+
+class Metricshandler( BaseHTTPRequestHandler ):
+
+    # Serve the registry on every GET.
+
+    def do_GET( self ):
+        body = render().encode()
+        self.send_response( 200 )
+        self.send_header( 'Content-Type', 'text/plain; version=0.0.4; charset=utf-8' )
+        self.send_header( 'Content-Length', str( len( body ) ) )
+        self.end_headers()
+        self.wfile.write( body )
+
+    def address_string( self ):
+        # Unix socket clients have no address.
+        return str( self.client_address[0] ) if self.client_address else 'unix'
+
+    def log_message( self, format, *args ):
+        logger.debug( f'Metrics request from {self.address_string()}: {format % args}' )
+
+class Httpmetricsserver( ThreadingHTTPServer ):
+    daemon_threads = True
+
+    def server_bind( self ):
+        # Skip HTTPServer's reverse DNS lookup of the host (it can stall startup). The name is only informational.
+        socketserver.TCPServer.server_bind( self )
+        self.server_name, self.server_port = self.server_address[:2]
+
+class Unixmetricsserver( socketserver.ThreadingMixIn, socketserver.UnixStreamServer ):
+    daemon_threads = True
+
+    def get_request( self ):
+        # Unix stream sockets report an empty client address. BaseHTTPRequestHandler expects a tuple.
+        request, _ = super().get_request()
+        return request, ( 'unix', 0 )
+
+server = None
+served = None
+
+def serve(
+        location: str = None
+    ) -> str:
+
+    # Function Description:
+    #  1. Start serving the metrics from a background (daemon) thread on "host:port" or "unix:/path" (definer.metricsaddress by default).
+    #  2. Return the address served (None when it could not be bound: metrics are still recorded).
+    global server, served
+    if server is not None: return served
+    location = ( location or address ).format( script = script[0], pid = os.getpid() )
+    try:
+        if location.startswith( 'unix:' ):
+            path = location[ len( 'unix:' ): ]
+            if os.path.exists( path ): os.remove( path )
+            server = Unixmetricsserver( path, Metricshandler )
+            atexit.register( lambda: os.path.exists( path ) and os.remove( path ) )
+            location = f'unix:{path}'
+        else:
+            host, _, port = location.rpartition( ':' )
+            server = Httpmetricsserver( ( host or '127.0.0.1', int( port ) ), Metricshandler )
+            location = f'{server.server_address[0]}:{server.server_address[1]}'
+    except ( OSError, ValueError ) as e:
+        logger.warning( f'Unable to serve metrics on {location}: {e}' )
+        return None
+    threading.Thread( target = server.serve_forever, name = 'metrics-exporter', daemon = True ).start()
+    logger.info( f'Serving metrics on {location}.' )
+    served = location
+    return served
+
+# Event loops whose lag is being watched (and the task measuring it, referenced so it is not garbage collected).
+watchedloops = {}
+
+def watchloop() -> None:
+
+    # Measure the lag of the running event loop (once per loop, in a background task) when metrics are enabled.
+    # Call from any coroutine. The task sleeps definer.metricslaginterval seconds and records how much later than that it woke up.
+    if not enabled: return
+    loop = asyncio.get_running_loop()
+    if loop in watchedloops: return
+    async def measure():
+        try:
+            while True:
+                started = loop.time()
+                await asyncio.sleep( definer.metricslaginterval )
+                looplag.observe( max( 0.0, loop.time() - started - definer.metricslaginterval ) )
+        finally: watchedloops.pop( loop, None )
+    watchedloops[ loop ] = loop.create_task( measure() )
+
+# Start serving when enabled.
+if enabled: serve()
@@ -6,18 +6,17 @@
 # library purpose: bid/ask one tick above/below the best bid/ask offer.
 
 
-import requests
 import ssl
 import json
-import datetime
-import time
 
 from decimal import Decimal
 
 from libraries.logger import logger as logger
 
 import libraries.definer as definer
-import libraries.authenticator as authenticator
+import libraries.requester as requester
+import libraries.cataloguer as cataloguer
+import libraries.bookkeeper as bookkeeper
 
 def bidorder(
         pair: str,
@@ -25,20 +24,14 @@ def bidorder(
     ) -> None:
 
     # Determine tick size.
-    list = definer.ticksizes
-    item = [ item['tick'] for item in list if item['currency'] == pair[:3] ]
-    tick = Decimal( item[0] )
+    tick = cataloguer.instrument( pair ).tick
 
     # Determine quantity size.
-    list = definer.minimumquantities
-    item = [ item['minimumquantity'] for item in list if item['currency'] == pair[:3] ]
-    bump = Decimal( item[0] )
+    bump = cataloguer.instrument( pair ).minimumquantity
 
-    # Get the highest bid in the orderbook.
+    # Get the highest bid in the orderbook (from memory when bookkeeper maintains the orderbook).
     # Make an offer that's one tick better.
-    endpoint = '/v1/pubticker/' + pair
-    response = requests.get( definer.restserver + endpoint )
-    bidprice = Decimal( response.json()['bid'] )
+    bidprice = bookkeeper.bestbid( pair )
     offering = str( Decimal( bidprice + tick ).quantize( tick ) )
     quantity = str( Decimal( size ).quantize( bump ) )
 
@@ -50,10 +43,8 @@ def bidorder(
     # Construct buy order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': quantity,
         'price': offering,
@@ -61,10 +52,7 @@ def bidorder(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
 
@@ -81,21 +69,15 @@ def quotabid(
     notional = Decimal(cash) / Decimal( 1 + fraction )
 
     # Determine tick size.
-    list = definer.ticksizes
-    item = [ item['tick'] for item in list if item['currency'] == pair[:3] ]
-    tick = Decimal( item[0] )
+    tick = cataloguer.instrument( pair ).tick
 
     # Determine quantity size.
-    list = definer.minimumquantities
-    item = [ item['minimumquantity'] for item in list if item['currency'] == pair[:3] ]
-    bump = Decimal( item[0] )
+    bump = cataloguer.instrument( pair ).minimumquantity
 
-    # Get the highest bid in the orderbook.
+    # Get the highest bid in the orderbook (from memory when bookkeeper maintains the orderbook).
     # Make an offer that's one tick better.
     # Then determine the bid order size.
-    endpoint = '/v1/pubticker/' + pair
-    response = requests.get( definer.restserver + endpoint )
-    bidprice = Decimal( response.json()['bid'] )
+    bidprice = bookkeeper.bestbid( pair )
     offering = str( Decimal( bidprice + tick ).quantize( tick ) )
     quantity = str( Decimal( notional / Decimal(offering) ).quantize( bump ) )
 
@@ -107,10 +89,8 @@ def quotabid(
     # Construct buy order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': quantity,
         'price': offering,
@@ -118,10 +98,7 @@ def quotabid(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
 
@@ -131,20 +108,14 @@ def askorder(
     ) -> None:
 
     # Determine tick size.
-    list = definer.ticksizes
-    item = [ item['tick'] for item in list if item['currency'] == pair[:3] ]
-    tick = Decimal( item[0] )
+    tick = cataloguer.instrument( pair ).tick
 
     # Determine quantity size.
-    list = definer.minimumquantities
-    item = [ item['minimumquantity'] for item in list if item['currency'] == pair[:3] ]
-    bump = Decimal( item[0] )
+    bump = cataloguer.instrument( pair ).minimumquantity
 
-    # Get the lowest ask in the orderbook.
+    # Get the lowest ask in the orderbook (from memory when bookkeeper maintains the orderbook).
     # Make an offer that's one tick better.
-    endpoint = '/v1/pubticker/' + pair
-    response = requests.get( definer.restserver + endpoint )
-    askprice = Decimal( response.json()['ask'] )
+    askprice = bookkeeper.bestask( pair )
     offering = str( Decimal( askprice - tick ).quantize( tick ) )
     quantity = str( Decimal( size ).quantize( bump ) )
 
@@ -156,10 +127,8 @@ def askorder(
     # Construct buy order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': quantity,
         'price': offering,
@@ -167,10 +136,7 @@ def askorder(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
 
@@ -187,21 +153,15 @@ def quotaask(
     notional = Decimal(cash) / Decimal( 1 + fraction )
 
     # Determine tick size.
-    list = definer.ticksizes
-    item = [ item['tick'] for item in list if item['currency'] == pair[:3] ]
-    tick = Decimal( item[0] )
+    tick = cataloguer.instrument( pair ).tick
 
     # Determine quantity size.
-    list = definer.minimumquantities
-    item = [ item['minimumquantity'] for item in list if item['currency'] == pair[:3] ]
-    bump = Decimal( item[0] )
+    bump = cataloguer.instrument( pair ).minimumquantity
 
-    # Get the lowest ask in the orderbook.
+    # Get the lowest ask in the orderbook (from memory when bookkeeper maintains the orderbook).
     # Make an offer that's one tick better.
     # Then determine the ask order size.
-    endpoint = '/v1/pubticker/' + pair
-    response = requests.get( definer.restserver + endpoint )
-    askprice = Decimal( response.json()['ask'] )
+    askprice = bookkeeper.bestask( pair )
     offering = str( Decimal( askprice - tick ).quantize( tick ) )
     quantity = str( Decimal( notional / Decimal(offering) ).quantize( bump ) )
 
@@ -213,10 +173,8 @@ def quotaask(
     # Construct buy order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': quantity,
         'price': offering,
@@ -224,9 +182,6 @@ def quotaask(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
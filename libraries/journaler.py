@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+#
+# library name: journaler.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: append structured trading events (trades, L2 snapshots, orders, fills and cancels) to a journal for analysis.
+
+
+# Note:
+#
+# The logs are prose written for people. The journal is written for programs: one record per event in a compact format.
+#  - msgpack (pip3 install msgpack) when installed: <script>.journal.msgpack
+#  - JSON Lines otherwise: <script>.journal.jsonl
+# Journals are written next to the logs (logger.logdirectory) unless definer.journaldirectory says otherwise.
+#
+# Every record is a dictionary with the time it was recorded in nanoseconds ('time') and its kind ('kind'):
+#  - 'trade' (multiplexer.py): symbol, price, quantity, side, timestamp and eventid.
+#  - 'book' (bookkeeper.py): symbol and the top definer.journaldepth bids and asks whenever an orderbook snapshot is loaded.
+#  - 'order' (requester.py and asyncordermanager.py): endpoint and the response to order submissions and cancellations.
+#  - 'orderevent' (ordertracker.py): fill, cancelled, rejected and closed order events.
+# Decimals are written as strings.
+#
+# Recording only appends to an in-memory queue. A background thread serializes the records, writes them in batches
+# and calls fsync every definer.journalfsync seconds (and when the process exits). Set definer.journaling to False to disable it.
+#
+# The queue is bounded (definer.journalqueuesize). When the writer falls that far behind new records are dropped instead of
+# making callers wait. The writer reports the number dropped in a warning and in a 'dropped' record (with its 'count').
+# Journals are rotated when they exceed definer.journalmaxbytes. Rotated segments are renamed with a timestamp
+# (for example trademonitor.journal.jsonl.20221018-235959-000000), gzip compressed and pruned to definer.journalbackups archives
+# by the log compressor thread (logger.py). readjournal() reads compressed segments too.
+# Bots running the same script share its journal. Like the logs (logger.Sharedfile), every batch is written and flushed
+# under a shared lock and the journal is reopened once another process has rotated it. Rotation holds the exclusive lock.
+
+
+import os
+import gzip
+import json
+import mmap
+import time
+import queue
+import atexit
+import datetime
+import threading
+import __main__
+
+from decimal import Decimal
+
+import libraries.definer as definer
+
+try: import msgpack
+except ImportError: msgpack = None
+
+def encodable( value ):
+    # Convert values the serializers cannot encode (Decimals, tuples of Decimals and structs).
+    if isinstance( value, Decimal ): return str( value )
+    if isinstance( value, ( list, tuple ) ): return [ encodable( item ) for item in value ]
+    if isinstance( value, dict ): return { key: encodable( item ) for key, item in value.items() }
+    return value
+
+class Journal:
+
+    # Class Description:
+    #  1. Accept records from any thread without blocking (record()). Drop and count them when the queue is full.
+    #  2. Serialize and append them to the journal file in a background (daemon) thread.
+    #  3. Flush and fsync the file periodically and when the process exits.
+    #  4. Rotate the file when it exceeds maxbytes (keeping the newest backupcount compressed segments).
+    #
+    # Execution:
+    #   - from libraries.journaler import journal
+    #   - journal.record( 'trade', symbol = 'BTCUSD', price = Decimal( '20000.00' ) )
+
+    def __init__( self, path, fsyncinterval = None, maxbytes = None, backupcount = None, queuesize = None ):
+        self.path = path
+        self.fsyncinterval = float( fsyncinterval or definer.journalfsync )
+        self.maxbytes = maxbytes or definer.journalmaxbytes
+        self.backupcount = definer.journalbackups if backupcount is None else backupcount
+        self.format = 'msgpack' if path.endswith( '.msgpack' ) else 'jsonl'
+        self.dropped = 0
+        self.__records = queue.Queue( maxsize = queuesize or definer.journalqueuesize )
+        self.__thread = None
+        self.__lock = threading.Lock()
+
+    def record( self, kind, **fields ):
+        # Enqueue a record (the calling thread does no serialization and no I/O).
+        fields['time'] = time.time_ns()
+        fields['kind'] = kind
+        try: self.__records.put_nowait( fields )
+        except queue.Full: self.dropped += 1
+        if self.__thread is None: self.__start()
+
+    def flush( self ):
+        # Wait until every record enqueued so far is written and synced to disk.
+        if self.__thread is None: return
+        done = threading.Event()
+        try: self.__records.put( done, timeout = 10 )
+        except queue.Full: return
+        done.wait( timeout = 10 )
+
+    def __start( self ):
+        with self.__lock:
+            if self.__thread is not None: return
+            self.__thread = threading.Thread( target = self.__run, name = 'journal-writer', daemon = True )
+            self.__thread.start()
+            atexit.register( self.flush )
+
+    def __serialize( self, record ):
+        record = encodable( record )
+        if self.format == 'msgpack': return msgpack.packb( record )
+        return ( json.dumps( record, separators = ( ',', ':' ) ) + '\n' ).encode()
+
+    def __rotate( self, journalfile, shared ):
+        # Close the full journal, rename it with a timestamp (unless another process did), queue it for compression and start a new one.
+        from libraries.logger import compress
+        os.fsync( journalfile.fileno() )
+        journalfile.close()
+        with shared.locked( exclusive = True ):
+            try: size = os.stat( self.path ).st_size
+            except FileNotFoundError: size = 0
+            if size >= self.maxbytes:
+                segment = f'{self.path}.{datetime.datetime.now():%Y%m%d-%H%M%S-%f}'
+                os.rename( self.path, segment )
+                compress( segment, self.path, self.backupcount )
+        return open( self.path, 'ab', buffering = 1 << 16 )
+
+    def __run( self ):
+        from libraries.logger import Sharedfile
+        os.makedirs( os.path.dirname( self.path ) or '.', exist_ok = True )
+        shared = Sharedfile( self.path )
+        journalfile = open( self.path, 'ab', buffering = 1 << 16 )
+        synced = time.monotonic()
+        reported = 0
+        while True:
+            # Block for the first record then drain whatever else is waiting (one write per batch).
+            try: batch = [ self.__records.get( timeout = self.fsyncinterval ) ]
+            except queue.Empty: batch = []
+            while len( batch ) < 4096:
+                try: batch.append( self.__records.get_nowait() )
+                except queue.Empty: break
+            if self.dropped != reported:
+                from libraries.logger import logger
+                logger.warning( f'Dropped {self.dropped - reported} journal records (the journal queue was full).' )
+                batch.append( { 'time': time.time_ns(), 'kind': 'dropped', 'count': self.dropped - reported } )
+                reported = self.dropped
+            waiters = [ item for item in batch if isinstance( item, threading.Event ) ]
+            chunks = [ self.__serialize( item ) for item in batch if not isinstance( item, threading.Event ) ]
+            try:
+                if chunks:
+                    with shared.locked():
+                        if shared.rotated( journalfile ):
+                            journalfile.close()
+                            journalfile = open( self.path, 'ab', buffering = 1 << 16 )
+                        journalfile.write( b''.join( chunks ) )
+                        journalfile.flush()
+                if waiters or ( chunks and time.monotonic() - synced >= self.fsyncinterval ):
+                    os.fsync( journalfile.fileno() )
+                    synced = time.monotonic()
+                if os.fstat( journalfile.fileno() ).st_size >= self.maxbytes: journalfile = self.__rotate( journalfile, shared )
+            except OSError as e:
+                from libraries.logger import logger
+                logger.error( f'Unable to write the journal {self.path}: {e}' )
+                if journalfile.closed: journalfile = open( self.path, 'ab', buffering = 1 << 16 )
+            for waiter in waiters: waiter.set()
+
+def journalpath(
+        directory: str = None
+    ) -> str:
+
+    # Journal named after the script (like the logs) in the directory configured.
+    from libraries.logger import logdirectory
+    script = os.path.splitext( os.path.basename( getattr( __main__, '__file__', 'interactive' ) ) )[0]
+    extension = 'msgpack' if msgpack is not None else 'jsonl'
+    return os.path.join( directory or definer.journaldirectory or logdirectory, f'{script}.journal.{extension}' )
+
+def readjournal(
+        path: str,
+        kinds: tuple = None
+    ) -> object:
+
+    # Function Description:
+    #  1. Memory map the journal (the operating system pages it in as it is read). Rotated segments (.gz) are decompressed instead.
+    #  2. Decode the records one at a time (msgpack or JSON Lines, by file extension).
+    #  3. Yield the records (only those of the kinds specified, when specified).
+    #
+    # Execution:
+    #   - from libraries.journaler import readjournal
+    #   - fills = [ record for record in readjournal( '/tmp/frontrunningtrailingstop.journal.jsonl', kinds = ( 'orderevent', ) ) ]
+
+    if path.endswith( '.gz' ):
+        with gzip.open( path, 'rb' ) as journalfile: yield from decoderecords( journalfile, '.journal.msgpack' in path, kinds )
+        return
+    with open( path, 'rb' ) as journalfile:
+        if os.fstat( journalfile.fileno() ).st_size == 0: return
+        with mmap.mmap( journalfile.fileno(), 0, access = mmap.ACCESS_READ ) as mapped: yield from decoderecords( mapped, path.endswith( '.msgpack' ), kinds )
+
+def decoderecords( source, packed, kinds ):
+    # Decode msgpack records or JSON Lines from a file like object (keeping those of the kinds specified).
+    if packed:
+        if msgpack is None: raise ImportError( 'msgpack is not installed (pip3 install msgpack).' )
+        records = msgpack.Unpacker( source, raw = False )
+    else:
+        from libraries.decoder import loads
+        records = ( loads( line ) for line in iter( source.readline, b'' ) if line.strip() )
+    for record in records:
+        if kinds is None or record.get( 'kind' ) in kinds: yield record
+
+class Disabledjournal:
+
+    # Stand-in used when definer.journaling is False (recording does nothing).
+    def record( self, kind, **fields ): pass
+    def flush( self ): pass
+
+# Shared (process wide) journal.
+journal = Journal( journalpath() ) if definer.journaling else Disabledjournal()
@@ -1,18 +1,16 @@
 #!/usr/bin/env python3
 
 
-import requests
 import ssl
 import json
-import datetime
-import time
 
 from decimal import Decimal
 
 from libraries.logger import logger as logger
 
 import libraries.definer as definer
-import libraries.authenticator as authenticator
+import libraries.requester as requester
+import libraries.cataloguer as cataloguer
 
 def bidorder(
         pair: str,
@@ -23,10 +21,8 @@ def bidorder(
     # Construct buy order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': size,
         'price': str(last),
@@ -34,10 +30,7 @@ def bidorder(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
 
@@ -55,9 +48,7 @@ def quotabid(
     notional = Decimal(cash) / Decimal( 1 + fraction )
 
     # Determine minimum order size (let's call it a tock).
-    list = definer.minimumorders
-    item = [ item['minimumorder'] for item in list if item['currency'] == pair[:3] ]
-    tock = Decimal( item[0] )
+    tock = cataloguer.instrument( pair ).minimumorder
 
     # Determine bid size.
     quantity = str( Decimal( notional / Decimal(cost) ).quantize( tock ) )
@@ -70,10 +61,8 @@ def quotabid(
     # Construct buy order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': quantity,
         'price': bidprice,
@@ -81,10 +70,7 @@ def quotabid(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
 
@@ -97,10 +83,8 @@ def askorder(
     # Construct buy order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': size,
         'price': str(last),
@@ -108,10 +92,7 @@ def askorder(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
 
@@ -129,9 +110,7 @@ def quotaask(
     notional = Decimal(cash) / Decimal( 1 + fraction )
 
     # Determine minimum order size (let's call it a tock).
-    list = definer.minimumorders
-    item = [ item['minimumorder'] for item in list if item['currency'] == pair[:3] ]
-    tock = Decimal( item[0] )
+    tock = cataloguer.instrument( pair ).minimumorder
 
     # Determine bid size.
     quantity = str( Decimal( notional / Decimal(cost) ).quantize( tock ) )
@@ -144,10 +123,8 @@ def quotaask(
     # Construct sell order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': quantity,
         'price': askprice,
@@ -155,9 +132,6 @@ def quotaask(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
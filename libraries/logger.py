@@ -5,22 +5,192 @@
 # library created: 20220819
 # library purpose: write to logfile.
 
+
+# Note:
+#
+# Handlers used to be attached to "tradelogger" directly. So every logger call made in a websocket callback
+# formatted the record and wrote to the console and two files on the thread processing messages.
+# Now the logger only has a queue handler. Callers just enqueue records and a background thread (the queue listener)
+# formats them and does the console and disk I/O. The queue is bounded (definer.logqueuesize). When it is full,
+# DEBUG records are dropped (and counted) instead of making callers wait. Records of every other level always wait for space.
+#
+# The .out and .err files are written to definer.logdirectory (or the directory in the GEMINI_LOG_DIRECTORY environment variable).
+# They are rotated when they exceed definer.logmaxbytes and when the day changes. Rotated segments are renamed with a timestamp
+# (for example trademonitor.out.20221018-235959-000000), gzip compressed by a background thread and pruned to definer.logbackups archives.
+#
+# Several bots may run the same script (and so share its .out and .err files). Writers hold a shared lock (a hidden
+# .<name>.lock file next to the log) and reopen the log when another process has rotated it. Rotation holds the exclusive
+# lock, so no process is still writing to a segment once it is renamed. A segment is compressed by whichever process
+# locks it first (for instance when leftover segments are compressed at startup).
+
+
 import os
+import glob
+import gzip
+import time
+import queue
+import atexit
+import shutil
+import fcntl
+import datetime
+import threading
 import __main__
 import logging
 
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import libraries.definer as definer
+
+class Boundedqueuehandler( QueueHandler ):
+
+    # Class Description:
+    #  1. Enqueue records without formatting them (only the message arguments are merged).
+    #  2. Drop DEBUG records when the queue is full. Wait for space for records of other levels.
+    #  3. Report how many DEBUG records were dropped (at most once every ten seconds) once the queue has room again.
+
+    def __init__( self, recordqueue ):
+        super().__init__( recordqueue )
+        self.dropped = 0
+        self.reported = 0.0
+
+    def prepare( self, record ):
+        # Records with exception information are formatted here (tracebacks cannot cross threads safely).
+        if record.exc_info: return super().prepare( record )
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue( self, record ):
+        if self.dropped and time.monotonic() - self.reported >= 10:
+            self.reported = time.monotonic()
+            try:
+                self.queue.put_nowait( logging.makeLogRecord( { 'name': record.name, 'levelno': logging.WARNING, 'levelname': 'WARNING', 'msg': f'Dropped {self.dropped} DEBUG log records (the log queue was full).' } ) )
+                self.dropped = 0
+            except queue.Full: pass
+        if record.levelno <= logging.DEBUG:
+            try: self.queue.put_nowait( record )
+            except queue.Full: self.dropped += 1
+        else: self.queue.put( record )
+
+class Sharedfile:
+
+    # Class Description:
+    #     Coordinate the processes appending to (and rotating) one file through a lock file next to it.
+    #
+    # Execution:
+    #   - shared = Sharedfile( '/tmp/trademonitor.out' )
+    #   - with shared.locked(): write (reopening the file first when shared.rotated( stream ))
+    #   - with shared.locked( exclusive = True ): rename the file
+
+    def __init__( self, path ):
+        self.path = path
+        self.lockpath = os.path.join( os.path.dirname( path ), f'.{os.path.basename( path )}.lock' )
+        self.descriptor = None
+
+    @contextmanager
+    def locked( self, exclusive = False ):
+        if self.descriptor is None: self.descriptor = os.open( self.lockpath, os.O_RDWR | os.O_CREAT, 0o644 )
+        fcntl.flock( self.descriptor, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH )
+        try: yield
+        finally: fcntl.flock( self.descriptor, fcntl.LOCK_UN )
+
+    def rotated( self, stream ):
+        # True when the path no longer names the file open in the stream (another process renamed it).
+        try: return os.stat( self.path ).st_ino != os.fstat( stream.fileno() ).st_ino
+        except FileNotFoundError: return True
+
+def modified( path ):
+    # Day a file was last written to (today when it does not exist).
+    try: return datetime.date.fromtimestamp( os.stat( path ).st_mtime )
+    except FileNotFoundError: return datetime.date.today()
+
+class Rotatingfilehandler( RotatingFileHandler ):
+
+    # Class Description:
+    #  1. Roll the file over when it exceeds maxbytes or when the day changes (whichever comes first).
+    #  2. Rename the rolled over segment with a timestamp and hand it to the compressor thread.
+    #  3. Keep the newest backupcount archives of the file.
+    #  4. Share the file with other processes: write under a shared lock (reopening the file once another process rotated it)
+    #     and roll over under the exclusive lock (only when the file still needs it).
+
+    def __init__( self, filename, maxbytes, backupcount ):
+        super().__init__( filename, maxBytes = maxbytes, backupCount = backupcount, delay = True )
+        self.shared = Sharedfile( self.baseFilename )
+        self.day = modified( self.baseFilename )
+
+    def shouldRollover( self, record ):
+        if datetime.date.today() != self.day: return True
+        if self.maxBytes <= 0: return False
+        try: return os.stat( self.baseFilename ).st_size >= self.maxBytes
+        except FileNotFoundError: return False
+
+    def doRollover( self ):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        with self.shared.locked( exclusive = True ):
+            # Another process may have rolled the file over already. Then only reopen it.
+            try: size = os.stat( self.baseFilename ).st_size
+            except FileNotFoundError: size = 0
+            if size and ( 0 < self.maxBytes <= size or modified( self.baseFilename ) < datetime.date.today() ):
+                segment = f'{self.baseFilename}.{datetime.datetime.now():%Y%m%d-%H%M%S-%f}'
+                os.rename( self.baseFilename, segment )
+                compress( segment, self.baseFilename, self.backupCount )
+        self.day = datetime.date.today()
+
+    def emit( self, record ):
+        try:
+            if self.shouldRollover( record ): self.doRollover()
+            with self.shared.locked():
+                if self.stream is not None and self.shared.rotated( self.stream ):
+                    self.stream.close()
+                    self.stream = None
+                logging.FileHandler.emit( self, record )
+        except Exception: self.handleError( record )
+
+# Background compression of rotated segments
+compressions = queue.Queue()
+compressor = None
+
+def compress( segment, basefilename, backupcount ):
+    global compressor
+    if compressor is None:
+        compressor = threading.Thread( target = compressforever, name = 'log-compressor', daemon = True )
+        compressor.start()
+    compressions.put( ( segment, basefilename, backupcount ) )
+
+def compressforever():
+    while True:
+        segment, basefilename, backupcount = compressions.get()
+        try:
+            # Skip segments another process is compressing (or has compressed and removed already).
+            with open( segment, 'rb' ) as source:
+                fcntl.flock( source.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB )
+                if os.fstat( source.fileno() ).st_nlink:
+                    with gzip.open( f'{segment}.gz', 'wb' ) as archive: shutil.copyfileobj( source, archive )
+                    os.remove( segment )
+            archives = sorted( glob.glob( f'{glob.escape( basefilename )}.*.gz' ) )
+            for archive in archives[ : max( len( archives ) - backupcount, 0 ) ]:
+                try: os.remove( archive )
+                except FileNotFoundError: pass
+        except OSError: pass
+        finally: compressions.task_done()
+
 # Create custom logger
 logger = logging.getLogger('tradelogger')
 logger.setLevel(logging.DEBUG)
 ospath = os.path.basename(__main__.__file__)
 script = os.path.splitext(ospath)
-outlog = '/tmp/' + script[0] + '.out'
-errlog = '/tmp/' + script[0] + '.err'
+logdirectory = os.environ.get('GEMINI_LOG_DIRECTORY', definer.logdirectory)
+os.makedirs(logdirectory, exist_ok=True)
+outlog = os.path.join(logdirectory, script[0] + '.out')
+errlog = os.path.join(logdirectory, script[0] + '.err')
 
 # Create console and file handlers
 consolehandler = logging.StreamHandler()
-fileouthandler = logging.FileHandler(outlog)
-fileerrhandler = logging.FileHandler(errlog)
+fileouthandler = Rotatingfilehandler(outlog, definer.logmaxbytes, definer.logbackups)
+fileerrhandler = Rotatingfilehandler(errlog, definer.logmaxbytes, definer.logbackups)
 consolehandler.setLevel(logging.INFO)
 fileouthandler.setLevel(logging.DEBUG)
 fileerrhandler.setLevel(logging.WARNING)
@@ -33,10 +203,25 @@ consolehandler.setFormatter(consoleformat)
 fileouthandler.setFormatter(fileoutformat)
 fileerrhandler.setFormatter(fileerrformat)
 
-# Add handlers to the logger
-logger.addHandler(consolehandler)
-logger.addHandler(fileouthandler)
-logger.addHandler(fileerrhandler)
+# Compress segments left uncompressed by a previous process (for instance one that exited while compressing)
+for logfile in (outlog, errlog):
+    for segment in glob.glob(glob.escape(logfile) + '.*'):
+        if not segment.endswith('.gz'): compress(segment, logfile, definer.logbackups)
+
+# Route records through a bounded queue to a background listener that owns the handlers
+logqueue = queue.Queue(maxsize=definer.logqueuesize)
+queuehandler = Boundedqueuehandler(logqueue)
+listener = QueueListener(logqueue, consolehandler, fileouthandler, fileerrhandler, respect_handler_level=True)
+logger.addHandler(queuehandler)
+listener.start()
+
+# Report unreported drops and flush the queue when the script exits
+def stoplistener():
+    dropped, queuehandler.dropped = queuehandler.dropped, 0
+    if dropped: logger.warning(f'Dropped {dropped} DEBUG log records (the log queue was full).')
+    listener.stop()
+
+atexit.register(stoplistener)
 
 if __name__ == "__main__":
     from logger import logger
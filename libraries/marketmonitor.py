@@ -6,376 +6,307 @@
 # library purpose: continually monitor trade prices via Gemini's Websockets API until the exit threshold is breached.
 
 
-import ssl
-import json
-import websocket
+# Note:
+#
+# Every monitor's trade processing is built by a watcher factory (pricedecreasewatcher, askfallwatcher, ...).
+# The watcher is the callback the shared multiplexer calls for every trade. It never touches a socket, so benchmarks
+# (see handlerbenchmark.py) drive it directly with decoded trade events.
+
 
 from decimal import Decimal
 
 from libraries.logger import logger as logger
 from libraries.messenger import sendmessage as sendmessage
+from libraries.multiplexer import multiplexer as multiplexer
+from libraries.summarizer import Periodicsummary
 
-def pricedecrease(
+def pricedecreasewatcher(
         pair: str,
         exit: str
-    ) -> None:
+    ) -> object:
+
+    # Build the trade watcher of pricedecrease() (the multiplexer callback). It returns the event when the threshold is breached.
 
     # Cast as decimal.
     exit = Decimal( exit )
 
-    # Request trade data only.
-    urlrequest = "wss://api.gemini.com/v1/marketdata/" + pair.lower()
-    parameters = "?trades=true&heartbeat=true"
-    connection = urlrequest + parameters
+    # Describe a trade (for display only, so it is only built when the message is emitted).
+    def describe( event, pair=pair.upper(), exit=exit ) :
+        tradeprice = event[ 'price' ]
+        tradevalue = event[ 'amount' ]
+        inadequacy = Decimal( 100 * ( tradeprice - exit ) / exit )
+        tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
+        if event['makerSide'] == "ask" : takeraction = "increase"
+        if event['makerSide'] == "bid" : takeraction = "decrease"
+        infomessage = f'[{inadequacy:.2f}% off {exit:,.2f} {pair[3:]}] {tradeprice:,.2f} {pair[3:]} price taken to '
+        infomessage = infomessage + f'quickly {takeraction} {pair[:3]} hoard by {tradevalue:,.2f} {pair[3:]}. '
+        return infomessage
+
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    # Returning the event (rather than None) stops the watcher.
+    summary = Periodicsummary( pair, 'trade prices' )
+    def on_trade( event, pair=pair.upper(), exit=exit ) :
+        tradeprice = event[ 'price' ]
+        if summary.verbose : logger.info ( describe( event ) )
+        else : summary.record( tradeprice )
+        if exit.compare( tradeprice ) == 1 :
+            infomessage = f'{exit:,.2f} {pair[3:]} price level breached: {describe( event )}'
+            logger.info( infomessage )
+            sendmessage( infomessage )
+            return event
+    return on_trade
 
-    close_status_code = 'OK'
-    close_msg = f'{connection} connection closed.'
-    # Close connection arguments.
-    # Reference: https://pypi.org/project/websocket-client/#:~:text=ws%2C%20close_status_code%2C%20close_msg.
+def pricedecrease(
+        pair: str,
+        exit: str
+    ) -> None:
 
+    # Cast as decimal.
+    exit = Decimal( exit )
 
     # Introduce function.
     logger.info(f'Looping until the latest {pair[:3]} transaction price on Gemini drops below: {exit:,.2f} {pair[3:]}')
 
-    # Define websocket functions.
-    def on_open( ws ) : logger.debug( f'{ws} connection opened.' )
-    def on_close( ws, close_status_code, close_msg ) : logger.debug( 'connection closed.' )
-    def on_error( ws, errormessage ) : logger.error( f'{ws} connection error: {errormessage}' )
-    def on_message( ws, message, pair=pair.upper(), exit=exit ) : 
-
-        # Remove comment to debug with: logger.debug( message )
-        # Load update into a dictionary.
-        dictionary = json.loads( message )
-
-        # Display heartbeat
-        if dictionary[ 'type' ] == "heartbeat" : logger.debug ( f'Heartbeat: {dictionary[ "socket_sequence" ]}' )
-        else :
-            
-            # Define events array/list.
-            events = dictionary[ 'events' ]
-            if events == [] : 
-                logger.debug( f'No update events. Received: {message}  ' )
-            else:
-                # Verify the array of events is a list.
-                # Iterate through each event in the update.
-                if isinstance(events, list):
-                    for event in events:
-                        tradeprice = Decimal( event[ 'price' ] )
-                        tradevalue = Decimal( event[ 'amount' ] )
-                        inadequacy = Decimal( 100 * ( tradeprice - exit ) / exit )
-                        tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
-                        if event['makerSide'] == "ask" : takeraction = "increase"
-                        if event['makerSide'] == "bid" : takeraction = "decrease"
-                        infomessage = f'[{inadequacy:.2f}% off {exit:,.2f} {pair[3:]}] {tradeprice:,.2f} {pair[3:]} price taken to '
-                        infomessage = infomessage + f'quickly {takeraction} {pair[:3]} hoard by {tradevalue:,.2f} {pair[3:]}. '
-                        logger.info ( f'{infomessage}' )
-                        if exit.compare( tradeprice ) == 1 : 
-                            infomessage = f'{exit:,.2f} {pair[3:]} price level breached: {infomessage}'
-                            logger.info( infomessage )
-                            sendmessage( infomessage )
-                            ws.close()
-            
-    # Establish websocket connection.
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    on_trade = pricedecreasewatcher( pair, exit )
+
+    # Watch trades on the shared marketdata connection.
     # Connection is public. Public connection require neither headers nor authentication.
-    logger.info ( f'Establishing websocket connection to monitor {pair[:3]} prices in {pair[3:]} terms.' )
-    ws = websocket.WebSocketApp( connection,
-                                 on_open = on_open,
-                                 on_close = on_close,
-                                 on_error = on_error,
-                                 on_message = on_message )
-    ws.run_forever(sslopt={'cert_reqs': ssl.CERT_NONE})
+    logger.info ( f'Watching the shared websocket connection to monitor {pair[:3]} prices in {pair[3:]} terms.' )
+    return multiplexer.blockuntil( pair, ontrade = on_trade )
 
-def askfall(
+def askfallwatcher(
         pair: str,
         exit: str
-    ) -> None:
+    ) -> object:
+
+    # Build the trade watcher of askfall() (the multiplexer callback). It returns the event when the threshold is breached.
 
     # Cast as decimal.
     exit = Decimal( exit )
 
-    # Request trade data only.
-    urlrequest = "wss://api.gemini.com/v1/marketdata/" + pair.lower()
-    parameters = "?trades=true&heartbeat=true"
-    connection = urlrequest + parameters
+    # Describe a trade (for display only, so it is only built when the message is emitted).
+    def describe( event, pair=pair.upper(), exit=exit ) :
+        tradeprice = event[ 'price' ]
+        tradevalue = event[ 'amount' ]
+        inadequacy = Decimal( 100 * ( tradeprice - exit ) / exit )
+        tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
+        if event['makerSide'] == "ask" : takeraction = "increase"
+        if event['makerSide'] == "bid" : takeraction = "decrease"
+        infomessage = f'[{inadequacy:.2f}% off {exit:,.2f} {pair[3:]}] {tradeprice:,.2f} {pair[3:]} price taken to '
+        infomessage = infomessage + f'quickly {takeraction} {pair[:3]} hoard by {tradevalue:,.2f} {pair[3:]}. '
+        return infomessage
+
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    # Returning the event (rather than None) stops the watcher.
+    summary = Periodicsummary( pair, 'trade prices' )
+    def on_trade( event, pair=pair.upper(), exit=exit ) :
+        tradeprice = event[ 'price' ]
+        if summary.verbose : logger.info ( describe( event ) )
+        else : summary.record( tradeprice )
+        if event['makerSide'] == "ask" :
+            if exit.compare( tradeprice ) == 1 :
+                infomessage = f'{exit:,.2f} {pair[3:]} price level breached: {describe( event )}'
+                logger.info( infomessage )
+                sendmessage( infomessage )
+                return event
+    return on_trade
 
-    close_status_code = 'OK'
-    close_msg = f'{connection} connection closed.'
-    # Close connection arguments.
-    # Reference: https://pypi.org/project/websocket-client/#:~:text=ws%2C%20close_status_code%2C%20close_msg.
+def askfall(
+        pair: str,
+        exit: str
+    ) -> None:
 
+    # Cast as decimal.
+    exit = Decimal( exit )
 
     # Introduce function.
     logger.info(f'Looping until the latest {pair[:3]} transaction price on Gemini drops below: {exit:,.2f} {pair[3:]}')
 
-    # Define websocket functions.
-    def on_open( ws ) : logger.debug( f'{ws} connection opened.' )
-    def on_close( ws, close_status_code, close_msg ) : logger.debug( 'connection closed.' )
-    def on_error( ws, errormessage ) : logger.error( f'{ws} connection error: {errormessage}' )
-    def on_message( ws, message, pair=pair.upper(), exit=exit ) : 
-        
-        # Remove comment to debug with: logger.debug( message )
-        # Load update into a dictionary.
-        dictionary = json.loads( message )
-
-        # Display heartbeat
-        if dictionary[ 'type' ] == "heartbeat" : logger.debug ( f'Heartbeat: {dictionary[ "socket_sequence" ]}' )
-        else :
-
-            # Define events array/list.
-            events = dictionary[ 'events' ]
-            if events == [] : 
-                logger.debug( f'No update events. Received: {message}  ' )
-            else:
-                # Verify the array of events is a list.
-                # Iterate through each event in the update.
-                if isinstance(events, list):
-                    for event in events:
-                        tradeprice = Decimal( event[ 'price' ] )
-                        tradevalue = Decimal( event[ 'amount' ] )
-                        inadequacy = Decimal( 100 * ( tradeprice - exit ) / exit )
-                        tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
-                        if event['makerSide'] == "ask" : takeraction = "increase"
-                        if event['makerSide'] == "bid" : takeraction = "decrease"
-                        infomessage = f'[{inadequacy:.2f}% off {exit:,.2f} {pair[3:]}] {tradeprice:,.2f} {pair[3:]} price taken to '
-                        infomessage = infomessage + f'quickly {takeraction} {pair[:3]} hoard by {tradevalue:,.2f} {pair[3:]}. '
-                        logger.info ( f'{infomessage}' )
-                        if event['makerSide'] == "ask" :
-                            if exit.compare( tradeprice ) == 1 : 
-                                infomessage = f'{exit:,.2f} {pair[3:]} price level breached: {infomessage}'
-                                logger.info( infomessage )
-                                sendmessage( infomessage )
-                                ws.close()
-            
-    # Establish websocket connection.
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    on_trade = askfallwatcher( pair, exit )
+
+    # Watch trades on the shared marketdata connection.
     # Connection is public. Public connection require neither headers nor authentication.
-    logger.info ( f'Establishing websocket connection to monitor {pair[:3]} prices in {pair[3:]} terms.' )
-    ws = websocket.WebSocketApp( connection,
-                                 on_open = on_open,
-                                 on_close = on_close,
-                                 on_error = on_error,
-                                 on_message = on_message )
-    ws.run_forever(sslopt={'cert_reqs': ssl.CERT_NONE})
+    logger.info ( f'Watching the shared websocket connection to monitor {pair[:3]} prices in {pair[3:]} terms.' )
+    return multiplexer.blockuntil( pair, ontrade = on_trade )
 
-def priceincrease(
+def priceincreasewatcher(
         pair: str,
         exit: str
-    ) -> None:
+    ) -> object:
+
+    # Build the trade watcher of priceincrease() (the multiplexer callback). It returns the event when the threshold is breached.
 
     # Cast as decimal.
     exit = Decimal( exit )
-    
-    # Request trade data only.
-    urlrequest = "wss://api.gemini.com/v1/marketdata/" + pair.lower()
-    parameters = "?trades=true&heartbeat=true"
-    connection = urlrequest + parameters
 
-    close_status_code = 'OK'
-    close_msg = f'{connection} connection closed.'
-    # Close connection arguments.
-    # Reference: https://pypi.org/project/websocket-client/#:~:text=ws%2C%20close_status_code%2C%20close_msg.
+    # Describe a trade (for display only, so it is only built when the message is emitted).
+    def describe( event, pair=pair.upper(), exit=exit ) :
+        tradeprice = event[ 'price' ]
+        tradevalue = event[ 'amount' ]
+        inadequacy = Decimal( 100 * ( exit - tradeprice ) / exit )
+        tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
+        if event['makerSide'] == "ask" : takeraction = "increase"
+        if event['makerSide'] == "bid" : takeraction = "decrease"
+        infomessage = f'[{inadequacy:.2f}% off {exit:,.2f} {pair[3:]}] {tradeprice:,.2f} {pair[3:]} price taken to '
+        infomessage = infomessage + f'quickly {takeraction} {pair[:3]} hoard by {tradevalue:,.2f} {pair[3:]}. '
+        return infomessage
+
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    # Returning the event (rather than None) stops the watcher.
+    summary = Periodicsummary( pair, 'trade prices' )
+    def on_trade( event, pair=pair.upper(), exit=exit ) :
+        tradeprice = event[ 'price' ]
+        if summary.verbose : logger.info ( describe( event ) )
+        else : summary.record( tradeprice )
+        if tradeprice.compare( exit ) == 1 :
+            infomessage = f'{exit:,.2f} {pair[3:]} price level breached: {describe( event )}'
+            logger.info( infomessage )
+            sendmessage( infomessage )
+            return event
+    return on_trade
 
+def priceincrease(
+        pair: str,
+        exit: str
+    ) -> None:
 
+    # Cast as decimal.
+    exit = Decimal( exit )
+    
     # Introduce function.
     logger.info(f'Looping until the latest {pair[:3]} transaction price on Gemini exceeds: {exit:,.2f} {pair[3:]}')
 
-    # Define websocket functions.
-    def on_open( ws ) : logger.debug( f'{ws} connection opened.' )
-    def on_close( ws, close_status_code, close_msg ) : logger.debug( 'connection closed.' )
-    def on_error( ws, errormessage ) : logger.error( f'{ws} connection error: {errormessage}' )
-    def on_message( ws, message, pair=pair.upper(), exit=exit ) : 
-        
-        # Remove comment to debug with: logger.debug( message )
-        # Load update into a dictionary.
-        dictionary = json.loads( message )
-
-        # Display heartbeat
-        if dictionary[ 'type' ] == "heartbeat" : logger.debug ( f'Heartbeat: {dictionary[ "socket_sequence" ]}' )
-        else :
-
-            # Define events array/list.
-            events = dictionary[ 'events' ]
-            if events == [] : 
-                logger.debug( f'No update events. Received: {message}  ' )
-            else:
-                # Verify the array of events is a list.
-                # Iterate through each event in the update.
-                if isinstance(events, list):
-                    for event in events:
-                        tradeprice = Decimal( event[ 'price' ] )
-                        tradevalue = Decimal( event[ 'amount' ] )
-                        inadequacy = Decimal( 100 * ( exit - tradeprice ) / exit )
-                        tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
-                        if event['makerSide'] == "ask" : takeraction = "increase"
-                        if event['makerSide'] == "bid" : takeraction = "decrease"
-                        infomessage = f'[{inadequacy:.2f}% off {exit:,.2f} {pair[3:]}] {tradeprice:,.2f} {pair[3:]} price taken to '
-                        infomessage = infomessage + f'quickly {takeraction} {pair[:3]} hoard by {tradevalue:,.2f} {pair[3:]}. '
-                        logger.info ( f'{infomessage}' )
-                        if tradeprice.compare( exit ) == 1 : 
-                            infomessage = f'{exit:,.2f} {pair[3:]} price level breached: {infomessage}'
-                            logger.info( infomessage )
-                            sendmessage( infomessage )
-                            ws.close()
-            
-    # Establish websocket connection.
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    on_trade = priceincreasewatcher( pair, exit )
+
+    # Watch trades on the shared marketdata connection.
     # Connection is public. Public connection require neither headers nor authentication.
-    logger.info ( f'Establishing websocket connection to monitor {pair[:3]} prices in {pair[3:]} terms.' )
-    ws = websocket.WebSocketApp( connection,
-                                 on_open = on_open,
-                                 on_close = on_close,
-                                 on_error = on_error,
-                                 on_message = on_message )
-    ws.run_forever(sslopt={'cert_reqs': ssl.CERT_NONE})
+    logger.info ( f'Watching the shared websocket connection to monitor {pair[:3]} prices in {pair[3:]} terms.' )
+    return multiplexer.blockuntil( pair, ontrade = on_trade )
 
-def bidrise(
+def bidrisewatcher(
         pair: str,
         exit: str
-    ) -> None:
+    ) -> object:
+
+    # Build the trade watcher of bidrise() (the multiplexer callback). It returns the event when the threshold is breached.
 
     # Cast as decimal.
     exit = Decimal( exit )
 
-    # Request trade data only.
-    urlrequest = "wss://api.gemini.com/v1/marketdata/" + pair.lower()
-    parameters = "?trades=true&heartbeat=true"
-    connection = urlrequest + parameters
+    # Describe a trade (for display only, so it is only built when the message is emitted).
+    def describe( event, pair=pair.upper(), exit=exit ) :
+        tradeprice = event[ 'price' ]
+        tradevalue = event[ 'amount' ]
+        inadequacy = Decimal( 100 * ( exit - tradeprice ) / exit )
+        tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
+        if event['makerSide'] == "ask" : takeraction = "increase"
+        if event['makerSide'] == "bid" : takeraction = "decrease"
+        infomessage = f'[{inadequacy:.2f}% off {exit:,.2f} {pair[3:]}] {tradeprice:,.2f} {pair[3:]} price taken to '
+        infomessage = infomessage + f'quickly {takeraction} {pair[:3]} hoard by {tradevalue:,.2f} {pair[3:]}. '
+        return infomessage
+
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    # Returning the event (rather than None) stops the watcher.
+    summary = Periodicsummary( pair, 'trade prices' )
+    def on_trade( event, pair=pair.upper(), exit=exit ) :
+        tradeprice = event[ 'price' ]
+        if summary.verbose : logger.info ( describe( event ) )
+        else : summary.record( tradeprice )
+        if event['makerSide'] == "bid" :
+            if tradeprice.compare( exit ) == 1 :
+                infomessage = f'{exit:,.2f} {pair[3:]} price level breached: {describe( event )}'
+                logger.info( infomessage )
+                sendmessage( infomessage )
+                return event
+    return on_trade
 
-    close_status_code = 'OK'
-    close_msg = f'{connection} connection closed.'
-    # Close connection arguments.
-    # Reference: https://pypi.org/project/websocket-client/#:~:text=ws%2C%20close_status_code%2C%20close_msg.
+def bidrise(
+        pair: str,
+        exit: str
+    ) -> None:
 
+    # Cast as decimal.
+    exit = Decimal( exit )
 
     # Introduce function.
     logger.info(f'Looping until the latest {pair[:3]} transaction price on Gemini exceeds: {exit:,.2f} {pair[3:]}')
 
-    # Define websocket functions.
-    def on_open( ws ) : logger.debug( f'{ws} connection opened.' )
-    def on_close( ws, close_status_code, close_msg ) : logger.debug( 'connection closed.' )
-    def on_error( ws, errormessage ) : logger.error( f'{ws} connection error: {errormessage}' )
-    def on_message( ws, message, pair=pair.upper(), exit=exit ) : 
-        
-        # Remove comment to debug with: logger.debug( message )
-        # Load update into a dictionary.
-        dictionary = json.loads( message )
-
-        # Display heartbeat
-        if dictionary[ 'type' ] == "heartbeat" : logger.debug ( f'Heartbeat: {dictionary[ "socket_sequence" ]}' )
-        else :
-
-            # Define events array/list.
-            events = dictionary[ 'events' ]
-            if events == [] : 
-                logger.debug( f'No update events. Received: {message}  ' )
-            else:
-                # Verify the array of events is a list.
-                # Iterate through each event in the update.
-                if isinstance(events, list):
-                    for event in events:
-                        tradeprice = Decimal( event[ 'price' ] )
-                        tradevalue = Decimal( event[ 'amount' ] )
-                        inadequacy = Decimal( 100 * ( exit - tradeprice ) / exit )
-                        tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
-                        if event['makerSide'] == "ask" : takeraction = "increase"
-                        if event['makerSide'] == "bid" : takeraction = "decrease"
-                        infomessage = f'[{inadequacy:.2f}% off {exit:,.2f} {pair[3:]}] {tradeprice:,.2f} {pair[3:]} price taken to '
-                        infomessage = infomessage + f'quickly {takeraction} {pair[:3]} hoard by {tradevalue:,.2f} {pair[3:]}. '
-                        logger.info ( f'{infomessage}' )
-                        if event['makerSide'] == "bid" : 
-                            if tradeprice.compare( exit ) == 1 : 
-                                infomessage = f'{exit:,.2f} {pair[3:]} price level breached: {infomessage}'
-                                logger.info( infomessage )
-                                sendmessage( infomessage )
-                                ws.close()
-            
-    # Establish websocket connection.
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    on_trade = bidrisewatcher( pair, exit )
+
+    # Watch trades on the shared marketdata connection.
     # Connection is public. Public connection require neither headers nor authentication.
-    logger.info ( f'Establishing websocket connection to monitor {pair[:3]} prices in {pair[3:]} terms.' )
-    ws = websocket.WebSocketApp( connection,
-                                 on_open = on_open,
-                                 on_close = on_close,
-                                 on_error = on_error,
-                                 on_message = on_message )
-    ws.run_forever(sslopt={'cert_reqs': ssl.CERT_NONE})
+    logger.info ( f'Watching the shared websocket connection to monitor {pair[:3]} prices in {pair[3:]} terms.' )
+    return multiplexer.blockuntil( pair, ontrade = on_trade )
 
-def blockpricerange(
+def blockpricerangewatcher(
         pair: str,
         upperbound: str,
         lowerbound: str
-    ) -> None:
+    ) -> object:
+
+    # Build the trade watcher of blockpricerange() (the multiplexer callback). It returns the event when the threshold is breached.
 
     # Cast as decimals.
     upperbound = Decimal( upperbound )
     lowerbound = Decimal( lowerbound )
 
-    # Request trade data only.
-    urlrequest = "wss://api.gemini.com/v1/marketdata/" + pair.lower()
-    parameters = "?trades=true&heartbeat=true"
-    connection = urlrequest + parameters
+    # Describe a trade (for display only, so it is only built when the message is emitted).
+    def describe( event, pair=pair.upper(), upperbound=upperbound ) :
+        tradeprice = event[ 'price' ]
+        tradevalue = event[ 'amount' ]
+        amountless = Decimal( 100 * ( upperbound - tradeprice ) / upperbound )
+        amountmore = Decimal( 100 * ( tradeprice - lowerbound ) / lowerbound )
+        tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
+        if event['makerSide'] == "ask" : takeraction = "increase"
+        if event['makerSide'] == "bid" : takeraction = "decrease"
+        infomessage = f'[{amountless:.2f}% below {upperbound:,.2f} {pair[3:]} upper bound] '
+        infomessage = infomessage + f'[{amountmore:.2f}% above {lowerbound:,.2f} {pair[3:]} lower bound] '
+        infomessage = infomessage + f'{tradeprice:,.2f} {pair[3:]} price taken to '
+        infomessage = infomessage + f'quickly {takeraction} {pair[:3]} hoard by {tradevalue:,.2f} {pair[3:]}. '
+        return infomessage
+
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    # Returning the event (rather than None) stops the watcher.
+    summary = Periodicsummary( pair, 'trade prices' )
+    def on_trade( event, pair=pair.upper(), upperbound=upperbound ) :
+        tradeprice = event[ 'price' ]
+        if summary.verbose : logger.info ( describe( event ) )
+        else : summary.record( tradeprice )
+        if event['makerSide'] == "ask" :
+            if lowerbound.compare( tradeprice ) == 1 :
+                infomessage = f'{lowerbound:,.2f} {pair[3:]} lower/ask price bound breached. '
+                logger.info( infomessage )
+                sendmessage( infomessage )
+                return event
+        if event['makerSide'] == "bid" :
+            if tradeprice.compare( upperbound ) == 1 :
+                infomessage = f'{upperbound:,.2f} {pair[3:]} upper/bid price bound breached. '
+                logger.info( infomessage )
+                sendmessage( infomessage )
+                return event
+    return on_trade
 
-    close_status_code = 'OK'
-    close_msg = f'{connection} connection closed.'
-    # Close connection arguments.
-    # Reference: https://pypi.org/project/websocket-client/#:~:text=ws%2C%20close_status_code%2C%20close_msg.
+def blockpricerange(
+        pair: str,
+        upperbound: str,
+        lowerbound: str
+    ) -> None:
 
+    # Cast as decimals.
+    upperbound = Decimal( upperbound )
+    lowerbound = Decimal( lowerbound )
 
     # Introduce function.
     logger.info(f'Looping while {pair[:3]} prices are between {lowerbound:,.2f} {pair[3:]} and {upperbound:,.2f} {pair[3:]}')
 
-    # Define websocket functions.
-    def on_open( ws ) : logger.debug( f'{ws} connection opened.' )
-    def on_close( ws, close_status_code, close_msg ) : logger.debug( 'connection closed.' )
-    def on_error( ws, errormessage ) : logger.error( f'{ws} connection error: {errormessage}' )
-    def on_message( ws, message, pair=pair.upper(), upperbound=upperbound ) : 
-        
-        # Remove comment to debug with: logger.debug( message )
-        # Load update into a dictionary.
-        dictionary = json.loads( message )
-
-        # Display heartbeat
-        if dictionary[ 'type' ] == "heartbeat" : logger.debug ( f'Heartbeat: {dictionary[ "socket_sequence" ]}' )
-        else :
-
-            # Define events array/list.
-            events = dictionary[ 'events' ]
-            if events == [] : 
-                logger.debug( f'No update events. Received: {message}  ' )
-            else:
-                # Verify the array of events is a list.
-                # Iterate through each event in the update.
-                if isinstance(events, list):
-                    for event in events:
-                        tradeprice = Decimal( event[ 'price' ] )
-                        tradevalue = Decimal( event[ 'amount' ] )
-                        amountless = Decimal( 100 * ( upperbound - tradeprice ) / upperbound )
-                        amountmore = Decimal( 100 * ( tradeprice - lowerbound ) / lowerbound )
-                        tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
-                        if event['makerSide'] == "ask" : takeraction = "increase"
-                        if event['makerSide'] == "bid" : takeraction = "decrease"
-                        infomessage = f'[{amountless:.2f}% below {upperbound:,.2f} {pair[3:]} upper bound] '
-                        infomessage = infomessage + f'[{amountmore:.2f}% above {lowerbound:,.2f} {pair[3:]} lower bound] '
-                        infomessage = infomessage + f'{tradeprice:,.2f} {pair[3:]} price taken to '
-                        infomessage = infomessage + f'quickly {takeraction} {pair[:3]} hoard by {tradevalue:,.2f} {pair[3:]}. '
-                        logger.info ( f'{infomessage}' )
-                        if event['makerSide'] == "ask" : 
-                            if lowerbound.compare( tradeprice ) == 1 : 
-                                infomessage = f'{lowerbound:,.2f} {pair[3:]} lower/ask price bound breached. '
-                                logger.info( infomessage )
-                                sendmessage( infomessage )
-                                ws.close()
-                        if event['makerSide'] == "bid" : 
-                            if tradeprice.compare( upperbound ) == 1 : 
-                                infomessage = f'{upperbound:,.2f} {pair[3:]} upper/bid price bound breached. '
-                                logger.info( infomessage )
-                                sendmessage( infomessage )
-                                ws.close()
-            
-    # Establish websocket connection.
-    # Connection is public. Public connection require neither headers nor authentication.
-    logger.info ( f'Establishing websocket connection to monitor {pair[:3]} prices in {pair[3:]} terms.' )
-    ws = websocket.WebSocketApp( connection,
-                                 on_open = on_open,
-                                 on_close = on_close,
-                                 on_error = on_error,
-                                 on_message = on_message )
-    ws.run_forever(sslopt={'cert_reqs': ssl.CERT_NONE})
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    on_trade = blockpricerangewatcher( pair, upperbound, lowerbound )
 
+    # Watch trades on the shared marketdata connection.
+    # Connection is public. Public connection require neither headers nor authentication.
+    logger.info ( f'Watching the shared websocket connection to monitor {pair[:3]} prices in {pair[3:]} terms.' )
+    return multiplexer.blockuntil( pair, ontrade = on_trade )
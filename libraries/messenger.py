@@ -5,16 +5,205 @@
 # library created: 20220819
 # library purpose: send alert messages to a monitored Discord Server Channel using webhooks.
 
-import json
-import requests
+
+# Note:
+#
+# sendmessage() used to post to the Discord webhook inline. It is called from websocket handlers and validators,
+# so a slow webhook stalled market data processing and order confirmation. Now sendmessage() only enqueues the message
+# and returns. A background (daemon) thread posts the alerts:
+#  - the queue is bounded (definer.alertqueuesize). When it is full the message is dropped (and counted) instead of waiting.
+#  - bursts are coalesced. Messages arriving within definer.alertcoalesce seconds of each other are joined (one per line)
+#    into as few posts as Discord's 2000 character limit allows.
+#  - Discord's rate limit headers are respected. When X-RateLimit-Remaining reaches zero the thread waits X-RateLimit-Reset-After
+#    seconds before posting again. HTTP 429 responses are retried after the "retry_after" period Discord specifies.
+# Reference: https://discord.com/developers/docs/topics/rate-limits
+#
+# Retry loops can raise the same alert every few seconds indefinitely. So alerts are filtered before they are queued:
+#  - a message identical to one sent in the last definer.alertdedupwindow seconds is suppressed.
+#  - an alert sent with a category (sendmessage( message, category = 'error' )) is suppressed if another alert of that category
+#    was sent less than definer.alertthrottles[ category ] seconds earlier. Categories without a throttle are only deduplicated.
+#  - suppressed alerts are counted and summarized in a digest (per category, with the latest message) every definer.alertdigestinterval seconds.
+#
+# Messages still queued when the process exits are posted (for up to definer.alertflushtimeout seconds) before it ends.
+
+
+import time
+import queue
+import atexit
+import threading
 
 from libraries.logger import logger
 
+import libraries.definer as definer
+import libraries.requester as requester
 import libraries.credentials as credentials
 
+# Discord rejects messages longer than this.
+contentlimit = 2000
+
+class Alertdispatcher:
+
+    # Class Description:
+    #  1. Accept messages from any thread without blocking (send()). Suppress duplicates and throttled categories.
+    #  2. Coalesce bursts into batched messages and post them to the webhook from a background (daemon) thread.
+    #  3. Pace the posts by Discord's rate limit headers.
+    #  4. Send a digest of the suppressed alerts periodically.
+    #
+    # Execution:
+    #   - from libraries.messenger import dispatcher
+    #   - dispatcher.send( "Stop order submitted." )
+    #   - dispatcher.send( "Unable to reach the REST API.", category = 'error' )
+
+    def __init__( self, webhook, size = None, coalesce = None ):
+        self.webhook = webhook
+        self.coalesce = float( definer.alertcoalesce if coalesce is None else coalesce )
+        self.dropped = 0
+        self.__messages = queue.Queue( maxsize = size or definer.alertqueuesize )
+        self.__session = None
+        self.__thread = None
+        self.__lock = threading.Lock()
+        self.__resumeat = 0.0
+
+        # Deduplication and throttling state (message and category -> time last sent) and the suppressed alerts.
+        self.dedupwindow = float( definer.alertdedupwindow )
+        self.throttles = dict( definer.alertthrottles )
+        self.digestinterval = float( definer.alertdigestinterval )
+        self.__sent = {}
+        self.__categorysent = {}
+        self.__suppressed = {}
+        self.__digestat = time.monotonic() + self.digestinterval
+
+    def send( self, message, category = None ):
+        # Enqueue a message. Return False if it is suppressed (duplicate or throttled) or dropped (the queue is full).
+        message = str( message )
+        if not self.__admit( message, category ): return False
+        try: self.__messages.put_nowait( message )
+        except queue.Full:
+            self.dropped += 1
+            logger.warning( f'Alert queue full. Dropped: {message}' )
+            return False
+        if self.__thread is None: self.__start()
+        return True
+
+    def flush( self, timeout = None ):
+        # Wait until every message enqueued so far (and the digest of suppressed alerts) has been posted.
+        # Return False if that took longer than the timeout.
+        if self.__thread is None: return True
+        digest = self.digest()
+        if digest:
+            try: self.__messages.put_nowait( digest )
+            except queue.Full: pass
+        with self.__messages.all_tasks_done:
+            deadline = time.monotonic() + ( definer.alertflushtimeout if timeout is None else timeout )
+            while self.__messages.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: return False
+                self.__messages.all_tasks_done.wait( remaining )
+        return True
+
+    def digest( self ):
+        # Summarize (and forget) the alerts suppressed since the last digest. Return None when there were none.
+        with self.__lock:
+            suppressed, self.__suppressed = self.__suppressed, {}
+            self.__digestat = time.monotonic() + self.digestinterval
+        if not suppressed: return None
+        lines = [ f'Suppressed {sum( count for count, _ in suppressed.values() )} repeated alerts:' ]
+        for category, ( count, latest ) in suppressed.items():
+            lines.append( f'  {category or "duplicates"}: {count} (latest: {latest})' )
+        return '\n'.join( lines )
+
+    def __admit( self, message, category ):
+        # Decide whether an alert is sent (and record it) or suppressed (and count it for the digest).
+        now = time.monotonic()
+        with self.__lock:
+            # Forget messages that have left the deduplication window (amortized over the calls).
+            if len( self.__sent ) > 256:
+                self.__sent = { text: sent for text, sent in self.__sent.items() if now - sent < self.dedupwindow }
+            duplicate = now - self.__sent.get( message, -self.dedupwindow ) < self.dedupwindow
+            throttle = self.throttles.get( category )
+            throttled = throttle is not None and now - self.__categorysent.get( category, -throttle ) < throttle
+            if duplicate or throttled:
+                count, _ = self.__suppressed.get( category, ( 0, None ) )
+                self.__suppressed[ category ] = ( count + 1, message )
+                return False
+            self.__sent[ message ] = now
+            if category is not None: self.__categorysent[ category ] = now
+            return True
+
+    def __start( self ):
+        with self.__lock:
+            if self.__thread is not None: return
+            self.__session = requester.createsession()
+            self.__thread = threading.Thread( target = self.__run, name = 'alert-dispatcher', daemon = True )
+            self.__thread.start()
+            atexit.register( self.flush )
+
+    def __run( self ):
+        while True:
+            # Block for the first message (or until the digest is due) then gather the rest of the burst.
+            try: batch = [ self.__messages.get( timeout = max( 0.0, self.__digestat - time.monotonic() ) ) ]
+            except queue.Empty:
+                # Post the digest directly (putting it on the queue could block this thread, the only consumer, forever).
+                digest = self.digest()
+                if digest is None: continue
+                try:
+                    for content in self.__chunk( [ digest ] ): self.__post( content )
+                except Exception as e: logger.error( f'Unable to send alert digest to Discord: {e}' )
+                continue
+            deadline = time.monotonic() + self.coalesce
+            while True:
+                try: batch.append( self.__messages.get( timeout = max( 0.0, deadline - time.monotonic() ) ) )
+                except queue.Empty: break
+            try:
+                for content in self.__chunk( batch ): self.__post( content )
+            except Exception as e: logger.error( f'Unable to send alert to Discord: {e}' )
+            finally:
+                for _ in batch: self.__messages.task_done()
+
+    def __chunk( self, batch ):
+        # Join messages (one per line) into contents no longer than Discord allows.
+        if self.dropped:
+            batch.append( f'({self.dropped} alerts dropped: the alert queue was full.)' )
+            self.dropped = 0
+        content = ''
+        for message in batch:
+            for piece in [ message[ start : start + contentlimit ] for start in range( 0, len( message ), contentlimit ) ] or [ '' ]:
+                if content and len( content ) + 1 + len( piece ) > contentlimit:
+                    yield content
+                    content = ''
+                content = f'{content}\n{piece}' if content else piece
+        if content: yield content
+
+    def __post( self, content ):
+        while True:
+            pause = self.__resumeat - time.monotonic()
+            if pause > 0: time.sleep( pause )
+            response = self.__session.post( self.webhook, json = { 'content': content }, timeout = definer.resttimeout )
+            logger.debug( 'Response to Discord Request:\n%s', response )
+
+            # Wait out the rate limit bucket when it is exhausted.
+            headers = response.headers
+            if headers.get( 'X-RateLimit-Remaining' ) == '0':
+                try: self.__resumeat = time.monotonic() + float( headers.get( 'X-RateLimit-Reset-After', 1 ) )
+                except ValueError: self.__resumeat = time.monotonic() + 1.0
+            if response.status_code != 429: break
+
+            # Too many requests: wait as long as Discord asks and post again.
+            try: retryafter = float( response.json().get( 'retry_after', 1 ) )
+            except ( ValueError, AttributeError ): retryafter = 1.0
+            logger.debug( f'Discord rate limited the webhook. Retrying in {retryafter} seconds.' )
+            self.__resumeat = time.monotonic() + retryafter
+        if not response.ok: logger.error( f'Discord rejected an alert: {response.status_code} {response.text}' )
+
+# Shared (process wide) dispatcher.
+dispatcher = Alertdispatcher( credentials.discordwebhook )
+
 # Define alert function
-def sendmessage( message ):
-    # Send message to Discord server.
-    appresponse = requests.post( credentials.discordwebhook, data = json.dumps( { "content": message } ), headers = { 'Content-Type': 'application/json' } )
-    logger.debug ( f'Response to Discord Request:\n{appresponse}' )
-    # Log execution details
\ No newline at end of file
+def sendmessage( message, category = None ):
+    # Queue message for the Discord server (returns immediately).
+    # Identical messages and messages of a throttled category (definer.alertthrottles) sent too recently are suppressed.
+    return dispatcher.send( message, category )
+
+def flush( timeout = None ):
+    # Wait for the queued messages to be sent.
+    return dispatcher.flush( timeout )
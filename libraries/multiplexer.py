@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+#
+# library name: multiplexer.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: share one long-lived v2 marketdata websocket connection among every price monitor in the process.
+
+
+# Note:
+#
+# Every monitor used to open (and close) its own wss://api.gemini.com/v1/marketdata/<pair> connection.
+# The multiplexer holds a single /v2/marketdata connection in a background (daemon) thread, subscribes
+# to L2 data (which includes trades) for every symbol requested and fans the messages out to watchers.
+#
+# Messages are decoded by decoder.py (with orjson or msgspec when installed) into Trade and L2update structs.
+# Trades are delivered to watchers in the v1 event format the monitors already understand (with Decimal prices and amounts):
+#   { 'type': 'trade', 'symbol': 'BTCUSD', 'price': Decimal, 'amount': Decimal, 'makerSide': 'ask' | 'bid', 'timestamp': ... }
+# The v2 "side" is the taker side. So a "buy" was made against an ask and a "sell" was made against a bid.
+#
+# A connection silent for definer.reconnectsilence seconds (several missed heartbeats) is dropped. Whenever the connection
+# is down the orderbooks are reset, so bookkeeper.bestbid() and bestask() use the REST API rather than a stale book.
+#
+# When metrics are enabled (exporter.py) the messages received by type, the time spent in every watcher callback,
+# the reconnections and the number of watchers are recorded (stream "marketdata").
+#
+# Reference: https://docs.gemini.com/websocket-api/#market-data-version-2
+
+
+import ssl
+import json
+import time
+import asyncio
+import threading
+
+from websocket import create_connection
+
+from libraries.logger import logger as logger
+from libraries.bookkeeper import Orderbook
+from libraries.decoder import decode, Trade, L2update
+from libraries.journaler import journal as journal
+
+import libraries.definer as definer
+import libraries.exporter as exporter
+import libraries.bookkeeper as bookkeeper
+import libraries.ratelimiter as ratelimiter
+
+def tradeevent(
+        message: Trade
+    ) -> dict:
+
+    # Trade event (the dictionary trade watchers receive) of a decoded Trade.
+    return {
+        'type': 'trade',
+        'symbol': message.symbol,
+        'price': message.price,
+        'amount': message.quantity,
+        'makerSide': 'ask' if message.side == 'buy' else 'bid',
+        'timestamp': message.timestamp
+    }
+
+class Watcher:
+
+    # Class Description:
+    #     A condition registered with the multiplexer for one symbol.
+    #     The callbacks run on the multiplexer thread. Returning anything other than None completes the watcher.
+
+    def __init__( self, symbol, ontrade = None, onbook = None ):
+        self.symbol = symbol
+        self.ontrade = ontrade
+        self.onbook = onbook
+        self.done = threading.Event()
+        self.result = None
+        self.callbacks = []
+
+    def complete( self, result ):
+        self.result = result
+        self.done.set()
+        for callback in self.callbacks: callback( result )
+
+class Marketdatamultiplexer:
+
+    # Class Description:
+    #  1. Open one websocket connection to /v2/marketdata (lazily, when the first symbol is watched).
+    #  2. Subscribe to L2 data for each symbol watched (once per symbol).
+    #  3. Maintain a local orderbook per symbol and dispatch trades and L2 updates to watchers.
+    #  4. Reconnect (resubscribing and reloading orderbooks) when the connection drops.
+    #
+    # Execution:
+    #   - from libraries.multiplexer import multiplexer
+    #   - event = multiplexer.blockuntil( "BTCUSD", ontrade = lambda event: event if event['price'] > '20000' else None )
+
+    def __init__( self ):
+        self.__lock = threading.RLock()
+        self.__symbols = []
+        self.__watchers = {}
+        self.__orderbooks = {}
+        self.__ws = None
+        self.__thread = None
+        self.__connections = 0
+
+    def orderbook( self, symbol ):
+        # Subscribe (if required) and return the local orderbook for the symbol.
+        symbol = self.__subscribe( symbol )
+        return self.__orderbooks[ symbol ]
+
+    def watch( self, symbol, ontrade = None, onbook = None ):
+        # Register a watcher. Trades and L2 updates for the symbol are passed to its callbacks.
+        symbol = symbol.upper()
+        watcher = Watcher( symbol, ontrade, onbook )
+        with self.__lock: self.__watchers.setdefault( symbol, [] ).append( watcher )
+        if exporter.enabled: self.__countwatchers()
+        self.__subscribe( symbol )
+        return watcher
+
+    def unwatch( self, watcher ):
+        with self.__lock:
+            watchers = self.__watchers.get( watcher.symbol, [] )
+            if watcher in watchers: watchers.remove( watcher )
+        if exporter.enabled: self.__countwatchers()
+
+    def blockuntil( self, symbol, ontrade = None, onbook = None ):
+        # Block the calling thread until a callback returns something other than None. Return it.
+        watcher = self.watch( symbol, ontrade, onbook )
+        try:
+            watcher.done.wait()
+            return watcher.result
+        finally: self.unwatch( watcher )
+
+    async def waituntil( self, symbol, ontrade = None, onbook = None ):
+        # Await (without blocking the event loop) until a callback returns something other than None. Return it.
+        exporter.watchloop()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        def resolve( result ):
+            if not future.done(): future.set_result( result )
+        watcher = Watcher( symbol.upper(), ontrade, onbook )
+        watcher.callbacks.append( lambda result: loop.call_soon_threadsafe( resolve, result ) )
+        with self.__lock: self.__watchers.setdefault( watcher.symbol, [] ).append( watcher )
+        if exporter.enabled: self.__countwatchers()
+        self.__subscribe( watcher.symbol )
+        try: return await future
+        finally: self.unwatch( watcher )
+
+    def __subscribe( self, symbol ):
+        symbol = symbol.upper()
+        with self.__lock:
+            if symbol not in self.__symbols:
+                self.__symbols.append( symbol )
+                self.__orderbooks[ symbol ] = bookkeeper.orderbooks.setdefault( symbol, Orderbook( symbol ) )
+                if self.__ws is not None:
+                    try: self.__ws.send( self.__subscriptionrequest( [ symbol ] ) )
+                    except Exception as e: logger.debug( f'Unable to subscribe to {symbol} (the connection will be reestablished): {e}' )
+            if self.__thread is None:
+                self.__thread = threading.Thread( target = self.__run, name = 'marketdata-multiplexer', daemon = True )
+                self.__thread.start()
+        return symbol
+
+    def __subscriptionrequest( self, symbols ):
+        return json.dumps( { 'type': 'subscribe', 'subscriptions': [ { 'name': 'l2', 'symbols': symbols } ] } )
+
+    def __run( self ):
+        backoff = ratelimiter.Backoff()
+        while True:
+            ws = None
+            try:
+                logger.debug( f'Establishing the shared websocket connection to {definer.sockserver}/v2/marketdata.' )
+                ws = create_connection( definer.sockserver + '/v2/marketdata', timeout = definer.reconnectsilence, sslopt = { 'cert_reqs': ssl.CERT_NONE } )
+                backoff.connected()
+                with self.__lock:
+                    for orderbook in self.__orderbooks.values(): orderbook.reset()
+                    ws.send( self.__subscriptionrequest( list( self.__symbols ) ) )
+                    self.__ws = ws
+                self.__connections += 1
+                if exporter.enabled and self.__connections > 1: exporter.reconnects.inc( 'marketdata' )
+                while True: self.__dispatch( decode( ws.recv() ) )
+            except Exception as e:
+                # Stop serving the (now stale) orderbooks until they are reloaded.
+                with self.__lock:
+                    self.__ws = None
+                    for orderbook in self.__orderbooks.values(): orderbook.reset()
+                if ws is not None:
+                    try: ws.close()
+                    except Exception: pass
+                delay = backoff.next()
+                logger.debug( f'Shared marketdata connection error: {e}. Reconnecting in {delay:.1f} seconds...' )
+                time.sleep( delay )
+
+    def __dispatch( self, message ):
+        if isinstance( message, L2update ):
+            if exporter.enabled: exporter.messages.inc( 'marketdata', 'l2_updates' )
+            orderbook = self.__orderbooks.get( message.symbol )
+            if orderbook is not None: orderbook.update( message )
+            for watcher in self.__watching( message.symbol ):
+                if watcher.onbook is not None: self.__notify( watcher, watcher.onbook, orderbook )
+        elif isinstance( message, Trade ):
+            if exporter.enabled: exporter.messages.inc( 'marketdata', 'trade' )
+            journal.record( 'trade', symbol = message.symbol, price = message.price, quantity = message.quantity, side = message.side, timestamp = message.timestamp, eventid = message.eventid )
+            event = tradeevent( message )
+            for watcher in self.__watching( message.symbol ):
+                if watcher.ontrade is not None: self.__notify( watcher, watcher.ontrade, event )
+        else:
+            if exporter.enabled: exporter.messages.inc( 'marketdata', message.get( 'type' ) if isinstance( message, dict ) else 'other' )
+            if isinstance( message, dict ) and message.get( 'type' ) == 'heartbeat': logger.debug( f'Heartbeat: {message.get( "timestamp" )}' )
+
+    def __watching( self, symbol ):
+        with self.__lock: return [ watcher for watcher in self.__watchers.get( symbol, [] ) if not watcher.done.is_set() ]
+
+    def __countwatchers( self ):
+        with self.__lock: exporter.watchers.set( sum( len( watchers ) for watchers in self.__watchers.values() ), 'marketdata' )
+
+    def __notify( self, watcher, callback, argument ):
+        try:
+            if exporter.enabled:
+                with exporter.handlerlatency.time( 'marketdata', getattr( callback, '__qualname__', 'callback' ) ): result = callback( argument )
+            else: result = callback( argument )
+        except Exception as e:
+            logger.error( f'{watcher.symbol} watcher error: {e}' )
+            return
+        if result is not None:
+            self.unwatch( watcher )
+            watcher.complete( result )
+
+# Shared (process wide) multiplexer.
+multiplexer = Marketdatamultiplexer()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+#
+# library name: noncegenerator.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: generate strictly increasing nonces for authenticated (private) Gemini API requests.
+
+
+# Note:
+#
+# Nonces used to be built with str(int(time.mktime(t.timetuple())*1000)). The timetuple() call drops the
+# sub-second part of the time, so every request made within the same second received the same nonce and
+# Gemini rejected all but the first one. Reference: https://docs.gemini.com/rest-api/#private-api-invocation
+#
+# This library derives nonces from the clock at microsecond resolution (definer.nonceunits) and bumps the
+# value whenever the clock has not moved past the previous nonce. A lock makes it safe across threads.
+# Processes sharing one API key can also share the counter through a locked file (definer.noncefile).
+
+
+import os
+import time
+import fcntl
+import threading
+
+import libraries.definer as definer
+
+# Last nonce issued by this process.
+lastnonce = 0
+noncelock = threading.Lock()
+noncefile = None
+
+def clocknonce() -> int:
+
+    # Current time expressed in nonce units (microseconds by default).
+    return time.time_ns() * definer.nonceunits // 1000000000
+
+def nonce() -> str:
+
+    # Function Description:
+    #  1. Read the clock in nonce units.
+    #  2. Make sure the value exceeds every nonce issued before (in this process, or by any process sharing definer.noncefile).
+    #  3. Return it as a string (the format Gemini payloads expect).
+    #
+    # Execution:
+    #   - from libraries.noncegenerator import nonce
+    #   - payload = { 'request': '/v1/order/status', 'nonce': nonce() }
+
+    global lastnonce
+    with noncelock:
+        candidate = max( clocknonce(), lastnonce + 1 )
+        if definer.noncefile: candidate = sharednonce( candidate )
+        lastnonce = candidate
+    return str( candidate )
+
+def sharednonce(
+        candidate: int
+    ) -> int:
+
+    # Coordinate with other processes through an exclusively locked counter file.
+    global noncefile
+    if noncefile is None: noncefile = os.open( definer.noncefile, os.O_RDWR | os.O_CREAT, 0o600 )
+    fcntl.flock( noncefile, fcntl.LOCK_EX )
+    try:
+        stored = os.pread( noncefile, 32, 0 ).strip()
+        if stored: candidate = max( candidate, int( stored ) + 1 )
+        os.pwrite( noncefile, str( candidate ).rjust( 32 ).encode(), 0 )
+    finally: fcntl.flock( noncefile, fcntl.LOCK_UN )
+    return candidate
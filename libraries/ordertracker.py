@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+#
+# library name: ordertracker.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: share one long-lived authenticated order events websocket among every order validator in the process.
+
+
+# Note:
+#
+# The validators used to open (and close) an authenticated /v1/order/events connection for every order they confirmed.
+# The tracker holds a single connection in a background (daemon) thread, keeps a table of the events received
+# for each order and dispatches them to watchers registered for an order_id. Confirming a fill is an in-process
+# lookup: events already received are replayed to new watchers, so no event is missed between submission and watching.
+#
+# The first list received after (re)connecting is the "initial" snapshot of the account's active orders. Watched
+# orders missing from it may have closed while the tracker was not connected. Their status is reconciled once
+# through the REST API. Orders no longer live are reported as "closed" events and orders Gemini does not know ("OrderNotFound")
+# as "inactive" events. Other errors (rate limits, nonces, maintenance) leave the order alone and the query is retried later.
+#
+# Dropped or refused connections are retried after capped exponential delays (ratelimiter.Backoff) with a fresh nonce.
+#
+# The subscription asks Gemini to filter events by symbol and type (definer.ordereventsymbols and definer.ordereventtypes).
+# Heartbeats are recognized without decoding them. Events only reach the watchers of their own order_id.
+#
+# When metrics are enabled (exporter.py) the messages received by type, the time spent in every watcher callback, the reconnections,
+# the number of orders watched and the order state transitions (from the type of an order's previous event to the new one) are recorded.
+#
+# Reference: https://docs.gemini.com/websocket-api/#order-events
+
+
+import ssl
+import json
+import time
+import asyncio
+import threading
+
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from websocket import create_connection
+
+from libraries.logger import logger as logger
+from libraries.noncegenerator import nonce as nonce
+
+import libraries.definer as definer
+import libraries.exporter as exporter
+import libraries.ratelimiter as ratelimiter
+import libraries.ordermanager as ordermanager
+import libraries.authenticator as authenticator
+
+from libraries.journaler import journal as journal
+
+class Orderwatcher:
+
+    # Class Description:
+    #     A condition registered with the tracker for one order.
+    #     The callback runs on the tracker thread. Returning anything other than None completes the watcher.
+
+    def __init__( self, orderid, onevent ):
+        self.orderid = str( orderid )
+        self.onevent = onevent
+        self.done = threading.Event()
+        self.result = None
+        self.callbacks = []
+
+    def complete( self, result ):
+        self.result = result
+        self.done.set()
+        for callback in self.callbacks: callback( result )
+
+class Ordereventstracker:
+
+    # Class Description:
+    #  1. Open one authenticated websocket connection to /v1/order/events (lazily, when the first order is watched).
+    #  2. Record every order event received in a table keyed by order_id.
+    #  3. Replay recorded events to new watchers and dispatch new events to the watchers of each order.
+    #  4. Reconnect (with a fresh nonce) when the connection drops and reconcile watched orders missed meanwhile.
+    #
+    # Execution:
+    #   - from libraries.ordertracker import tracker
+    #   - event = tracker.blockuntil( orderid, onevent = lambda event: event if event['type'] == 'closed' else None )
+
+    def __init__( self, history = 1000 ):
+        self.history = history
+        self.__lock = threading.RLock()
+        self.__orders = OrderedDict()
+        self.__watchers = {}
+        self.__thread = None
+        self.__connections = 0
+
+    def start( self ):
+        # Connect ahead of time (orders submitted afterwards are tracked from their first event).
+        with self.__lock:
+            if self.__thread is None:
+                self.__thread = threading.Thread( target = self.__run, name = 'order-events-tracker', daemon = True )
+                self.__thread.start()
+
+    def events( self, orderid ):
+        # Return the events received so far for an order (oldest first).
+        with self.__lock: return list( self.__orders.get( str( orderid ), [] ) )
+
+    def order( self, orderid ):
+        # Return the latest known state of an order (every field of its events merged) or None.
+        state = {}
+        for event in self.events( orderid ): state.update( event )
+        return state or None
+
+    def watch( self, orderid, onevent, callbacks = () ):
+        # Register a watcher and replay the events already received for the order.
+        watcher = Orderwatcher( orderid, onevent )
+        watcher.callbacks.extend( callbacks )
+        with self.__lock:
+            self.__watchers.setdefault( watcher.orderid, [] ).append( watcher )
+            for event in self.__orders.get( watcher.orderid, [] ):
+                if watcher.done.is_set(): break
+                self.__notify( watcher, event )
+            if exporter.enabled: exporter.watchers.set( len( self.__watchers ), 'orderevents' )
+        self.start()
+        return watcher
+
+    def unwatch( self, watcher ):
+        with self.__lock:
+            watchers = self.__watchers.get( watcher.orderid, [] )
+            if watcher in watchers: watchers.remove( watcher )
+            if not watchers: self.__watchers.pop( watcher.orderid, None )
+            if exporter.enabled: exporter.watchers.set( len( self.__watchers ), 'orderevents' )
+
+    def blockuntil( self, orderid, onevent ):
+        # Block the calling thread until the callback returns something other than None. Return it.
+        watcher = self.watch( orderid, onevent )
+        try:
+            watcher.done.wait()
+            return watcher.result
+        finally: self.unwatch( watcher )
+
+    async def waituntil( self, orderid, onevent ):
+        # Await (without blocking the event loop) until the callback returns something other than None. Return it.
+        exporter.watchloop()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        def resolve( result ):
+            if not future.done(): future.set_result( result )
+        watcher = self.watch( orderid, onevent, [ lambda result: loop.call_soon_threadsafe( resolve, result ) ] )
+        try: return await future
+        finally: self.unwatch( watcher )
+
+    def __connect( self ):
+        endpoint = '/v1/order/events'
+        payload = {
+            'request': endpoint,
+            'nonce': nonce()
+        }
+        header = authenticator.authenticate( payload, 'sockheader' )
+
+        # Server side filters (the signed request is the endpoint without them).
+        filters = [ ( 'symbolFilter', symbol.lower() ) for symbol in definer.ordereventsymbols or [] ]
+        filters += [ ( 'eventTypeFilter', eventtype ) for eventtype in definer.ordereventtypes or [] ]
+        connection = definer.sockserver + endpoint + ( f'?{urlencode( filters )}' if filters else '' )
+
+        logger.debug( f'Establishing the shared websocket connection to {connection}.' )
+        return create_connection( connection, header = header['sockheader'], sslopt = { 'cert_reqs': ssl.CERT_NONE } )
+
+    def __run( self ):
+        backoff = ratelimiter.Backoff()
+        while True:
+            ws = None
+            try:
+                ws = self.__connect()
+                backoff.connected()
+                self.__connections += 1
+                if exporter.enabled and self.__connections > 1: exporter.reconnects.inc( 'orderevents' )
+                initialized = False
+                while True:
+                    message = ws.recv()
+
+                    # Heartbeats are the most frequent message. Skip them without decoding.
+                    if message.startswith( '{"type":"heartbeat"' ):
+                        if exporter.enabled: exporter.messages.inc( 'orderevents', 'heartbeat' )
+                        continue
+
+                    dictionary = json.loads( message )
+                    if exporter.enabled: exporter.messages.inc( 'orderevents', 'events' if isinstance( dictionary, list ) else dictionary.get( 'type' ) )
+                    if isinstance( dictionary, list ):
+                        self.__record( dictionary )
+                        if not initialized:
+                            initialized = True
+                            self.__reconcile( { event['order_id'] for event in dictionary } )
+                    elif dictionary.get( 'type' ) == 'heartbeat': logger.debug( f'Heartbeat: {dictionary.get( "socket_sequence" )}' )
+                    elif dictionary.get( 'type' ) == 'subscription_ack': logger.debug( f'Subscribed to order events: {dictionary}' )
+            except Exception as e:
+                if ws is not None:
+                    try: ws.close()
+                    except Exception: pass
+                delay = backoff.next()
+                logger.debug( f'Shared order events connection error: {e}. Reconnecting in {delay:.1f} seconds...' )
+                time.sleep( delay )
+
+    def __record( self, events ):
+        with self.__lock:
+            for event in events:
+                orderid = str( event['order_id'] )
+                if event.get( 'type' ) in ( 'fill', 'cancelled', 'rejected', 'closed' ): journal.record( 'orderevent', event = event )
+                if exporter.enabled:
+                    previous = self.__orders.get( orderid )
+                    exporter.ordertransitions.inc( previous[-1].get( 'type' ) if previous else 'none', event.get( 'type' ) )
+                self.__orders.setdefault( orderid, [] ).append( event )
+                self.__orders.move_to_end( orderid )
+                for watcher in list( self.__watchers.get( orderid, [] ) ):
+                    if not watcher.done.is_set(): self.__notify( watcher, event )
+
+            # Forget the oldest orders nobody is watching once the table exceeds its history.
+            while len( self.__orders ) > self.history:
+                orderid = next( iter( self.__orders ) )
+                if orderid in self.__watchers: break
+                del self.__orders[ orderid ]
+
+    def __reconcile( self, active ):
+        # Query the REST API for watched orders missing from the initial snapshot (and not closed already).
+        with self.__lock:
+            missing = [ orderid for orderid in self.__watchers if orderid not in active and not self.__closed( orderid ) ]
+        self.__reconcileorders( missing )
+
+    def __reconcileorders( self, orderids, backoff = None ):
+        # Query the status of the orders (still watched and not closed). Retry the queries that failed after a delay.
+        with self.__lock: orderids = [ orderid for orderid in orderids if orderid in self.__watchers and not self.__closed( orderid ) ]
+        failed = []
+        for orderid in orderids:
+            try: status = ordermanager.islive( orderid ).json()
+            except Exception as e:
+                logger.debug( f'Unable to reconcile order {orderid}: {e}' )
+                failed.append( orderid )
+                continue
+            if 'order_id' in status:
+                if not status.get( 'is_live' ): self.__record( [ dict( status, type = 'closed' ) ] )
+            elif status.get( 'reason' ) == 'OrderNotFound': self.__record( [ { 'order_id': orderid, 'type': 'inactive' } ] )
+            else:
+                logger.debug( f'Unable to reconcile order {orderid}: {status}' )
+                failed.append( orderid )
+        if failed:
+            backoff = backoff or ratelimiter.Backoff()
+            retry = threading.Timer( backoff.next(), self.__reconcileorders, ( failed, backoff ) )
+            retry.daemon = True
+            retry.start()
+
+    def __closed( self, orderid ):
+        return any( event.get( 'type' ) in ( 'closed', 'inactive' ) for event in self.__orders.get( orderid, [] ) )
+
+    def __notify( self, watcher, event ):
+        try:
+            if exporter.enabled:
+                with exporter.handlerlatency.time( 'orderevents', getattr( watcher.onevent, '__qualname__', 'callback' ) ): result = watcher.onevent( event )
+            else: result = watcher.onevent( event )
+        except Exception as e:
+            logger.error( f'Order {watcher.orderid} watcher error: {e}' )
+            return
+        if result is not None:
+            self.unwatch( watcher )
+            watcher.complete( result )
+
+# Shared (process wide) tracker.
+tracker = Ordereventstracker()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+#
+# library name: player.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: replay recorded Gemini marketdata frames from a local websocket server for offline benchmarks.
+
+
+# Note:
+#
+# The player serves a recording (recorder.py) on the same paths Gemini does. Point definer.sockserver at it
+# (for example 'ws://127.0.0.1:8765') and the monitors (marketmonitor, trademonitor, askmonitor and bidmonitor)
+# run against the recorded market instead of the live one.
+#
+# Every connection replays the frames recorded on its path from the beginning:
+#  - '/v2/marketdata' waits for the client's subscription and only sends the frames of the symbols it subscribed to
+#    (frames without a symbol, like heartbeats, are always sent). Symbols subscribed to later are added as they arrive.
+#  - '/v1/marketdata/<symbol>' sends the frames recorded for that symbol as soon as the client connects.
+#
+# Speed is a multiple of real time: 1 replays at the recorded pace, 10 ten times faster and 0 as fast as the client reads.
+# When the recording ends the connection is closed (or the replay starts over when looping).
+
+
+import json
+import time
+import asyncio
+
+import websockets
+
+from libraries.logger import logger as logger
+from libraries.recorder import readrecording
+
+class Marketdataplayer:
+
+    # Class Description:
+    #  1. Load a recording into memory (indexed by path with the symbol of every frame extracted once).
+    #  2. Serve it from a local websocket server, honouring the client's v2 subscriptions.
+    #  3. Pace the frames by their recorded timestamps (scaled by speed) or send them as fast as possible.
+    #
+    # Execution:
+    #   - from libraries.player import Marketdataplayer
+    #   - player = Marketdataplayer( '/tmp/marketdata.jsonl.gz', speed = 10 )
+    #   - asyncio.run( player.serve( 'localhost', 8765 ) )
+
+    def __init__( self, filename, speed = 1, loop = False ):
+        self.filename = filename
+        self.speed = float( speed )
+        self.loop = loop
+        self.frames = {}
+        for elapsed, path, frame in readrecording( filename ):
+            self.frames.setdefault( path.split( '?' )[0], [] ).append( ( elapsed, self.__symbol( frame ), frame ) )
+        logger.info( f'Loaded {sum( len( frames ) for frames in self.frames.values() ):,} frames from {filename} ({", ".join( self.frames )}).' )
+
+    def __symbol( self, frame ):
+        # Symbol of a v2 frame (None for frames that are not specific to a symbol).
+        try: message = json.loads( frame )
+        except ValueError: return None
+        return message.get( 'symbol' ) if isinstance( message, dict ) else None
+
+    async def serve( self, host = 'localhost', port = 8765 ):
+        # Serve the recording until cancelled.
+        async with websockets.serve( self.handler, host, port, max_size = None ):
+            logger.info( f'Replaying {self.filename} on ws://{host}:{port} at {"maximum" if self.speed <= 0 else f"{self.speed:g}x"} speed.' )
+            await asyncio.Future()
+
+    async def handler( self, ws ):
+        path = ws.request.path.split( '?' )[0]
+        frames = self.frames.get( path )
+        if frames is None:
+            logger.warning( f'Nothing was recorded on {path}.' )
+            await ws.close( 1008, 'Nothing was recorded on this path.' )
+            return
+
+        # v2 clients choose their symbols by subscribing. v1 paths are already specific to a symbol.
+        symbols = None
+        listener = None
+        if path == '/v2/marketdata':
+            symbols = set()
+            await self.__subscribe( ws, symbols )
+            listener = asyncio.create_task( self.__listen( ws, symbols ) )
+
+        logger.debug( f'Replaying {len( frames ):,} frames on {path} to {ws.remote_address}.' )
+        try:
+            while True:
+                sent = await self.__replay( ws, frames, symbols )
+                logger.debug( f'Replayed {sent:,} frames on {path} to {ws.remote_address}.' )
+                if not self.loop: break
+        except websockets.ConnectionClosed: pass
+        finally:
+            if listener is not None: listener.cancel()
+        await ws.close()
+
+    async def __replay( self, ws, frames, symbols ):
+        started = time.monotonic()
+        sent = 0
+        for elapsed, symbol, frame in frames:
+            if symbols is not None and symbol is not None and symbol not in symbols: continue
+            if self.speed > 0:
+                delay = elapsed / self.speed - ( time.monotonic() - started )
+                if delay > 0: await asyncio.sleep( delay )
+            await ws.send( frame )
+            sent += 1
+        return sent
+
+    async def __subscribe( self, ws, symbols, message = None ):
+        # Add the symbols of a subscription request (waiting for the request when none is given).
+        if message is None: message = await ws.recv()
+        try: request = json.loads( message )
+        except ValueError: return
+        if request.get( 'type' ) != 'subscribe': return
+        for subscription in request.get( 'subscriptions', [] ):
+            symbols.update( symbol.upper() for symbol in subscription.get( 'symbols', [] ) )
+
+    async def __listen( self, ws, symbols ):
+        # Apply subscriptions sent after the replay started.
+        try:
+            async for message in ws: await self.__subscribe( ws, symbols, message )
+        except websockets.ConnectionClosed: pass
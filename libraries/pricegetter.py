@@ -6,7 +6,6 @@
 # library purpose: retrieve market data using the Gemini REST API.
 
 
-import requests
 import json
 
 from decimal import Decimal
@@ -14,7 +13,7 @@ from decimal import Decimal
 from libraries.logger import logger as logger
 from libraries.messenger import sendmessage as sendmessage
 
-import libraries.definer as definer
+import libraries.requester as requester
 import libraries.authenticator as authenticator
 
 def ticker(
@@ -23,7 +22,7 @@ def ticker(
 
     # Get the latest prices and trading volumes.
     endpoint = '/v1/pubticker/' + pair
-    response = requests.get( definer.restserver + endpoint ).json()
+    response = requester.get( endpoint ).json()
 
     # Uncomment to write the response to logs: 
     # logger.debug ( json.dumps( response, sort_keys=True, indent=4, separators=(',', ': ') ) )
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+#
+# library name: profiler.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: sample the stacks of every thread on demand (SIGUSR1) and write them in the collapsed (flamegraph) format.
+
+
+# Note:
+#
+# When a bot falls behind nobody can tell whether the time goes to JSON parsing, Decimal math, logging or network waits.
+# Every entry script calls profileonsignal(). It only installs a SIGUSR1 handler, so an idle profiler costs nothing.
+# Sending the signal (kill -USR1 <pid>) starts a capture in a background (daemon) thread: for definer.profileduration seconds
+# the stacks of every other thread are sampled (sys._current_frames) every definer.profileinterval seconds.
+# Signals received while a capture runs are ignored.
+#
+# The samples are written next to the logs (definer.logdirectory or GEMINI_LOG_DIRECTORY) in the collapsed stack format
+# flamegraph.pl and speedscope read: one line per distinct stack, root first, frames separated by semicolons, then the count:
+#   MainThread;frontrunningtrailingstop.py:<module>;base_events.py:BaseEventLoop.run_until_complete;... 42
+# For example /tmp/frontrunningtrailingstop.20221018-235959.12345.collapsed (the file name is logged).
+# The samples are wall clock samples: threads blocked in recv() or waiting on events are counted too (that is the network wait).
+#
+# Reference: https://github.com/brendangregg/FlameGraph#2-fold-stacks
+
+
+import os
+import sys
+import time
+import signal
+import datetime
+import threading
+
+from collections import Counter
+
+from libraries.logger import logger as logger
+from libraries.logger import script as script
+from libraries.logger import logdirectory as logdirectory
+
+import libraries.definer as definer
+
+# Capture in progress (None when idle).
+capture = None
+
+def collapse(
+        frame: object,
+        threadname: str
+    ) -> str:
+
+    # The stack of a frame (root first) as semicolon separated "file:function" frames under the thread's name.
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append( f'{os.path.basename( code.co_filename )}:{getattr( code, "co_qualname", code.co_name )}'.replace( ';', ':' ).replace( ' ', '_' ) )
+        frame = frame.f_back
+    frames.append( threadname.replace( ';', ':' ).replace( ' ', '_' ) )
+    return ';'.join( reversed( frames ) )
+
+def sample(
+        duration: float = None,
+        interval: float = None
+    ) -> Counter:
+
+    # Sample the stacks of every thread except the calling one for the duration specified. Return the counts by collapsed stack.
+    duration = definer.profileduration if duration is None else duration
+    interval = definer.profileinterval if interval is None else interval
+    ownid = threading.get_ident()
+    stacks = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        names = { thread.ident: thread.name for thread in threading.enumerate() }
+        for threadid, frame in sys._current_frames().items():
+            if threadid == ownid: continue
+            stacks[ collapse( frame, names.get( threadid, f'thread-{threadid}' ) ) ] += 1
+        del frame
+        time.sleep( interval )
+    return stacks
+
+def profile(
+        duration: float = None,
+        interval: float = None
+    ) -> str:
+
+    # Function Description:
+    #  1. Sample every thread's stack for the duration specified (definer.profileduration by default).
+    #  2. Write the collapsed stacks next to the logs. Return the file name.
+    #
+    # Execution:
+    #   - from libraries.profiler import profile
+    #   - profile( 10 )
+    started = datetime.datetime.now()
+    stacks = sample( duration, interval )
+    filename = os.path.join( logdirectory, f'{script[0]}.{started:%Y%m%d-%H%M%S}.{os.getpid()}.collapsed' )
+    with open( filename, 'w' ) as collapsed:
+        for stack, count in stacks.most_common(): collapsed.write( f'{stack} {count}\n' )
+    logger.info( f'Profiled {sum( stacks.values() ):,} stack samples ({len( stacks ):,} distinct stacks) to {filename}.' )
+    return filename
+
+def capturing():
+    global capture
+    try: profile()
+    except Exception as e: logger.error( f'Unable to profile: {e}' )
+    finally: capture = None
+
+def onsignal( signum, frame ):
+    # Start a capture (unless one is running). Nothing else happens in the signal handler.
+    global capture
+    if capture is not None: return
+    capture = threading.Thread( target = capturing, name = 'stack-profiler', daemon = True )
+    capture.start()
+
+def profileonsignal(
+        signum: int = None
+    ) -> bool:
+
+    # Install the signal handler that starts a capture (SIGUSR1 by default). Call it from the main thread of entry scripts.
+    # Return False where the signal is not available (or the caller is not the main thread).
+    signum = signum or getattr( signal, 'SIGUSR1', None )
+    if signum is None: return False
+    try: signal.signal( signum, onsignal )
+    except ValueError as e:
+        logger.debug( f'Unable to install the profiler signal handler: {e}' )
+        return False
+    return True
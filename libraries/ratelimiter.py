@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+#
+# library name: ratelimiter.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: pace Gemini REST API requests with process wide token buckets instead of fixed sleeps.
+
+
+# Note:
+#
+# Gemini limits public API requests to 120 per minute and private API requests to 600 per minute.
+# Reference: https://docs.gemini.com/rest-api/#rate-limits
+#
+# Each bucket holds up to "burst" tokens and refills at "rate" tokens per second. A request takes one token.
+# Requests pass immediately while tokens remain and otherwise wait exactly until the next token is available.
+# When the server answers HTTP 429 the bucket is emptied and blocked for the Retry-After period.
+# The buckets (and the endpoints assigned to them) are configured in definer.ratelimits and definer.ratelimitedendpoints.
+# Websocket reconnections are paced by a Backoff (capped exponential delays with jitter, see definer.reconnectdelay),
+# so a dropped or refused connection is not retried in a tight loop that trips Gemini's connection limits.
+# When metrics are enabled (exporter.py) the time every request waited and the HTTP 429 penalties are recorded per bucket.
+
+
+import time
+import random
+import asyncio
+import threading
+
+import libraries.definer as definer
+import libraries.exporter as exporter
+
+class Tokenbucket:
+
+    # Class Description:
+    #  1. Refill tokens continuously at the configured rate (up to the burst size).
+    #  2. Hand out one token per request, returning how long the caller must wait for it.
+    #  3. Block the bucket after HTTP 429 (Too Many Requests) responses.
+    #
+    # Execution:
+    #   - from libraries.ratelimiter import Tokenbucket
+    #   - bucket = Tokenbucket( rate = 5, burst = 10, name = 'private' )
+    #   - bucket.acquire()
+
+    def __init__( self, rate, burst, name = 'unnamed' ):
+        self.name = name
+        self.rate = float( rate )
+        self.burst = float( burst )
+        self.__tokens = float( burst )
+        self.__updated = time.monotonic()
+        self.__blockeduntil = 0.0
+        self.__lock = threading.Lock()
+
+    def reserve( self ) -> float:
+        # Take a token (possibly one that has not been refilled yet). Return the seconds to wait before using it.
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min( self.burst, self.__tokens + ( now - self.__updated ) * self.rate )
+            self.__updated = now
+            self.__tokens -= 1
+            delay = 0.0 if self.__tokens >= 0 else -self.__tokens / self.rate
+            return max( delay, self.__blockeduntil - now )
+
+    def acquire( self ) -> float:
+        # Block the calling thread until a token is available. Return the seconds waited.
+        delay = self.reserve()
+        if exporter.enabled: exporter.ratelimitwaits.observe( max( delay, 0.0 ), self.name )
+        if delay > 0: time.sleep( delay )
+        return delay
+
+    async def acquireasync( self ) -> float:
+        # Await (without blocking the event loop) until a token is available. Return the seconds waited.
+        delay = self.reserve()
+        if exporter.enabled: exporter.ratelimitwaits.observe( max( delay, 0.0 ), self.name )
+        if delay > 0: await asyncio.sleep( delay )
+        return delay
+
+    def penalize( self, retryafter ) -> None:
+        # Empty the bucket and block it for the period the server asked for.
+        if exporter.enabled: exporter.ratelimitpenalties.inc( self.name )
+        with self.__lock:
+            self.__tokens = min( self.__tokens, 0.0 )
+            self.__blockeduntil = max( self.__blockeduntil, time.monotonic() + float( retryafter ) )
+
+class Backoff:
+
+    # Class Description:
+    #  1. Delay reconnection attempts exponentially (definer.reconnectdelay doubling up to definer.reconnectmaxdelay) with jitter.
+    #  2. Start over from the initial delay once a connection stayed up for definer.reconnecthealthy seconds.
+    #
+    # Execution:
+    #   - from libraries.ratelimiter import Backoff
+    #   - backoff = Backoff()
+    #   - while True:
+    #   -     try: ws = create_connection( endpoint ) ; backoff.connected() ; ...
+    #   -     except Exception: backoff.wait()
+
+    def __init__( self, delay = None, maximum = None, healthy = None ):
+        self.delay = float( definer.reconnectdelay if delay is None else delay )
+        self.maximum = float( definer.reconnectmaxdelay if maximum is None else maximum )
+        self.healthy = float( definer.reconnecthealthy if healthy is None else healthy )
+        self.attempts = 0
+        self.__connectedat = None
+
+    def connected( self ) -> None:
+        # Record that a connection was established (the delay is reset if it stays up long enough).
+        self.__connectedat = time.monotonic()
+
+    def next( self ) -> float:
+        # Seconds to wait before the next attempt.
+        if self.__connectedat is not None and time.monotonic() - self.__connectedat >= self.healthy: self.attempts = 0
+        self.__connectedat = None
+        delay = min( self.maximum, self.delay * 2 ** min( self.attempts, 32 ) )
+        self.attempts += 1
+        return delay - random.uniform( 0, delay / 2 )
+
+    def wait( self ) -> float:
+        # Block the calling thread until the next attempt. Return the seconds waited.
+        delay = self.next()
+        time.sleep( delay )
+        return delay
+
+# Process wide buckets (one per name configured in definer.ratelimits).
+buckets = { name: Tokenbucket( rate, burst, name ) for name, ( rate, burst ) in definer.ratelimits.items() }
+
+def bucket(
+        endpoint: str
+    ) -> Tokenbucket:
+
+    # Endpoints listed in definer.ratelimitedendpoints use their own bucket.
+    # Otherwise public market data endpoints share the "public" bucket and everything else uses the "private" bucket.
+    for prefix, name in definer.ratelimitedendpoints.items():
+        if endpoint.startswith( prefix ): return buckets[ name ]
+    return buckets[ 'private' ]
+
+def retryafter(
+        headers: dict
+    ) -> float:
+
+    # Read the Retry-After header of an HTTP 429 response (defaulting to one second).
+    try: return float( headers.get( 'Retry-After', 1 ) )
+    except ( TypeError, ValueError ): return 1.0
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+#
+# library name: recorder.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: capture raw Gemini marketdata websocket frames (v1 and v2) with timestamps to a compressed file.
+
+
+# Note:
+#
+# The monitors can only be exercised against live Gemini sockets. A recording captures what they receive so it can be
+# replayed offline (player.py) at real time, accelerated or maximum speed for deterministic benchmarks.
+#
+# A recording is gzip compressed JSON Lines. Every line is one frame:
+#   { "time": seconds since the recording started, "path": the endpoint it was received on, "frame": the raw frame }
+# For example: { "time": 0.5123, "path": "/v2/marketdata", "frame": "{\"type\":\"trade\",\"symbol\":\"BTCUSD\",...}" }
+# Frames are stored exactly as received (their Decimal strings are never parsed), so the replay is byte for byte identical.
+#
+# Endpoints:
+#  - '/v2/marketdata' subscribes to the l2 feed (L2 updates and trades) of every symbol recorded on one connection.
+#  - '/v1/marketdata/<symbol>' opens one connection per symbol.
+# Reference: https://docs.gemini.com/websocket-api/#market-data-version-2
+
+
+import gzip
+import json
+import time
+import asyncio
+
+import websockets
+
+from libraries.logger import logger as logger
+
+import libraries.definer as definer
+
+def subscriptionrequest(
+        symbols: list
+    ) -> str:
+
+    # v2 marketdata l2 subscription (the same request the multiplexer sends).
+    return json.dumps( { 'type': 'subscribe', 'subscriptions': [ { 'name': 'l2', 'symbols': [ symbol.upper() for symbol in symbols ] } ] } )
+
+async def capture(
+        path: str,
+        symbols: list,
+        frames: asyncio.Queue,
+        started: float,
+        server: str = None
+    ) -> None:
+
+    # Receive frames on one endpoint and enqueue them (with the time they arrived) until cancelled.
+    # Dropped connections are reestablished (the gap shows in the timestamps).
+    while True:
+        try:
+            connection = ( server or definer.sockserver ) + path
+            async with websockets.connect( connection, max_size = None ) as ws:
+                logger.info( f'Recording {connection}.' )
+                if path == '/v2/marketdata': await ws.send( subscriptionrequest( symbols ) )
+                async for frame in ws:
+                    if isinstance( frame, bytes ): frame = frame.decode()
+                    frames.put_nowait( ( time.monotonic() - started, path, frame ) )
+        except asyncio.CancelledError: raise
+        except Exception as e:
+            logger.warning( f'Recording connection to {path} dropped: {e}. Reconnecting...' )
+            await asyncio.sleep( 1 )
+
+async def record(
+        filename: str,
+        symbols: list,
+        endpoints: list = ( '/v2/marketdata', ),
+        duration: float = 60,
+        server: str = None
+    ) -> int:
+
+    # Function Description:
+    #  1. Connect to every endpoint specified ('/v2/marketdata' and/or '/v1/marketdata') for the symbols specified.
+    #  2. Write every frame received (with the seconds since the recording started) to a gzip compressed JSON Lines file.
+    #  3. Stop after the duration specified (in seconds). Return the number of frames recorded.
+    #
+    # Execution:
+    #   - from libraries.recorder import record
+    #   - asyncio.run( record( '/tmp/marketdata.jsonl.gz', [ 'BTCUSD', 'ETHUSD' ], duration = 600 ) )
+
+    paths = []
+    for endpoint in endpoints:
+        if endpoint.startswith( '/v1/marketdata' ): paths += [ f'/v1/marketdata/{symbol.upper()}' for symbol in symbols ]
+        else: paths.append( endpoint )
+
+    frames = asyncio.Queue()
+    started = time.monotonic()
+    tasks = [ asyncio.create_task( capture( path, symbols, frames, started, server ) ) for path in paths ]
+    recorded = 0
+    with gzip.open( filename, 'wt', compresslevel = 6 ) as recording:
+        try:
+            while True:
+                remaining = duration - ( time.monotonic() - started )
+                if remaining <= 0: break
+                try: elapsed, path, frame = await asyncio.wait_for( frames.get(), timeout = remaining )
+                except asyncio.TimeoutError: break
+                recording.write( json.dumps( { 'time': round( elapsed, 6 ), 'path': path, 'frame': frame }, separators = ( ',', ':' ) ) + '\n' )
+                recorded += 1
+        finally:
+            for task in tasks: task.cancel()
+            await asyncio.gather( *tasks, return_exceptions = True )
+    logger.info( f'Recorded {recorded:,} frames in {filename}.' )
+    return recorded
+
+def readrecording(
+        filename: str,
+        path: str = None
+    ) -> object:
+
+    # Yield the ( time, path, frame ) tuples of a recording (only those received on the path specified, when specified).
+    with gzip.open( filename, 'rt' ) if filename.endswith( '.gz' ) else open( filename ) as recording:
+        for line in recording:
+            if not line.strip(): continue
+            entry = json.loads( line )
+            if path is None or entry['path'] == path: yield entry['time'], entry['path'], entry['frame']
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+#
+# library name: requester.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: route every Gemini REST API request through one pooled, keep-alive HTTP session.
+
+
+# Note:
+#
+# Bare requests.get() and requests.post() calls open (and tear down) a fresh TCP connection and TLS session
+# every time. A shared requests.Session keeps connections to the REST server alive between calls, so order
+# submission and cancel/replace requests reuse warm connections. The pool size and timeouts are set in definer.
+# Every request takes a token from the rate limiter bucket assigned to its endpoint before it is sent.
+# Private requests are signed (with a fresh nonce) only once that token is held. Threads waiting on a bucket can be
+# released in any order, so a nonce taken before waiting could reach Gemini after a larger one (InvalidNonce).
+# When metrics are enabled (exporter.py) the round trip time and the status of every response are recorded per endpoint.
+
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+import libraries.definer as definer
+import libraries.exporter as exporter
+import libraries.ratelimiter as ratelimiter
+import libraries.authenticator as authenticator
+
+from libraries.journaler import journal as journal
+from libraries.noncegenerator import nonce as nonce
+
+# Order submissions and cancellations are journaled (with the server's response).
+journaledendpoints = ( '/v1/order/new', '/v1/order/cancel' )
+
+def createsession() -> requests.Session:
+
+    # Build a session whose connection pool is sized by definer.restpoolconnections and definer.restpoolsize.
+    # Retries are left to the callers (they know whether a request is safe to repeat).
+    adapter = HTTPAdapter( pool_connections = definer.restpoolconnections, pool_maxsize = definer.restpoolsize, max_retries = 0 )
+    session = requests.Session()
+    session.mount( 'https://', adapter )
+    session.mount( 'http://', adapter )
+    return session
+
+# Shared (process wide) session.
+session = createsession()
+
+def get(
+        endpoint: str,
+        server: str = None
+    ) -> requests.Response:
+
+    # Public (unauthenticated) request (sent to definer.restserver unless another server is specified).
+    # Public requests are safe to repeat. So on HTTP 429 wait exactly as long as the server asks and try again.
+    bucket = ratelimiter.bucket( endpoint )
+    while True:
+        bucket.acquire()
+        if exporter.enabled:
+            with exporter.restlatency.time( endpoint, 'get' ): response = session.get( ( server or definer.restserver ) + endpoint, timeout = definer.resttimeout )
+            exporter.restresponses.inc( endpoint, response.status_code )
+        else: response = session.get( ( server or definer.restserver ) + endpoint, timeout = definer.resttimeout )
+        if response.status_code != 429: return response
+        bucket.penalize( ratelimiter.retryafter( response.headers ) )
+
+def post(
+        endpoint: str,
+        payload: dict
+    ) -> requests.Response:
+
+    # Private (authenticated) request. The payload (without a nonce) is signed once a token is held and travels in the headers.
+    # The payload carries a nonce. So on HTTP 429 the caller resubmits (and the blocked bucket makes it wait).
+    bucket = ratelimiter.bucket( endpoint )
+    bucket.acquire()
+    headers = authenticator.authenticate( dict( payload, nonce = nonce() ), 'restheader' )['restheader']
+    if exporter.enabled:
+        with exporter.restlatency.time( endpoint, 'post' ): response = session.post( definer.restserver + endpoint, data = None, headers = headers, timeout = definer.resttimeout )
+        exporter.restresponses.inc( endpoint, response.status_code )
+    else: response = session.post( definer.restserver + endpoint, data = None, headers = headers, timeout = definer.resttimeout )
+    if response.status_code == 429: bucket.penalize( ratelimiter.retryafter( response.headers ) )
+    if endpoint in journaledendpoints:
+        try: journal.record( 'order', endpoint = endpoint, response = response.json() )
+        except ValueError: journal.record( 'order', endpoint = endpoint, response = response.text )
+    return response
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+#
+# library name: simulator.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: simulate the Gemini REST and websocket APIs locally (with a matching engine) for offline load tests.
+
+
+# Note:
+#
+# Order entry and fill handling cannot be load tested against Gemini without risking money (or sandbox flakiness).
+# The simulator serves the subset of the API the libraries use from one local aiohttp server (pip3 install aiohttp):
+#  - REST: /v1/order/new, /v1/order/cancel, /v1/order/status, /v1/notionalvolume, /v1/pubticker/<symbol> and /v1/symbols/details/<symbol>.
+#  - websockets: /v1/order/events, /v2/marketdata and /v1/marketdata/<symbol>.
+#  - a Discord webhook stand-in: /webhook (point messenger.dispatcher.webhook at it to keep alerts local).
+# Point definer.restserver at 'http://127.0.0.1:<port>' and definer.sockserver at 'ws://127.0.0.1:<port>' to use it.
+#
+# The market is either a random walk (a book of definer.simulatordepth levels a side moved every definer.simulatorinterval
+# seconds with trades printing at the touch) or a recording made by recorder.py (its v2 frames drive the book and the trades).
+#
+# The matching engine handles "exchange limit" orders (with the "maker-or-cancel" and "immediate-or-cancel" options) and
+# "exchange stop limit" orders:
+#  - marketable orders take liquidity from the simulated book (walking its levels up to the limit price),
+#  - resting orders are filled (as makers) when a market trade prints at or through their price,
+#  - stop limit orders become limit orders when a market trade prints at or through their stop price.
+# Order events (accepted, booked, fill, cancelled and closed) are published on /v1/order/events in Gemini's format.
+#
+# Payloads are decoded from the X-GEMINI-PAYLOAD header and nonces must increase (per API key) as they must on Gemini.
+# Signatures are not verified. Every REST response and websocket frame is delayed by definer.simulatorlatency seconds
+# (plus up to definer.simulatorjitter seconds at random) to reproduce network round trips.
+# Reference: https://docs.gemini.com/rest-api/#new-order
+
+
+import json
+import time
+import base64
+import random
+import asyncio
+import itertools
+
+from decimal import Decimal
+
+from aiohttp import web, WSMsgType
+
+from libraries.logger import logger as logger
+from libraries.bookkeeper import Orderbook
+from libraries.recorder import readrecording
+
+import libraries.definer as definer
+
+# Fees reported by /v1/notionalvolume and charged on fills (in basis points).
+makerfeebps = 10
+takerfeebps = 35
+
+class Subscriber:
+
+    # Class Description:
+    #     A websocket client. Frames are queued and sent in order by a task, each one no earlier than the latency injected.
+
+    def __init__( self, ws, delay, symbols = None, eventtypes = None ):
+        self.ws = ws
+        self.delay = delay
+        self.symbols = symbols
+        self.eventtypes = eventtypes
+        self.__frames = asyncio.Queue()
+        self.__due = 0.0
+        self.__task = asyncio.create_task( self.__run() )
+
+    def send( self, frame ):
+        # Frames are never reordered (a frame is due no earlier than the frame before it).
+        self.__due = max( self.__due, time.monotonic() + self.delay() )
+        self.__frames.put_nowait( ( self.__due, frame ) )
+
+    def close( self ):
+        self.__task.cancel()
+
+    async def __run( self ):
+        while True:
+            due, frame = await self.__frames.get()
+            pause = due - time.monotonic()
+            if pause > 0: await asyncio.sleep( pause )
+            try: await self.ws.send_str( frame )
+            except Exception: return
+
+class Exchangesimulator:
+
+    # Class Description:
+    #  1. Simulate a market for every symbol (a random walk or a recording) and publish it on the marketdata websockets.
+    #  2. Accept, match, cancel and report orders through the REST API.
+    #  3. Publish the order events on the order events websocket.
+    #  4. Delay responses and frames by the latency configured.
+    #
+    # Execution:
+    #   - from libraries.simulator import Exchangesimulator
+    #   - simulator = Exchangesimulator( { 'BTCUSD': '20000', 'ETHUSD': '1500' } )
+    #   - asyncio.run( simulator.serve( '127.0.0.1', 8780 ) )
+
+    def __init__( self, prices, recording = None, latency = None, jitter = None, seed = None ):
+        self.prices = { symbol.upper(): Decimal( str( price ) ) for symbol, price in prices.items() }
+        self.recording = recording
+        self.latency = float( definer.simulatorlatency if latency is None else latency )
+        self.jitter = float( definer.simulatorjitter if jitter is None else jitter )
+        self.random = random.Random( seed )
+        self.books = { symbol: Orderbook( symbol ) for symbol in self.prices }
+        self.last = dict( self.prices )
+        self.volume = Decimal( 0 )
+        self.alerts = 0
+        self.orders = {}
+        self.__stops = []
+        self.__resting = []
+        self.__nonces = {}
+        self.__orderids = itertools.count( 100000000 )
+        self.__eventids = itertools.count( 1 )
+        self.__sequence = itertools.count( 0 )
+        self.__marketdata = []
+        self.__orderevents = []
+
+    def delay( self ):
+        # Latency injected into one response or frame.
+        return self.latency + ( self.random.uniform( 0, self.jitter ) if self.jitter else 0.0 )
+
+    def application( self ):
+        app = web.Application()
+        app.router.add_post( '/v1/order/new', self.neworder )
+        app.router.add_post( '/v1/order/cancel', self.cancelorder )
+        app.router.add_post( '/v1/order/status', self.orderstatus )
+        app.router.add_post( '/v1/notionalvolume', self.notionalvolume )
+        app.router.add_get( '/v1/pubticker/{symbol}', self.pubticker )
+        app.router.add_get( '/v1/symbols/details/{symbol}', self.symboldetails )
+        app.router.add_get( '/v1/order/events', self.orderevents )
+        app.router.add_get( '/v2/marketdata', self.marketdatav2 )
+        app.router.add_get( '/v1/marketdata/{symbol}', self.marketdatav1 )
+        app.router.add_post( '/webhook', self.webhook )
+        return app
+
+    async def serve( self, host = '127.0.0.1', port = 8780 ):
+        # Serve the API and run the market until cancelled.
+        runner = web.AppRunner( self.application() )
+        await runner.setup()
+        await web.TCPSite( runner, host, port ).start()
+        logger.info( f'Simulating Gemini on http://{host}:{port} ({", ".join( self.prices )}) with {self.latency * 1000:g} ms latency.' )
+        try: await ( self.replay() if self.recording else self.randomwalk() )
+        finally: await runner.cleanup()
+
+    # Market.
+
+    async def randomwalk( self ):
+        # Move the mid price of every symbol at random and rebuild its book around it. Print trades at the touch.
+        depth = definer.simulatordepth
+        while True:
+            for symbol in self.prices:
+                tick = self.__instrument( symbol ).tick
+                mid = self.prices[ symbol ] * Decimal( 1 + self.random.gauss( 0, definer.simulatorvolatility ) )
+                self.prices[ symbol ] = mid
+                spacing = max( tick, ( mid * Decimal( '0.0001' ) ).quantize( tick ) )
+                bid = ( mid - spacing / 2 ).quantize( tick )
+                levels = { ( 'buy', bid - spacing * index ): self.__quantity( symbol ) for index in range( depth ) }
+                levels.update( { ( 'sell', bid + spacing * ( index + 1 ) ): self.__quantity( symbol ) for index in range( depth ) } )
+                book = self.books[ symbol ]
+                changes = [ [ 'buy', price, Decimal( 0 ) ] for price, _ in book.bids( depth * 2 ) if ( 'buy', price ) not in levels ]
+                changes += [ [ 'sell', price, Decimal( 0 ) ] for price, _ in book.asks( depth * 2 ) if ( 'sell', price ) not in levels ]
+                changes += [ [ side, price, quantity ] for ( side, price ), quantity in levels.items() ]
+                trades = []
+                if self.random.random() < 0.5:
+                    side = self.random.choice( [ 'buy', 'sell' ] )
+                    trades.append( ( side, bid + spacing if side == 'buy' else bid, self.__quantity( symbol ) ) )
+                self.market( symbol, changes, trades )
+            await asyncio.sleep( definer.simulatorinterval )
+
+    async def replay( self ):
+        # Drive the market with the v2 frames of a recording (paced by their timestamps).
+        started = time.monotonic()
+        for elapsed, _, frame in readrecording( self.recording, '/v2/marketdata' ):
+            message = json.loads( frame )
+            symbol = message.get( 'symbol' ) if isinstance( message, dict ) else None
+            if symbol not in self.books: continue
+            pause = elapsed - ( time.monotonic() - started )
+            if pause > 0: await asyncio.sleep( pause )
+            if message.get( 'type' ) == 'l2_updates':
+                changes = [ [ side, Decimal( price ), Decimal( quantity ) ] for side, price, quantity in message['changes'] ]
+                self.market( symbol, changes, [] )
+            elif message.get( 'type' ) == 'trade':
+                self.market( symbol, [], [ ( message['side'], Decimal( message['price'] ), Decimal( message['quantity'] ) ) ] )
+        logger.info( f'Finished replaying {self.recording}.' )
+        await asyncio.Future()
+
+    def market( self, symbol, changes, trades ):
+        # Apply book changes and trades ( taker side, price, quantity ) to a symbol, publish them and match the orders.
+        book = self.books[ symbol ]
+        book.apply( changes )
+        book.ready.set()
+        self.__publish( symbol, changes, trades )
+        for side, price, quantity in trades:
+            self.last[ symbol ] = price
+            self.__match( symbol, price, quantity )
+
+    # REST API.
+
+    async def neworder( self, request ):
+        payload, error = await self.__payload( request )
+        if error: return error
+        try:
+            symbol = payload['symbol'].upper()
+            side = payload['side']
+            amount = Decimal( str( payload['amount'] ) )
+            price = Decimal( str( payload['price'] ) )
+            ordertype = payload.get( 'type', 'exchange limit' )
+            stop = Decimal( str( payload['stop_price'] ) ) if ordertype == 'exchange stop limit' else None
+        except ( KeyError, ArithmeticError ) as e: return self.__error( 'InvalidOrder', f'Invalid order: {e}' )
+        if symbol not in self.books: return self.__error( 'InvalidSymbol', f'Invalid symbol: {symbol.lower()}' )
+        if side not in ( 'buy', 'sell' ): return self.__error( 'InvalidSide', f'Invalid side: {side}' )
+        if amount <= 0 or price <= 0: return self.__error( 'InvalidQuantity', 'Invalid quantity or price.' )
+        if stop is not None and ( stop < price if side == 'sell' else stop > price ):
+            return self.__error( 'InvalidStopPrice', 'Sell stop prices must be above the limit price (buy stop prices below it).' )
+
+        now = time.time()
+        order = {
+            'order_id': str( next( self.__orderids ) ),
+            'symbol': symbol.lower(),
+            'exchange': 'gemini',
+            'avg_execution_price': '0.00',
+            'side': side,
+            'type': ordertype,
+            'timestamp': str( int( now ) ),
+            'timestampms': int( now * 1000 ),
+            'is_live': True,
+            'is_cancelled': False,
+            'is_hidden': False,
+            'was_forced': False,
+            'executed_amount': '0',
+            'remaining_amount': str( amount ),
+            'options': list( payload.get( 'options', [] ) ),
+            'price': str( price ),
+            'original_amount': str( amount )
+        }
+        if stop is not None: order['stop_price'] = str( stop )
+        if 'client_order_id' in payload: order['client_order_id'] = payload['client_order_id']
+        order['id'] = order['order_id']
+        self.orders[ order['order_id'] ] = order
+        self.__event( order, 'accepted' )
+
+        if stop is not None:
+            self.__stops.append( order['order_id'] )
+            self.__event( order, 'booked' )
+        else: self.__submit( order )
+        return self.__respond( order )
+
+    async def cancelorder( self, request ):
+        payload, error = await self.__payload( request )
+        if error: return error
+        order = self.orders.get( str( payload.get( 'order_id' ) ) )
+        if order is None: return self.__error( 'OrderNotFound', f'Order {payload.get( "order_id" )} not found.' )
+        if order['is_live']: self.__cancel( order, 'Requested' )
+        return self.__respond( order )
+
+    async def orderstatus( self, request ):
+        payload, error = await self.__payload( request )
+        if error: return error
+        order = self.orders.get( str( payload.get( 'order_id' ) ) )
+        if order is None: return self.__error( 'OrderNotFound', f'Order {payload.get( "order_id" )} not found.' )
+        return self.__respond( order )
+
+    async def notionalvolume( self, request ):
+        _, error = await self.__payload( request )
+        if error: return error
+        return self.__respond( {
+            'date': time.strftime( '%Y-%m-%d' ),
+            'last_updated_ms': int( time.time() * 1000 ),
+            'web_maker_fee_bps': 25,
+            'web_taker_fee_bps': 35,
+            'web_auction_fee_bps': 25,
+            'api_maker_fee_bps': makerfeebps,
+            'api_taker_fee_bps': takerfeebps,
+            'api_auction_fee_bps': makerfeebps,
+            'fix_maker_fee_bps': makerfeebps,
+            'fix_taker_fee_bps': takerfeebps,
+            'fix_auction_fee_bps': makerfeebps,
+            'notional_30d_volume': float( self.volume ),
+            'notional_1d_volume': [ { 'date': time.strftime( '%Y-%m-%d' ), 'notional_volume': float( self.volume ) } ]
+        } )
+
+    async def pubticker( self, request ):
+        await asyncio.sleep( self.delay() )
+        symbol = request.match_info['symbol'].upper()
+        book = self.books.get( symbol )
+        if book is None: return self.__error( 'InvalidSymbol', f'Invalid symbol: {symbol.lower()}' )
+        instrument = self.__instrument( symbol )
+        return self.__respond( {
+            'bid': str( book.bestbid() ),
+            'ask': str( book.bestask() ),
+            'last': str( self.last[ symbol ] ),
+            'volume': { instrument.base: '0', instrument.quote: '0', 'timestamp': int( time.time() * 1000 ) }
+        } )
+
+    async def symboldetails( self, request ):
+        await asyncio.sleep( self.delay() )
+        symbol = request.match_info['symbol'].upper()
+        instrument = self.__instrument( symbol )
+        return self.__respond( {
+            'symbol': symbol,
+            'base_currency': instrument.base,
+            'quote_currency': instrument.quote,
+            'tick_size': float( instrument.minimumquantity ),
+            'quote_increment': float( instrument.tick ),
+            'min_order_size': str( instrument.minimumorder ),
+            'status': 'open' if symbol in self.books else 'closed'
+        } )
+
+    async def webhook( self, request ):
+        # Accept (and count) alerts like a Discord webhook does.
+        await request.read()
+        self.alerts += 1
+        return web.Response( status = 204 )
+
+    # Websockets.
+
+    async def orderevents( self, request ):
+        ws = web.WebSocketResponse( heartbeat = None )
+        await ws.prepare( request )
+        symbols = { symbol.upper() for symbol in request.query.getall( 'symbolFilter', [] ) } or None
+        eventtypes = set( request.query.getall( 'eventTypeFilter', [] ) ) or None
+        subscriber = Subscriber( ws, self.delay, symbols, eventtypes )
+        subscriber.send( json.dumps( {
+            'type': 'subscription_ack',
+            'accountId': 1,
+            'subscriptionId': f'ws-order-events-{id( subscriber )}',
+            'symbolFilter': sorted( symbols or [] ),
+            'apiSessionFilter': [],
+            'eventTypeFilter': sorted( eventtypes or [] )
+        } ) )
+        initial = [ self.__eventdict( order, 'initial' ) for order in self.orders.values() if order['is_live'] and self.__wants( subscriber, order, 'initial' ) ]
+        if eventtypes is None or 'initial' in eventtypes: subscriber.send( json.dumps( initial ) )
+        self.__orderevents.append( subscriber )
+        try:
+            # Heartbeat every five seconds (as Gemini does) until the client disconnects.
+            sequence = itertools.count( 0 )
+            while not ws.closed:
+                try: await ws.receive( timeout = 5 )
+                except asyncio.TimeoutError:
+                    sent = next( sequence )
+                    subscriber.send( f'{{"type":"heartbeat","timestampms":{int( time.time() * 1000 )},"sequence":{sent},"trace_id":"simulator","socket_sequence":{sent}}}' )
+        finally:
+            self.__orderevents.remove( subscriber )
+            subscriber.close()
+        return ws
+
+    async def marketdatav2( self, request ):
+        ws = web.WebSocketResponse( heartbeat = None )
+        await ws.prepare( request )
+        subscriber = Subscriber( ws, self.delay, set() )
+        self.__marketdata.append( subscriber )
+        try:
+            # Heartbeat every five seconds (as Gemini does) until the client disconnects.
+            while not ws.closed:
+                try: message = await ws.receive( timeout = 5 )
+                except asyncio.TimeoutError:
+                    subscriber.send( f'{{"type":"heartbeat","timestamp":{int( time.time() * 1000 )}}}' )
+                    continue
+                if message.type in ( WSMsgType.CLOSE, WSMsgType.CLOSING, WSMsgType.CLOSED, WSMsgType.ERROR ): break
+                if message.type != WSMsgType.TEXT: continue
+                try: subscription = json.loads( message.data )
+                except ValueError: continue
+                if subscription.get( 'type' ) != 'subscribe': continue
+                for symbols in [ item.get( 'symbols', [] ) for item in subscription.get( 'subscriptions', [] ) ]:
+                    for symbol in [ symbol.upper() for symbol in symbols if symbol.upper() in self.books ]:
+                        # The first l2_updates message of a subscription is a snapshot of the book.
+                        book = self.books[ symbol ]
+                        changes = [ [ 'buy', price, quantity ] for price, quantity in book.bids( 1000 ) ]
+                        changes += [ [ 'sell', price, quantity ] for price, quantity in book.asks( 1000 ) ]
+                        subscriber.send( self.__l2update( symbol, changes ) )
+                        subscriber.symbols.add( symbol )
+        finally:
+            self.__marketdata.remove( subscriber )
+            subscriber.close()
+        return ws
+
+    async def marketdatav1( self, request ):
+        ws = web.WebSocketResponse( heartbeat = None )
+        await ws.prepare( request )
+        symbol = request.match_info['symbol'].upper()
+        if symbol not in self.books:
+            await ws.close( code = 1008, message = b'Invalid symbol.' )
+            return ws
+        subscriber = Subscriber( ws, self.delay, None )
+        subscriber.symbol = symbol
+        book = self.books[ symbol ]
+        changes = [ [ 'buy', price, quantity ] for price, quantity in book.bids( 1000 ) ] + [ [ 'sell', price, quantity ] for price, quantity in book.asks( 1000 ) ]
+        subscriber.send( self.__v1update( changes, [], 'initial' ) )
+        self.__marketdata.append( subscriber )
+        try:
+            async for _ in ws: pass
+        finally:
+            self.__marketdata.remove( subscriber )
+            subscriber.close()
+        return ws
+
+    # Matching engine.
+
+    def __submit( self, order ):
+        # Take liquidity from the simulated book up to the limit price, then rest, cancel or close the order.
+        symbol = order['symbol'].upper()
+        book = self.books[ symbol ]
+        price = Decimal( order['price'] )
+        levels = book.asks( 1000 ) if order['side'] == 'buy' else book.bids( 1000 )
+        marketable = [ ( level, quantity ) for level, quantity in levels if ( level <= price if order['side'] == 'buy' else level >= price ) ]
+        if marketable and 'maker-or-cancel' in order['options']:
+            self.__cancel( order, 'MakerOrCancelWouldTake' )
+            return
+
+        changes = []
+        trades = []
+        for level, quantity in marketable:
+            remaining = Decimal( order['remaining_amount'] )
+            if remaining <= 0: break
+            amount = min( remaining, quantity )
+            changes.append( [ 'sell' if order['side'] == 'buy' else 'buy', level, quantity - amount ] )
+            trades.append( ( order['side'], level, amount ) )
+            self.__fill( order, level, amount, 'Taker' )
+        if changes:
+            book.apply( changes )
+            self.__publish( symbol, changes, trades )
+            self.last[ symbol ] = trades[-1][1]
+
+        if not order['is_live']: return
+        if 'immediate-or-cancel' in order['options']: self.__cancel( order, 'ImmediateOrCancelWouldPost' )
+        else:
+            self.__resting.append( order['order_id'] )
+            self.__event( order, 'booked' )
+
+    def __match( self, symbol, price, quantity ):
+        # A market trade printed: trigger stop orders and fill resting orders at or through it.
+        for orderid in list( self.__stops ):
+            order = self.orders[ orderid ]
+            if order['symbol'].upper() != symbol or not order['is_live']: continue
+            stop = Decimal( order['stop_price'] )
+            if ( price <= stop ) if order['side'] == 'sell' else ( price >= stop ):
+                self.__stops.remove( orderid )
+                self.__submit( order )
+        for orderid in list( self.__resting ):
+            order = self.orders[ orderid ]
+            if order['symbol'].upper() != symbol or not order['is_live']: continue
+            limit = Decimal( order['price'] )
+            through = price < limit if order['side'] == 'buy' else price > limit
+            if through or price == limit:
+                # Trades through the limit fill the order completely. Trades at the limit fill it up to their size.
+                amount = Decimal( order['remaining_amount'] ) if through else min( Decimal( order['remaining_amount'] ), quantity )
+                self.__fill( order, limit, amount, 'Maker' )
+
+    def __fill( self, order, price, amount, liquidity ):
+        executed = Decimal( order['executed_amount'] )
+        average = Decimal( order['avg_execution_price'] )
+        total = executed + amount
+        remaining = Decimal( order['remaining_amount'] ) - amount
+        order['avg_execution_price'] = str( ( ( average * executed + price * amount ) / total ).quantize( self.__instrument( order['symbol'] ).tick ) )
+        order['executed_amount'] = str( total )
+        order['remaining_amount'] = str( remaining )
+        if remaining <= 0:
+            order['is_live'] = False
+            if order['order_id'] in self.__resting: self.__resting.remove( order['order_id'] )
+        notional = price * amount
+        self.volume += notional
+        fee = notional * ( takerfeebps if liquidity == 'Taker' else makerfeebps ) / 10000
+        self.__event( order, 'fill', fill = {
+            'trade_id': str( next( self.__eventids ) ),
+            'liquidity': liquidity,
+            'price': str( price ),
+            'amount': str( amount ),
+            'fee': str( fee.quantize( Decimal( '0.00000001' ) ) ),
+            'fee_currency': self.__instrument( order['symbol'] ).quote
+        } )
+        if not order['is_live']: self.__event( order, 'closed' )
+
+    def __cancel( self, order, reason ):
+        order['is_live'] = False
+        order['is_cancelled'] = True
+        for orders in ( self.__resting, self.__stops ):
+            if order['order_id'] in orders: orders.remove( order['order_id'] )
+        order['reason'] = reason
+        self.__event( order, 'cancelled', reason = reason )
+        self.__event( order, 'closed' )
+
+    # Publication.
+
+    def __eventdict( self, order, eventtype, **fields ):
+        event = {
+            'type': eventtype,
+            'order_id': order['order_id'],
+            'event_id': str( next( self.__eventids ) ),
+            'api_session': 'simulator',
+            'symbol': order['symbol'],
+            'side': order['side'],
+            'order_type': order['type'],
+            'timestamp': str( int( time.time() ) ),
+            'timestampms': int( time.time() * 1000 ),
+            'is_live': order['is_live'],
+            'is_cancelled': order['is_cancelled'],
+            'is_hidden': False,
+            'avg_execution_price': order['avg_execution_price'],
+            'executed_amount': order['executed_amount'],
+            'remaining_amount': order['remaining_amount'],
+            'original_amount': order['original_amount'],
+            'price': order['price']
+        }
+        if 'stop_price' in order: event['stop_price'] = order['stop_price']
+        if 'client_order_id' in order: event['client_order_id'] = order['client_order_id']
+        event.update( fields )
+        return event
+
+    def __wants( self, subscriber, order, eventtype ):
+        if subscriber.symbols is not None and order['symbol'].upper() not in subscriber.symbols: return False
+        return subscriber.eventtypes is None or eventtype in subscriber.eventtypes
+
+    def __event( self, order, eventtype, **fields ):
+        event = self.__eventdict( order, eventtype, **fields )
+        for subscriber in self.__orderevents:
+            if self.__wants( subscriber, order, eventtype ):
+                subscriber.send( json.dumps( [ dict( event, socket_sequence = next( self.__sequence ) ) ] ) )
+
+    def __publish( self, symbol, changes, trades ):
+        # Send the changes and trades to the v2 subscribers of the symbol and to its v1 subscribers.
+        v2frames = []
+        if changes: v2frames.append( self.__l2update( symbol, changes ) )
+        v2frames += [ self.__trade( symbol, side, price, quantity ) for side, price, quantity in trades ]
+        v1frame = None
+        for subscriber in self.__marketdata:
+            if subscriber.symbols is not None:
+                if symbol in subscriber.symbols:
+                    for frame in v2frames: subscriber.send( frame )
+            elif subscriber.symbol == symbol:
+                if v1frame is None: v1frame = self.__v1update( changes, trades, 'place' )
+                subscriber.send( v1frame )
+
+    def __l2update( self, symbol, changes ):
+        return json.dumps( { 'type': 'l2_updates', 'symbol': symbol, 'changes': [ [ side, str( price ), str( quantity ) ] for side, price, quantity in changes ] } )
+
+    def __trade( self, symbol, side, price, quantity ):
+        now = int( time.time() * 1000 )
+        return json.dumps( { 'type': 'trade', 'symbol': symbol, 'event_id': next( self.__eventids ), 'timestamp': now, 'price': str( price ), 'quantity': str( quantity ), 'side': side } )
+
+    def __v1update( self, changes, trades, reason ):
+        events = [ { 'type': 'change', 'side': 'bid' if side == 'buy' else 'ask', 'price': str( price ), 'remaining': str( quantity ), 'delta': str( quantity ), 'reason': reason } for side, price, quantity in changes ]
+        events += [ { 'type': 'trade', 'tid': next( self.__eventids ), 'price': str( price ), 'amount': str( quantity ), 'makerSide': 'ask' if side == 'buy' else 'bid' } for side, price, quantity in trades ]
+        return json.dumps( { 'type': 'update', 'eventId': next( self.__eventids ), 'timestampms': int( time.time() * 1000 ), 'events': events } )
+
+    # Helpers.
+
+    async def __payload( self, request ):
+        # Decode the payload of a private request after the latency injected. Return ( payload, None ) or ( None, error response ).
+        await asyncio.sleep( self.delay() )
+        try: payload = json.loads( base64.b64decode( request.headers['X-GEMINI-PAYLOAD'] ) )
+        except ( KeyError, ValueError ): return None, self.__error( 'MissingPayloadHeader', 'The X-GEMINI-PAYLOAD header is missing or invalid.' )
+        if payload.get( 'request' ) != request.path: return None, self.__error( 'InvalidRequest', f'The payload request {payload.get( "request" )} does not match {request.path}.' )
+        key = request.headers.get( 'X-GEMINI-APIKEY', '' )
+        try: noncevalue = int( payload['nonce'] )
+        except ( KeyError, ValueError ): return None, self.__error( 'InvalidNonce', 'The nonce is missing or invalid.' )
+        if noncevalue <= self.__nonces.get( key, 0 ): return None, self.__error( 'InvalidNonce', f'Nonce {noncevalue} has not increased since your last call.' )
+        self.__nonces[ key ] = noncevalue
+        return payload, None
+
+    def __respond( self, dictionary ):
+        return web.json_response( dictionary )
+
+    def __error( self, reason, message ):
+        return web.json_response( { 'result': 'error', 'reason': reason, 'message': message }, status = 400 )
+
+    def __instrument( self, symbol ):
+        try: return definer.instrument( symbol )
+        except KeyError: return definer.Instrument( symbol.upper(), symbol.upper()[:3], symbol.upper()[3:], Decimal( '0.01' ), Decimal( '0.00000001' ), Decimal( '0.00001' ) )
+
+    def __quantity( self, symbol ):
+        # Random level size (between a hundred and ten thousand minimum orders).
+        instrument = self.__instrument( symbol )
+        return ( instrument.minimumorder * self.random.randint( 100, 10000 ) ).quantize( instrument.minimumquantity )
@@ -1,18 +1,17 @@
 #!/usr/bin/env python3
 
 
-import requests
 import ssl
 import json
-import datetime
-import time
 
 from decimal import Decimal
 
 from libraries.logger import logger as logger
 
 import libraries.definer as definer
-import libraries.authenticator as authenticator
+import libraries.requester as requester
+import libraries.cataloguer as cataloguer
+import libraries.bookkeeper as bookkeeper
 
 def bidorder(
         pair: str,
@@ -20,19 +19,13 @@ def bidorder(
     ) -> None:
 
     # Determine tick size.
-    list = definer.ticksizes
-    item = [ item['tick'] for item in list if item['currency'] == pair[:3] ]
-    tick = Decimal( item[0] )
+    tick = cataloguer.instrument( pair ).tick
 
     # Determine minimum order size (let's call it a tock).
-    list = definer.minimumorders
-    item = [ item['minimumorder'] for item in list if item['currency'] == pair[:3] ]
-    tock = Decimal( item[0] )
-
-    # Get the lowest ask in the orderbook.
-    endpoint = '/v1/pubticker/' + pair
-    response = requests.get( definer.restserver + endpoint )
-    askprice = Decimal( response.json()['ask'] )
+    tock = cataloguer.instrument( pair ).minimumorder
+
+    # Get the lowest ask in the orderbook (from memory when bookkeeper maintains the orderbook).
+    askprice = bookkeeper.bestask( pair )
     bidprice = str( Decimal( askprice - tick ).quantize( askprice ) )
     quantity = str( Decimal( size ).quantize( tick ) )
 
@@ -44,10 +37,8 @@ def bidorder(
     # Construct buy order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': quantity,
         'price': bidprice,
@@ -55,10 +46,7 @@ def bidorder(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
 
@@ -75,20 +63,14 @@ def quotabid(
     notional = Decimal(cash) / Decimal( 1 + fraction )
 
     # Determine tick size.
-    list = definer.ticksizes
-    item = [ item['tick'] for item in list if item['currency'] == pair[:3] ]
-    tick = Decimal( item[0] )
+    tick = cataloguer.instrument( pair ).tick
 
     # Determine minimum order size (let's call it a tock).
-    list = definer.minimumorders
-    item = [ item['minimumorder'] for item in list if item['currency'] == pair[:3] ]
-    tock = Decimal( item[0] )
+    tock = cataloguer.instrument( pair ).minimumorder
 
-    # Get the lowest ask in the orderbook.
+    # Get the lowest ask in the orderbook (from memory when bookkeeper maintains the orderbook).
     # Then determine the bid order size.
-    endpoint = '/v1/pubticker/' + pair
-    response = requests.get( definer.restserver + endpoint )
-    askprice = Decimal( response.json()['ask'] )
+    askprice = bookkeeper.bestask( pair )
     bidprice = str( Decimal( askprice - tick ).quantize( askprice ) )
     quantity = str( Decimal( notional / Decimal(bidprice) ).quantize( tick ) )
 
@@ -100,10 +82,8 @@ def quotabid(
     # Construct buy order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': quantity,
         'price': bidprice,
@@ -111,10 +91,7 @@ def quotabid(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
 
@@ -124,19 +101,13 @@ def askorder(
     ) -> None:
 
     # Determine tick size.
-    list = definer.ticksizes
-    item = [ item['tick'] for item in list if item['currency'] == pair[:3] ]
-    tick = Decimal( item[0] )
+    tick = cataloguer.instrument( pair ).tick
 
     # Determine minimum order size (let's call it a tock).
-    list = definer.minimumorders
-    item = [ item['minimumorder'] for item in list if item['currency'] == pair[:3] ]
-    tock = Decimal( item[0] )
-
-    # Get the highest bid in the orderbook.
-    endpoint = '/v1/pubticker/' + pair
-    response = requests.get( definer.restserver + endpoint )
-    bidprice = Decimal( response.json()['bid'] )
+    tock = cataloguer.instrument( pair ).minimumorder
+
+    # Get the highest bid in the orderbook (from memory when bookkeeper maintains the orderbook).
+    bidprice = bookkeeper.bestbid( pair )
     askprice = str( Decimal( bidprice + tick ).quantize( bidprice ) )
     quantity = str( Decimal( size ).quantize( tick ) )
 
@@ -148,10 +119,8 @@ def askorder(
     # Construct buy order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': quantity,
         'price': askprice,
@@ -159,10 +128,7 @@ def askorder(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
 
@@ -179,20 +145,14 @@ def quotaask(
     notional = Decimal(cash) / Decimal( 1 + fraction )
 
     # Determine tick size.
-    list = definer.ticksizes
-    item = [ item['tick'] for item in list if item['currency'] == pair[:3] ]
-    tick = Decimal( item[0] )
+    tick = cataloguer.instrument( pair ).tick
 
     # Determine minimum order size (let's call it a tock).
-    list = definer.minimumorders
-    item = [ item['minimumorder'] for item in list if item['currency'] == pair[:3] ]
-    tock = Decimal( item[0] )
+    tock = cataloguer.instrument( pair ).minimumorder
 
-    # Get the highest bid in the orderbook.
+    # Get the highest bid in the orderbook (from memory when bookkeeper maintains the orderbook).
     # Then determine the ask order size.
-    endpoint = '/v1/pubticker/' + pair
-    response = requests.get( definer.restserver + endpoint )
-    bidprice = Decimal( response.json()['bid'] )
+    bidprice = bookkeeper.bestbid( pair )
     askprice = str( Decimal( bidprice + tick ).quantize( bidprice ) )
     quantity = str( Decimal( notional / Decimal(askprice) ).quantize( tick ) )
 
@@ -204,10 +164,8 @@ def quotaask(
     # Construct buy order payload.
     # Use 'options': ['maker-or-cancel'] for post only orders.
     endpoint = '/v1/order/new'
-    t = datetime.datetime.now()
     payload = {
         'request': endpoint,
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'symbol': pair,
         'amount': quantity,
         'price': askprice,
@@ -215,9 +173,6 @@ def quotaask(
         'type': 'exchange limit',
         'options': ['maker-or-cancel']
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
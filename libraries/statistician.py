@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+#
+# library name: statistician.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: maintain running session statistics (maximum, minimum, mean and standard deviation) in constant time.
+
+
+# Note:
+#
+# The monitors used to append every price to a list and recompute max(), statistics.mean() and
+# statistics.stdev() over the entire list on every websocket message. Long sessions made every
+# message more expensive to process than the last. This class updates each statistic in O(1):
+#  - the mean and variance use Welford's online algorithm (https://en.wikipedia.org/wiki/Algorithms_for_calculating_variance),
+#  - the maximum and minimum use monotonic queues when a time window is specified (amortized O(1)).
+
+
+import time
+
+from collections import deque
+from decimal import Decimal
+
+class Rollingstatistics:
+
+    # Class Description:
+    #  1. Push values (Decimals) as they arrive from the websocket.
+    #  2. Read the session maximum, minimum, mean and standard deviation at any time.
+    #  3. Pop the most recently pushed value to discard aberrations (i.e. outliers).
+    #
+    # Arguments:
+    #  1. window is the (optional) number of seconds a value remains part of the statistics.
+    #     When omitted every value received during the session contributes.
+    #
+    # Execution:
+    #   - from libraries.statistician import Rollingstatistics
+    #   - sessionstats = Rollingstatistics()
+    #   - sessionstats.push( Decimal( "25000.00" ) )
+    #   - sessionstats.maximum, sessionstats.mean, sessionstats.stdev
+
+    def __init__( self, window = None ):
+        self.__window = None if window is None else float( window )
+        self.__count = 0
+        self.__mean = Decimal( 0 )
+        self.__m2 = Decimal( 0 )
+        self.__undo = None
+
+        # Session extremes (used when there is no window).
+        self.__maximum = None
+        self.__minimum = None
+
+        # Windowed samples and monotonic queues of (timestamp, value) pairs (used with a window).
+        self.__samples = deque()
+        self.__maxima = deque()
+        self.__minima = deque()
+
+    @property
+    def count( self ): return self.__count
+
+    @property
+    def mean( self ): return self.__mean
+
+    @property
+    def maximum( self ):
+        if self.__window is None: return self.__maximum
+        return self.__maxima[0][1] if self.__maxima else None
+
+    @property
+    def minimum( self ):
+        if self.__window is None: return self.__minimum
+        return self.__minima[0][1] if self.__minima else None
+
+    @property
+    def variance( self ):
+        # Sample variance (matches statistics.variance).
+        if self.__count < 2: return Decimal( 0 )
+        return max( self.__m2, Decimal( 0 ) ) / ( self.__count - 1 )
+
+    @property
+    def stdev( self ):
+        # Sample standard deviation (matches statistics.stdev).
+        return self.variance.sqrt()
+
+    def push( self, value, timestamp = None ):
+
+        # Cast as decimal.
+        value = Decimal( value )
+        if timestamp is None: timestamp = time.monotonic()
+
+        # Expire values that have left the window.
+        if self.__window is not None: self.__expire( timestamp )
+
+        # Welford update of the running mean and sum of squared differences.
+        previousmean, previousm2 = self.__mean, self.__m2
+        self.__count += 1
+        delta = value - self.__mean
+        self.__mean += delta / self.__count
+        self.__m2 += delta * ( value - self.__mean )
+
+        if self.__window is None:
+            self.__undo = ( previousmean, previousm2, self.__maximum, self.__minimum )
+            if self.__maximum is None or value > self.__maximum: self.__maximum = value
+            if self.__minimum is None or value < self.__minimum: self.__minimum = value
+        else:
+            self.__samples.append( ( timestamp, value ) )
+            evictedmaxima = []
+            while self.__maxima and self.__maxima[-1][1] <= value: evictedmaxima.append( self.__maxima.pop() )
+            self.__maxima.append( ( timestamp, value ) )
+            evictedminima = []
+            while self.__minima and self.__minima[-1][1] >= value: evictedminima.append( self.__minima.pop() )
+            self.__minima.append( ( timestamp, value ) )
+            self.__undo = ( previousmean, previousm2, evictedmaxima, evictedminima )
+
+    def pop( self ):
+
+        # Retract the value most recently pushed (only one level of undo is kept).
+        if self.__undo is None: raise IndexError( 'nothing to pop from rolling statistics' )
+        previousmean, previousm2, previousmaxima, previousminima = self.__undo
+        self.__undo = None
+        self.__count -= 1
+        self.__mean, self.__m2 = previousmean, previousm2
+
+        if self.__window is None:
+            self.__maximum, self.__minimum = previousmaxima, previousminima
+        else:
+            self.__samples.pop()
+            self.__maxima.pop()
+            self.__maxima.extend( reversed( previousmaxima ) )
+            self.__minima.pop()
+            self.__minima.extend( reversed( previousminima ) )
+
+    def __expire( self, timestamp ):
+
+        # Remove values older than the window using the inverse of Welford's update.
+        cutoff = timestamp - self.__window
+        while self.__samples and self.__samples[0][0] < cutoff:
+            _, value = self.__samples.popleft()
+            self.__count -= 1
+            if self.__count == 0:
+                self.__mean, self.__m2 = Decimal( 0 ), Decimal( 0 )
+            else:
+                delta = value - self.__mean
+                self.__mean -= delta / self.__count
+                self.__m2 -= delta * ( value - self.__mean )
+        while self.__maxima and self.__maxima[0][0] < cutoff: self.__maxima.popleft()
+        while self.__minima and self.__minima[0][0] < cutoff: self.__minima.popleft()
+
+        # Expired values can no longer be retracted.
+        self.__undo = None
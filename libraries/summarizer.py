@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+#
+# library name: summarizer.py
+# library author: munair simpson
+# library created: 20221018
+# library purpose: replace per message log lines in websocket handlers with periodic summaries when running quietly.
+
+
+# Note:
+#
+# The monitors used to build (and log) a descriptive message for every trade or L2 update received, whether or not
+# anything would ever read it. The handlers now describe an event only when the message is emitted:
+#  - normally (definer.quietmode = False) every event is still described and logged (when the log level allows it),
+#  - quietly (definer.quietmode = True) only threshold crossings are described, and a one line summary of the prices
+#    seen (count, low, high and last) is logged every definer.summaryinterval seconds.
+
+
+import time
+import logging
+
+from libraries.logger import logger as logger
+
+import libraries.definer as definer
+
+class Periodicsummary:
+
+    # Class Description:
+    #  1. Tell handlers whether per event messages should be built at all (verbose).
+    #  2. Accumulate the prices seen while quiet and log a summary once per interval.
+    #
+    # Execution:
+    #   - from libraries.summarizer import Periodicsummary
+    #   - summary = Periodicsummary( "BTCUSD", "trades" )
+    #   - if summary.verbose: logger.info( describe( event ) )
+    #   - else: summary.record( event['price'] )
+
+    def __init__( self, pair, label = 'prices', level = logging.INFO, interval = None ):
+        self.pair = pair.upper()
+        self.label = label
+        self.level = level
+        self.interval = float( interval or definer.summaryinterval )
+        self.verbose = not definer.quietmode and logger.isEnabledFor( level )
+        self.reset()
+
+    def reset( self ):
+        self.count = 0
+        self.low = None
+        self.high = None
+        self.last = None
+        self.started = time.monotonic()
+
+    def record( self, price ):
+        # Accumulate a price (cheap comparisons only). Log the summary when the interval has elapsed.
+        self.count += 1
+        self.last = price
+        if self.low is None or price < self.low: self.low = price
+        if self.high is None or price > self.high: self.high = price
+        if time.monotonic() - self.started >= self.interval: self.emit()
+
+    def emit( self ):
+        if self.count and logger.isEnabledFor( logging.INFO ):
+            elapsed = time.monotonic() - self.started
+            logger.info( f'{self.pair} {self.label} summary [{self.count} in {elapsed:.0f}s]: low {self.low:,.2f}, high {self.high:,.2f}, last {self.last:,.2f}.' )
+        self.reset()
@@ -7,14 +7,59 @@
 
 
 import sys
-import json
 import asyncio
-import websockets
 
 from decimal import Decimal
 
 from libraries.logger import logger as logger
 from libraries.messenger import sendmessage as sendmessage
+from libraries.multiplexer import multiplexer as multiplexer
+from libraries.summarizer import Periodicsummary
+
+def pricerangewatcher(
+        marketpair: str,
+        upperbound: str,
+        lowerbound: str
+    ) -> object:
+
+    # Build the trade watcher of blockpricerange() (the multiplexer callback). It never touches a socket (so benchmarks drive it directly).
+    # It returns ( event, infomessage ) when a bound is breached.
+
+    # Cast as decimals.
+    upperbound = Decimal( upperbound )
+    lowerbound = Decimal( lowerbound )
+
+    # Describe a trade (for display only, so it is only built when the message is emitted).
+    def describe( event ) :
+        tradeprice = event[ 'price' ]
+        tradevalue = event[ 'amount' ]
+        amountless = Decimal( 100 * ( upperbound - tradeprice ) / upperbound )
+        amountmore = Decimal( 100 * ( tradeprice - lowerbound ) / lowerbound )
+        tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
+        if event['makerSide'] == "ask" : takeraction = "increase"
+        if event['makerSide'] == "bid" : takeraction = "decrease"
+        infomessage = f'[{amountless:.2f}% below {upperbound:,.2f} {marketpair[3:]} upper bound] '
+        infomessage = infomessage + f'[{amountmore:.2f}% above {lowerbound:,.2f} {marketpair[3:]} lower bound] '
+        infomessage = infomessage + f'{tradeprice:,.2f} {marketpair[3:]} {event["makerSide"]} price taken to '
+        infomessage = infomessage + f'quickly {takeraction} {marketpair[:3]} hoard by {tradevalue:,.2f} {marketpair[3:]}. '
+        return infomessage
+
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    # Returning a value (rather than None) stops the watcher.
+    summary = Periodicsummary( marketpair, 'trade prices' )
+    def on_trade( event ) :
+        tradeprice = event[ 'price' ]
+        if summary.verbose : logger.info ( describe( event ) )
+        else : summary.record( tradeprice )
+        if event['makerSide'] == "ask" :
+            if lowerbound.compare( tradeprice ) == 1 :
+                infomessage = f'{lowerbound:,.2f} {marketpair[3:]} lower/ask price bound breached. '
+                return ( event, infomessage )
+        if event['makerSide'] == "bid" :
+            if tradeprice.compare( upperbound ) == 1 :
+                infomessage = f'{upperbound:,.2f} {marketpair[3:]} upper/bid price bound breached. '
+                return ( event, infomessage )
+    return on_trade
 
 async def blockpricerange(
         marketpair: str,
@@ -26,59 +71,17 @@ async def blockpricerange(
     upperbound = Decimal( upperbound )
     lowerbound = Decimal( lowerbound )
 
-    # Request trade data only.
-    urlrequest = "wss://api.gemini.com/v1/marketdata/" + marketpair.lower()
-    parameters = "?trades=true&heartbeat=true"
-    connection = urlrequest + parameters
-
     # Introduce function.
     logger.info(f'Looping while {marketpair[:3]} prices are between {lowerbound:,.2f} {marketpair[3:]} and {upperbound:,.2f} {marketpair[3:]}')
 
-    keeplooping = True
-
-    async with websockets.connect(connection) as websocket:
-        while keeplooping :
-            message = await websocket.recv()
-            # Remove comment to debug with: logger.debug( message )
-            # Load update into a dictionary.
-            dictionary = json.loads( message )
-
-            # Display heartbeat
-            if dictionary[ 'type' ] == "heartbeat" : logger.debug ( f'Heartbeat: {dictionary[ "socket_sequence" ]}' )
-            else :
-
-                # Define events array/list.
-                events = dictionary[ 'events' ]
-                if events == [] : 
-                    logger.debug( f'No update events. Received: {message}  ' )
-                else:
-                    # Verify the array of events is a list.
-                    # Iterate through each event in the update.
-                    if isinstance ( events, list ):
-                        for event in events:
-                            tradeprice = Decimal( event[ 'price' ] )
-                            tradevalue = Decimal( event[ 'amount' ] )
-                            amountless = Decimal( 100 * ( upperbound - tradeprice ) / upperbound )
-                            amountmore = Decimal( 100 * ( tradeprice - lowerbound ) / lowerbound )
-                            tradevalue = Decimal( tradevalue * tradeprice ).quantize( tradeprice )
-                            if event['makerSide'] == "ask" : takeraction = "increase"
-                            if event['makerSide'] == "bid" : takeraction = "decrease"
-                            infomessage = f'[{amountless:.2f}% below {upperbound:,.2f} {marketpair[3:]} upper bound] '
-                            infomessage = infomessage + f'[{amountmore:.2f}% above {lowerbound:,.2f} {marketpair[3:]} lower bound] '
-                            infomessage = infomessage + f'{tradeprice:,.2f} {marketpair[3:]} {event["makerSide"]} price taken to '
-                            infomessage = infomessage + f'quickly {takeraction} {marketpair[:3]} hoard by {tradevalue:,.2f} {marketpair[3:]}. '
-                            logger.info ( f'{infomessage}' )
-                            if event['makerSide'] == "ask" : 
-                                if lowerbound.compare( tradeprice ) == 1 : 
-                                    infomessage = f'{lowerbound:,.2f} {marketpair[3:]} lower/ask price bound breached. '
-                                    keeplooping = False
-                            if event['makerSide'] == "bid" : 
-                                if tradeprice.compare( upperbound ) == 1 : 
-                                    infomessage = f'{upperbound:,.2f} {marketpair[3:]} upper/bid price bound breached. '
-                                    keeplooping = False
-        logger.info ( infomessage )
-        sendmessage ( infomessage )
-        return event # Dictionary.
+    # Define trade watcher (called by the shared marketdata multiplexer for every trade).
+    on_trade = pricerangewatcher( marketpair, upperbound, lowerbound )
+
+    # Await trades on the shared marketdata connection (the connection outlives this coroutine and its event loop).
+    event, infomessage = await multiplexer.waituntil( marketpair, ontrade = on_trade )
+    logger.info ( infomessage )
+    sendmessage ( infomessage )
+    return event # Dictionary.
 
 if __name__ == "__main__":
 
@@ -6,14 +6,10 @@
 # library purpose: retrieve trading activity dependent data for the last 30 days across all pairs traded
 
 
-import requests
-import datetime
-import time
 
 from libraries.logger import logger as logger
 
-import libraries.definer as definer
-import libraries.authenticator as authenticator
+import libraries.requester as requester
 
 def notionalvolume() -> None:
 
@@ -21,14 +17,9 @@ def notionalvolume() -> None:
     # like transaction fees and 
     # trading volume (USD terms).
     endpoint = '/v1/notionalvolume'
-    t = datetime.datetime.now()
     payload = {
-        'nonce': str(int(time.mktime(t.timetuple())*1000)),
         'request': endpoint
     }
-    headers = authenticator.authenticate(payload)
-
-    request = definer.restserver + endpoint
-    response = requests.post(request, data = None, headers = headers['restheader'])
+    response = requester.post( endpoint, payload )
 
     return response
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+#
+# script name: marketdataplayer.py
+# script author: munair simpson
+# script created: 20221018
+# script purpose: replay a marketdata recording from a local websocket server.
+
+
+# Detailed Description:
+#  1. Use the player library to load a recording made by marketdatarecorder.py.
+#  2. Serve it on the port specified at the speed specified (a multiple of real time; 0 is as fast as possible).
+#  3. Point definer.sockserver at the player (for example sockserver = 'ws://127.0.0.1:8765') and run the monitors offline.
+#
+# Execution:
+#   - Use the wrapper BASH script in the "tests" directory.
+
+import sys
+import asyncio
+
+from libraries.logger import logger
+from libraries.profiler import profileonsignal
+from libraries.player import Marketdataplayer
+
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
+# Set default recording, port, speed and looping in case a BASH wrapper has not been used.
+recording = "/tmp/marketdata.jsonl.gz"
+port = "8765"
+speed = "1"
+loop = "no"
+
+# Override defaults with command line parameters from BASH wrapper.
+if len ( sys.argv ) == 5 :
+    recording = sys.argv[1]
+    port = sys.argv[2]
+    speed = sys.argv[3]
+    loop = sys.argv[4]
+else :
+    logger.warning ( f'incorrect number of command line arguments. using default values...' )
+    logger.warning ( f'recording: {recording}' )
+    logger.warning ( f'port: {port}' )
+    logger.warning ( f'speed: {speed}' )
+    logger.warning ( f'loop: {loop}' )
+
+player = Marketdataplayer( recording, speed = float( speed ), loop = loop.lower() in ( 'yes', 'true', '1' ) )
+
+try : # Serve the recording until interrupted.
+    asyncio.run ( player.serve( '127.0.0.1', int( port ) ) )
+except KeyboardInterrupt :
+    pass
+
+sys.exit ( 0 )
\ No newline at end of file
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+#
+# script name: marketdatarecorder.py
+# script author: munair simpson
+# script created: 20221018
+# script purpose: record raw Gemini marketdata websocket frames to a compressed file for offline replay.
+
+
+# Detailed Description:
+#  1. Use the recorder library to subscribe to the v2 (and optionally v1) marketdata feeds of the pairs specified.
+#  2. Write every frame received with its timestamp to a gzip compressed recording for the duration specified.
+#  3. Replay the recording with marketdataplayer.py (or measure decoders on it with decoderbenchmark.py).
+#
+# Execution:
+#   - Use the wrapper BASH script in the "tests" directory.
+
+import sys
+import asyncio
+
+from libraries.logger import logger
+from libraries.profiler import profileonsignal
+from libraries.recorder import record
+
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
+# Set default recording, trading pairs, duration and endpoints in case a BASH wrapper has not been used.
+recording = "/tmp/marketdata.jsonl.gz"
+marketpairs = "BTCUSD,ETHUSD"
+duration = "60"
+endpoints = "/v2/marketdata"
+
+# Override defaults with command line parameters from BASH wrapper.
+if len ( sys.argv ) == 5 :
+    recording = sys.argv[1]
+    marketpairs = sys.argv[2]
+    duration = sys.argv[3]
+    endpoints = sys.argv[4]
+else :
+    logger.warning ( f'incorrect number of command line arguments. using default values...' )
+    logger.warning ( f'recording: {recording}' )
+    logger.warning ( f'marketpairs: {marketpairs}' )
+    logger.warning ( f'duration: {duration}' )
+    logger.warning ( f'endpoints: {endpoints}' )
+
+try : # Record until the duration elapses.
+    recorded = asyncio.run (
+        record (
+            recording,
+            marketpairs.split( ',' ),
+            endpoints.split( ',' ),
+            float( duration )
+        )
+    )
+except KeyboardInterrupt :
+    sys.exit ( 1 )
+
+# Let the shell know whether anything was recorded.
+sys.exit ( 0 if recorded else 1 )
\ No newline at end of file
@@ -15,10 +15,14 @@ import requests
 from decimal import Decimal
 
 from libraries.logger import logger
+from libraries.profiler import profileonsignal
 from libraries.bidmonitor import anchoredrise
 from libraries.frontrunner import askorder
 from libraries.fillvalidator import confirmexecution
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 
 # Set quote currency (USD in this case) budget.
 # This amount should exceed 20 cents ['0.00001' is the minimum for YFIUSD].
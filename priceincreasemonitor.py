@@ -16,8 +16,12 @@
 import sys
 
 from libraries.logger import logger
+from libraries.profiler import profileonsignal
 from libraries.marketmonitor import priceincrease
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 # Set default trading pair and loop exit price in case a BASH wrapper has not been used.
 pair = "ETHUSD"
 exit = "2400"
@@ -15,9 +15,13 @@ import requests
 from decimal import Decimal
 
 from libraries.logger import logger
+from libraries.profiler import profileonsignal
 from libraries.liquiditymaker import quotaask
 from libraries.fillvalidator import confirmexecution
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 
 # Set the pair.
 # Set quote currency (USD in this case) budget.
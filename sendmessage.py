@@ -15,7 +15,12 @@
 import sys
 
 from libraries.logger import logger
+from libraries.profiler import profileonsignal
 from libraries.messenger import sendmessage
+from libraries.messenger import flush
+
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
 
 # Set default message in cause a BASH wrapper has not been used.
 message = "Sending a test message from a Python script using a custom (messenger.py) library."
@@ -26,7 +31,7 @@ if len(sys.argv) == 2 :
 else :
     logger.error ( f'incorrect number of command line arguments. using default value of {message}...' )
 
-# Cancel message.
-sendmessagestatus = sendmessage( message )
+# Send message (and wait for the dispatcher to deliver it).
+sendmessagestatus = sendmessage( message ) and flush()
 if sendmessagestatus : sys.exit(0)
 else : sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+#
+# script name: signaturebenchmark.py
+# script author: munair simpson
+# script created: 20221018
+# script purpose: measure how many private API payloads the authenticator library signs per second.
+
+
+# Detailed Description:
+#  1. Sign a typical "/v1/order/new" payload repeatedly the way authenticator.authenticate() used to (before the Signer class).
+#  2. Sign the same payload with the cached Signer (REST header set only).
+#  3. Print the signatures per second for both using the logger library.
+#
+# Execution:
+#   - Use the wrapper BASH script in the "tests" directory.
+
+import sys
+import json
+import hmac
+import time
+import base64
+import hashlib
+
+from libraries.logger import logger
+from libraries.profiler import profileonsignal
+from libraries.authenticator import Signer
+
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
+# Set default number of signatures in case a BASH wrapper has not been used.
+count = 100000
+
+# Override defaults with command line parameters from BASH wrapper.
+if len(sys.argv) == 2 :
+    count = int( sys.argv[1] )
+else :
+    logger.debug ( f'incorrect number of command line arguments. using default value of {count} signatures...' )
+
+# Use throwaway credentials. Nothing is sent to Gemini.
+key = 'account-benchmark'
+secret = 'benchmarksecret'
+
+payload = {
+    'request': '/v1/order/new',
+    'nonce': '1666051200000000',
+    'symbol': 'BTCUSD',
+    'amount': '0.00001',
+    'price': '19000.00',
+    'side': 'buy',
+    'type': 'exchange limit',
+    'options': ['maker-or-cancel']
+}
+
+def legacy( payload ):
+    # Replica of authenticator.authenticate() before the Signer class.
+    encodedpayload = json.dumps(payload).encode()
+    b64 = base64.b64encode(encodedpayload)
+    signature = hmac.new(secret.encode(), b64, hashlib.sha384).hexdigest()
+    apihead = { 'Content-Type': "text/plain",
+                'Content-Length': "0",
+                'X-GEMINI-APIKEY': key,
+                'X-GEMINI-PAYLOAD': b64,
+                'X-GEMINI-SIGNATURE': signature,
+                'Cache-Control': "no-cache" }
+    wsshead = { 'X-GEMINI-PAYLOAD': b64.decode(),
+                'X-GEMINI-APIKEY': key,
+                'X-GEMINI-SIGNATURE': signature }
+    return { 'sockheader': wsshead, 'restheader': apihead }
+
+def measure( function ):
+    # Return signatures per second.
+    start = time.perf_counter()
+    for _ in range( count ): function( payload )
+    return count / ( time.perf_counter() - start )
+
+signer = Signer( key, secret )
+before = measure( legacy )
+after = measure( signer.restheader )
+
+logger.info ( f'before: {before:,.0f} signatures per second.' )
+logger.info ( f'after:  {after:,.0f} signatures per second.' )
+logger.info ( f'speedup: {after / before:.2f}x' )
+
+# Let the shell know we successfully made it this far!
+sys.exit(0)
@@ -0,0 +1,24 @@
+#! /bin/bash
+#
+# script name: decoderbenchmark.bash
+# script author: munair simpson
+# script created: 20221018
+# script purpose: wrapper for decoderbenchmark.py
+
+# Measure how many Gemini marketdata messages each decoder library backend decodes per second:
+# Parameter 0 is a capture file of raw v2 marketdata messages (one per line, optionally gzip compressed) or a marketdatarecorder.py recording. Leave it empty to generate messages.
+# Parameter 1 is the number of passes over the messages.
+
+# Execution:
+# python3 ../decoderbenchmark.py /tmp/marketdata.jsonl.gz 5
+
+capture=""
+passes="5"
+
+read -p "type a capture file or press enter to continue with generated messages [$capture]: " capture
+read -p "type the number of passes or press enter to continue with default [$passes]: " passes
+
+passes=${passes:-5}
+
+cd ..
+python3 decoderbenchmark.py "$capture" $passes
\ No newline at end of file
@@ -0,0 +1,32 @@
+#! /bin/bash
+#
+# script name: exchangesimulator.bash
+# script author: munair simpson
+# script created: 20221018
+# script purpose: wrapper for exchangesimulator.py
+
+# Run a local Gemini exchange simulator (set definer.restserver to http://127.0.0.1:<port> and definer.sockserver to ws://127.0.0.1:<port> to use it).
+# Parameter 0 is the comma separated list of market/trading pairs simulated with their starting prices.
+# Parameter 1 is the local port served.
+# Parameter 2 is the latency (in milliseconds) injected into every response and websocket frame.
+# Parameter 3 is a recording made by marketdatarecorder.py to drive the market with. Leave it empty for a random walk.
+
+# Execution:
+# python3 ../exchangesimulator.py BTCUSD:20000,ETHUSD:1500 8780 0
+
+marketpairs="BTCUSD:20000,ETHUSD:1500"
+port="8780"
+latency="0"
+recording=""
+
+read -p "type (market/trading) pairs and prices or press enter to continue with default [$marketpairs]: " marketpairs
+read -p "type port or press enter to continue with default [$port]: " port
+read -p "type latency in milliseconds or press enter to continue with default [$latency]: " latency
+read -p "type recording file or press enter to continue with a random walk [$recording]: " recording
+
+marketpairs=${marketpairs:-BTCUSD:20000,ETHUSD:1500}
+port=${port:-8780}
+latency=${latency:-0}
+
+cd ..
+python3 exchangesimulator.py $marketpairs $port $latency $recording
\ No newline at end of file
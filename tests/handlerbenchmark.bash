@@ -0,0 +1,30 @@
+#! /bin/bash
+#
+# script name: handlerbenchmark.bash
+# script author: munair simpson
+# script created: 20221018
+# script purpose: wrapper for handlerbenchmark.py
+
+# Measure the messages per second and the allocations per message of every marketdata handler (without sockets).
+# Results are stored by git commit, capture file and passes in definer.benchmarkresults and compared with the previous commit's results
+# for the same capture file and passes. The script exits with status 1 when a handler regressed (its best pass or its allocations).
+# Parameter 0 is a marketdatarecorder.py recording or a capture file of raw v2 marketdata messages. Leave it empty to generate messages.
+# Parameter 1 is the number of passes over the messages.
+# Parameter 2 is the tolerance (the fraction a handler may slow down or allocate more by before it counts as a regression).
+
+# Execution:
+# python3 ../handlerbenchmark.py /tmp/marketdata.jsonl.gz 10 0.10
+
+capture=""
+passes="10"
+tolerance="0.10"
+
+read -p "type a capture file or press enter to continue with generated messages [$capture]: " capture
+read -p "type the number of passes or press enter to continue with default [$passes]: " passes
+read -p "type the regression tolerance or press enter to continue with default [$tolerance]: " tolerance
+
+passes=${passes:-10}
+tolerance=${tolerance:-0.10}
+
+cd ..
+python3 handlerbenchmark.py "$capture" $passes $tolerance
\ No newline at end of file
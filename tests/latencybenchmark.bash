@@ -0,0 +1,31 @@
+#! /bin/bash
+#
+# script name: latencybenchmark.bash
+# script author: munair simpson
+# script created: 20221018
+# script purpose: wrapper for latencybenchmark.py
+
+# Measure order round trip latencies (ticker, signing, submit, booked and confirm) end to end against a local exchange simulator.
+# Results are stored by git commit and run parameters in definer.benchmarkresults and compared with the previous commit's
+# results for the same parameters (the median p50 of the runs).
+# Parameter 0 is the number of iterations per run.
+# Parameter 1 is the latency (in milliseconds) the simulator injects into every response and websocket frame.
+# Parameter 2 is the number of runs.
+
+# Execution:
+# python3 ../latencybenchmark.py 200 0 5
+
+iterations="200"
+latency="0"
+runs="5"
+
+read -p "type the number of iterations or press enter to continue with default [$iterations]: " iterations
+read -p "type the injected latency in milliseconds or press enter to continue with default [$latency]: " latency
+read -p "type the number of runs or press enter to continue with default [$runs]: " runs
+
+iterations=${iterations:-200}
+latency=${latency:-0}
+runs=${runs:-5}
+
+cd ..
+python3 latencybenchmark.py $iterations $latency $runs
\ No newline at end of file
@@ -0,0 +1,33 @@
+#! /bin/bash
+#
+# script name: marketdataplayer.bash
+# script author: munair simpson
+# script created: 20221018
+# script purpose: wrapper for marketdataplayer.py
+
+# Replay a marketdata recording from a local websocket server (set definer.sockserver to ws://127.0.0.1:<port> to use it).
+# Parameter 0 is the recording made by marketdatarecorder.py.
+# Parameter 1 is the local port served.
+# Parameter 2 is the replay speed (1 is real time, 10 is ten times faster and 0 is as fast as possible).
+# Parameter 3 is whether the replay starts over when the recording ends (yes or no).
+
+# Execution:
+# python3 ../marketdataplayer.py /tmp/marketdata.jsonl.gz 8765 1 no
+
+recording="/tmp/marketdata.jsonl.gz"
+port="8765"
+speed="1"
+loop="no"
+
+read -p "type recording file or press enter to continue with default [$recording]: " recording
+read -p "type port or press enter to continue with default [$port]: " port
+read -p "type replay speed or press enter to continue with default [$speed]: " speed
+read -p "type whether to loop (yes or no) or press enter to continue with default [$loop]: " loop
+
+recording=${recording:-/tmp/marketdata.jsonl.gz}
+port=${port:-8765}
+speed=${speed:-1}
+loop=${loop:-no}
+
+cd ..
+python3 marketdataplayer.py $recording $port $speed $loop
\ No newline at end of file
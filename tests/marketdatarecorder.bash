@@ -0,0 +1,33 @@
+#! /bin/bash
+#
+# script name: marketdatarecorder.bash
+# script author: munair simpson
+# script created: 20221018
+# script purpose: wrapper for marketdatarecorder.py
+
+# Record raw Gemini marketdata websocket frames to a compressed file for offline replay.
+# Parameter 0 is the recording (a gzip compressed JSON Lines file).
+# Parameter 1 is the comma separated list of market/trading pairs recorded.
+# Parameter 2 is the number of seconds recorded.
+# Parameter 3 is the comma separated list of endpoints recorded (/v2/marketdata and/or /v1/marketdata).
+
+# Execution:
+# python3 ../marketdatarecorder.py /tmp/marketdata.jsonl.gz BTCUSD,ETHUSD 60 /v2/marketdata
+
+recording="/tmp/marketdata.jsonl.gz"
+marketpairs="BTCUSD,ETHUSD"
+duration="60"
+endpoints="/v2/marketdata"
+
+read -p "type recording file or press enter to continue with default [$recording]: " recording
+read -p "type (market/trading) pairs or press enter to continue with default [$marketpairs]: " marketpairs
+read -p "type seconds to record or press enter to continue with default [$duration]: " duration
+read -p "type endpoints or press enter to continue with default [$endpoints]: " endpoints
+
+recording=${recording:-/tmp/marketdata.jsonl.gz}
+marketpairs=${marketpairs:-BTCUSD,ETHUSD}
+duration=${duration:-60}
+endpoints=${endpoints:-/v2/marketdata}
+
+cd ..
+python3 marketdatarecorder.py $recording $marketpairs $duration $endpoints
\ No newline at end of file
@@ -0,0 +1,18 @@
+#! /bin/bash
+#
+# script name: signaturebenchmark.bash
+# script author: munair simpson
+# script created: 20221018
+# script purpose: wrapper for signaturebenchmark.py
+
+# Measure how many private API payloads the authenticator library signs per second (before and after the Signer class):
+# Parameter 0 is the number of signatures.
+
+# Execution:
+# python3 ../signaturebenchmark.py 100000
+
+count="100000"
+
+read -p "type a replacement value or press enter to continue with default argument [$count]: " count && count=${count:-100000}
+
+python3 ../signaturebenchmark.py $count
\ No newline at end of file
@@ -19,8 +19,12 @@ import time
 import json
 
 from libraries.logger import logger
+from libraries.profiler import profileonsignal
 from libraries.pricegetter import ticker
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 # Set trading default trading pair in cause a BASH wrapper has not been used.
 pair = 'BTCUSD'
 
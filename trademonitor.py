@@ -18,8 +18,12 @@ import sys
 import asyncio
 
 from libraries.logger import logger
+from libraries.profiler import profileonsignal
 from libraries.trademonitor import blockpricerange
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 # Set default trading pair and loop exit price in case a BASH wrapper has not been used.
 marketpair = "ETHUSD"
 upperbound = "1500"
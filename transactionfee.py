@@ -15,9 +15,13 @@ import sys
 import json
 
 from libraries.logger import logger
+from libraries.profiler import profileonsignal
 from libraries.messenger import sendmessage
 from libraries.volumizer import notionalvolume
 
+# Sample the stacks of every thread for a while when signalled (kill -USR1 <pid>). Nothing runs until then.
+profileonsignal()
+
 # Submit request.
 logger.debug ( f'Submitting request...' )
 jsonresponse = notionalvolume().json()